@@ -223,10 +223,15 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, 'src', 'data')
 os.makedirs(DATA_DIR, exist_ok=True)
 
-LATEST_DATA_FILE = os.path.join(DATA_DIR, 'latest_weather.json')
 HISTORICAL_DIR = os.path.join(DATA_DIR, 'historical')
 os.makedirs(HISTORICAL_DIR, exist_ok=True)
 
+# Magatzem històric acumulatiu (SQLite, vegeu src/magatzem_historic.py)
+HISTORICAL_DB = os.path.join(HISTORICAL_DIR, 'historic.sqlite')
+# Dies de files semihoràries completes al SQLite; les més antigues es compacten en
+# segments columnars (src/manteniment_historic.py). Els rollups es conserven sempre.
+HISTORICAL_RETENTION_DAYS = 45
+
 # Fitxers HTML - Ara sí: overlay-plus/public/
 HTML_TEMPLATE = os.path.join(BASE_DIR, 'banner_news_channel.html')
 OUTPUT_HTML = os.path.join(BASE_DIR, 'public', 'banner_output.html')  # Ajusta si cal
@@ -243,6 +248,33 @@ METEOcat_CONFIG = {
 
 API_KEY = None  # Modo web scraping
 
+# Límit de peticions a meteo.cat compartit per tots els fils i processos de la
+# màquina (src/limitador_peticions.py): ritme sostingut i ràfega màxima. Abans
+# del limitador, les pauses fixes entre peticions deixaven el ritme per sota d'1/s;
+# no es puja sense saber com ho porta meteo.cat.
+SCRAPING_REQUESTS_PER_SECOND = 1.0
+SCRAPING_BURST = 2
+# Temps màxim dels scrapers per execució, comptat des de l'inici de l'executor
+# (src/pressupost_temps.py). La resta fins al dispatch següent és per al generador,
+# el desplegament i el manteniment.
+SCRAPING_RUN_BUDGET_SECONDS = 18 * 60
+# Ordre del scraping per prioritat (src/prioritat_estacions.py): pes 1 per estació,
+# multiplicat per cada factor que li toca. Les de més pes es refresquen primer i,
+# amb el temps just, són les que no es queden amb les dades anteriors.
+SCRAPING_PRIORITY_WEIGHTS = {}       # Pes fix per codi, p. ex. {'Z1': 2.0}
+SCRAPING_PRIORITY_ROTATION = 1.0     # Fins a +100% per a les que el rotador mostra primer i més vegades
+SCRAPING_PRIORITY_SNOW = 3.0         # Estacions de neu (VAR_GN_cm o altitud) en temporada de neu
+SCRAPING_SNOW_SEASON_MONTHS = (11, 12, 1, 2, 3, 4, 5)
+SCRAPING_SNOW_MIN_ALTITUDE = 1500    # m: estacions de muntanya sense sensor de neu
+SCRAPING_PRIORITY_ALERT = 4.0        # Estacions amb un avís manual o un llindar superat al darrer període
+SCRAPING_ALERT_STATIONS = []         # Codis amb un avís actiu
+SCRAPING_ALERT_THRESHOLDS = {
+    'VAR_PPT_mm': 5.0,               # mm en mitja hora
+    'VAR_VVX_10_m_km_h': 70.0,       # Ratxa
+    'VAR_VVX_6_m_km_h': 70.0,
+    'VAR_VVX_2_m_km_h': 70.0
+}
+
 # ============================================================================
 # CONFIGURACIÓ DE TEMPS
 # ============================================================================
@@ -275,10 +307,6 @@ def get_update_text():
     current = get_current_datetime()
     return f"Actualitzat: {current['time']} - Data: {current['date']}"
 
-def get_station_file_path(station_code):
-    """Retorna la ruta del fitxer històric per una estació"""
-    return os.path.join(HISTORICAL_DIR, f"{station_code}.json")
-
 # ============================================================================
 # VALORS PER DEFECTE
 # ============================================================================
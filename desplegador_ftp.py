@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+desplegador_ftp.py - Desplegament diferencial per FTP (Nominalia)
+=================================================================
+1. Calcula el hash SHA-256 de cada fitxer del paquet local (deploy-package/)
+2. Llegeix el manifest de hashes que es va deixar al servidor a l'últim desplegament
+3. Puja NOMÉS els fitxers nous o canviats, amb un petit grup de connexions en paral·lel
+4. Esborra els fitxers obsolets en una sola sessió
+5. Desa el nou manifest al servidor (sempre al final)
+
+Ús:
+    python desplegador_ftp.py deploy-package --remote-dir /www/ginys/public_html/overlay-plus
+
+Credencials per variables d'entorn: NOMINALIA_FTP_HOST, NOMINALIA_FTP_USER, NOMINALIA_FTP_PASS
+(opcional NOMINALIA_FTP_PORT). Es pot provar contra un servidor local com pyftpdlib.
+"""
+
+import argparse
+import ftplib
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# ============================================================================
+# CONFIGURACIÓ
+# ============================================================================
+REMOTE_DIR_PER_DEFECTE = "/www/ginys/public_html/overlay-plus"
+MANIFEST_REMOT = ".manifest_desplegament.json"
+CONNEXIONS_PARALLELES = 4
+TIMEOUT_SEGONS = 30
+MAX_INTENTS_PUJADA = 2
+
+# Fitxers que gestiona el desplegament (la resta del directori remot no es toca mai)
+PATRO_FITXERS_GESTIONATS = re.compile(
+    r'^((index_[A-Z0-9]+\.html|banner\.html|station_list\.json|estacio\.html'
+    r'|stations_data\.json|rotation_manifest\.json)(\.gz|\.br)?|\.htaccess)$'
+)
+
+
+# ============================================================================
+# FUNCIONS AUXILIARS
+# ============================================================================
+def calcular_hash(ruta):
+    """Retorna el SHA-256 d'un fitxer"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloc in iter(lambda: f.read(65536), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+def manifest_local(directori_local):
+    """Retorna {nom_fitxer: hash} dels fitxers gestionats del paquet local"""
+    manifest = {}
+    for ruta in sorted(Path(directori_local).iterdir()):
+        if ruta.is_file() and PATRO_FITXERS_GESTIONATS.match(ruta.name):
+            manifest[ruta.name] = calcular_hash(ruta)
+    return manifest
+
+def connectar(config):
+    """Obre una sessió FTP en mode passiu i es situa al directori remot"""
+    ftp = ftplib.FTP(timeout=config['timeout'])
+    ftp.connect(config['host'], config['port'])
+    ftp.login(config['usuari'], config['contrasenya'])
+    ftp.set_pasv(True)
+    ftp.cwd(config['directori_remot'])
+    return ftp
+
+def tancar(ftp):
+    """Tanca una sessió FTP sense fallar si ja s'ha perdut la connexió"""
+    try:
+        ftp.quit()
+    except Exception:
+        ftp.close()
+
+def llegir_manifest_remot(ftp):
+    """Llegeix el manifest de hashes del servidor ({} si no existeix o està malmès)"""
+    buffer = io.BytesIO()
+    try:
+        ftp.retrbinary(f"RETR {MANIFEST_REMOT}", buffer.write)
+        dades = json.loads(buffer.getvalue().decode('utf-8'))
+        return dades.get('fitxers', {})
+    except (ftplib.error_perm, ValueError, UnicodeDecodeError):
+        return {}
+
+def llistar_remots(ftp):
+    """Llista els noms de fitxer del directori remot"""
+    try:
+        return set(Path(nom).name for nom in ftp.nlst())
+    except ftplib.error_perm:
+        # Alguns servidors responen 550 quan el directori és buit
+        return set()
+
+def nom_temporal(nom):
+    return f".{nom}.part"
+
+def es_temporal(nom):
+    """Resta d'una pujada a mitges d'un fitxer gestionat ('.banner.html.part')"""
+    return (nom.startswith('.') and nom.endswith('.part')
+            and bool(PATRO_FITXERS_GESTIONATS.match(nom[1:-len('.part')])))
+
+def esborrar_si_hi_es(ftp, nom):
+    """Esborra un fitxer remot sense fallar si no hi és (o la connexió ja no respon)"""
+    try:
+        ftp.delete(nom)
+        return True
+    except ftplib.all_errors:
+        return False
+
+def pujar_fitxer(ftp, directori_local, nom):
+    """Puja un fitxer amb un nom temporal i el reanomena (mai se serveix mig pujat)"""
+    temporal = nom_temporal(nom)
+    acabat = False
+    try:
+        with open(Path(directori_local) / nom, 'rb') as f:
+            ftp.storbinary(f"STOR {temporal}", f)
+        try:
+            ftp.rename(temporal, nom)
+        except ftplib.error_perm:
+            # Alguns servidors no deixen fer RNTO sobre un fitxer existent
+            esborrar_si_hi_es(ftp, nom)
+            ftp.rename(temporal, nom)
+        acabat = True
+    finally:
+        if not acabat:
+            esborrar_si_hi_es(ftp, temporal)
+
+
+# ============================================================================
+# DESPLEGAMENT
+# ============================================================================
+def pujar_en_paralel(config, directori_local, noms, connexions):
+    """
+    Puja els fitxers amb un grup de connexions FTP (una per fil).
+    Retorna (pujats, errors) on errors és {nom: missatge}.
+    """
+    pendents = list(noms)
+    bloqueig = threading.Lock()
+    pujats = []
+    errors = {}
+
+    def treballador():
+        ftp = None
+        try:
+            while True:
+                with bloqueig:
+                    if not pendents:
+                        return
+                    nom = pendents.pop(0)
+                for intent in range(1, MAX_INTENTS_PUJADA + 1):
+                    try:
+                        if ftp is None:
+                            ftp = connectar(config)
+                        pujar_fitxer(ftp, directori_local, nom)
+                        with bloqueig:
+                            pujats.append(nom)
+                        print(f"   ⬆️  {nom}")
+                        break
+                    except ftplib.all_errors as e:
+                        if ftp is not None:
+                            tancar(ftp)
+                            ftp = None
+                        if intent == MAX_INTENTS_PUJADA:
+                            with bloqueig:
+                                errors[nom] = str(e)[:100]
+                            print(f"   ❌ {nom}: {str(e)[:100]}")
+        finally:
+            if ftp is not None:
+                tancar(ftp)
+
+    n_fils = max(1, min(connexions, len(noms)))
+    with ThreadPoolExecutor(max_workers=n_fils) as executor:
+        for _ in range(n_fils):
+            executor.submit(treballador)
+
+    return pujats, errors
+
+def desplegar(config, directori_local, connexions=CONNEXIONS_PARALLELES):
+    """Executa el desplegament diferencial complet i retorna un resum"""
+    inici = time.time()
+    local = manifest_local(directori_local)
+    print(f"📦 Paquet local: {len(local)} fitxers gestionats")
+
+    ftp = connectar(config)
+    try:
+        remot = llegir_manifest_remot(ftp)
+        existents = llistar_remots(ftp)
+    finally:
+        tancar(ftp)
+    print(f"🌐 Manifest remot: {len(remot)} fitxers | Directori remot: {len(existents)} fitxers")
+
+    # Nous o canviats (o que falten al servidor encara que el manifest digui el contrari)
+    a_pujar = [nom for nom, h in local.items() if remot.get(nom) != h or nom not in existents]
+    obsolets = sorted(nom for nom in existents
+                      if PATRO_FITXERS_GESTIONATS.match(nom) and nom not in local)
+    print(f"🔄 A pujar: {len(a_pujar)} | Sense canvis: {len(local) - len(a_pujar)} | Obsolets: {len(obsolets)}")
+
+    pujats, errors = [], {}
+    if a_pujar:
+        pujats, errors = pujar_en_paralel(config, directori_local, a_pujar, connexions)
+
+    ftp = connectar(config)
+    try:
+        # Esborrar obsolets en una sola sessió
+        esborrats = []
+        for nom in obsolets:
+            try:
+                ftp.delete(nom)
+                esborrats.append(nom)
+                print(f"   🗑️  {nom}")
+            except ftplib.error_perm as e:
+                print(f"   ⚠️  No s'ha pogut esborrar {nom}: {e}")
+
+        # Temporals que una connexió perduda no va poder esborrar (ara o en un desplegament anterior)
+        restes = {nom_temporal(nom) for nom in errors} | {nom for nom in existents if es_temporal(nom)}
+        for nom in sorted(restes):
+            esborrar_si_hi_es(ftp, nom)
+
+        # El nou manifest només recull el que realment hi ha al servidor
+        fitxers = {nom: h for nom, h in local.items() if nom not in errors}
+        for nom in errors:
+            if nom in remot and nom in existents:
+                fitxers[nom] = remot[nom]
+        manifest = {
+            'actualitzat': datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'fitxers': fitxers
+        }
+        contingut = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+        ftp.storbinary(f"STOR {MANIFEST_REMOT}", io.BytesIO(contingut))
+    finally:
+        tancar(ftp)
+
+    resum = {
+        'pujats': len(pujats),
+        'sense_canvis': len(local) - len(a_pujar),
+        'esborrats': len(esborrats),
+        'errors': errors,
+        'bytes_pujats': sum((Path(directori_local) / nom).stat().st_size for nom in pujats),
+        'segons': round(time.time() - inici, 1)
+    }
+    return resum
+
+def config_des_de_entorn(directori_remot):
+    """Llegeix les credencials FTP de les variables d'entorn"""
+    falten = [v for v in ('NOMINALIA_FTP_HOST', 'NOMINALIA_FTP_USER', 'NOMINALIA_FTP_PASS') if not os.environ.get(v)]
+    if falten:
+        print(f"❌ Falten variables d'entorn: {', '.join(falten)}")
+        sys.exit(2)
+    return {
+        'host': os.environ['NOMINALIA_FTP_HOST'],
+        'port': int(os.environ.get('NOMINALIA_FTP_PORT', '21')),
+        'usuari': os.environ['NOMINALIA_FTP_USER'],
+        'contrasenya': os.environ['NOMINALIA_FTP_PASS'],
+        'directori_remot': directori_remot,
+        'timeout': TIMEOUT_SEGONS
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Desplegament diferencial per FTP")
+    parser.add_argument('directori_local', nargs='?', default='deploy-package')
+    parser.add_argument('--remote-dir', default=REMOTE_DIR_PER_DEFECTE)
+    parser.add_argument('--connexions', type=int, default=CONNEXIONS_PARALLELES)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🚀 DESPLEGAMENT DIFERENCIAL FTP")
+    print("=" * 60)
+
+    config = config_des_de_entorn(args.remote_dir)
+    resum = desplegar(config, args.directori_local, args.connexions)
+
+    print("\n" + "=" * 60)
+    print(f"✅ Pujats: {resum['pujats']} ({resum['bytes_pujats']} bytes)")
+    print(f"⏭️  Sense canvis: {resum['sense_canvis']}")
+    print(f"🗑️  Esborrats: {resum['esborrats']}")
+    print(f"⏱️  Temps: {resum['segons']} s")
+    if resum['errors']:
+        print(f"❌ Errors: {len(resum['errors'])}")
+        return 1
+    print("=" * 60)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
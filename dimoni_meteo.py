@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+dimoni_meteo.py - Procés permanent sincronitzat amb la publicació semihorària de meteo.cat
+
+En lloc d'una arrencada en fred per cada repository_dispatch (runner, pip,
+subprocessos i una hora de consulta endevinada), el procés queda viu amb la
+sessió HTTP, les dades d'ahir i el context del generador a la memòria:
+  - cada cicle comença just després del final d'un període semihorari i demana
+    exactament aquell període a cada estació quan toca segons el seu retard de
+    publicació après (latencia_publicacio.py; DELAI_PUBLICACIO si encara no n'hi ha;
+    de tant en tant des del primer minut, perquè el retard après també pugui baixar)
+  - les estacions que encara no l'han publicat es tornen a provar cada
+    INTERVAL_REINTENT fins al cicle següent (només aquestes)
+  - cada passada que porta dades noves es desa (QC, fitxers, magatzem) i es
+    regeneren els banners en aquell moment, dins del mateix procés (l'agregador
+    i el generador; metadades, normals i sèries no es tornen a carregar)
+  - el període d'una estació que fa PERIODES_VIGENCIA períodes que no publica
+    s'oblida, i un error en un cicle es registra i el dimoni passa al següent
+
+Ús:
+  python dimoni_meteo.py
+  python dimoni_meteo.py --una-vegada
+  python dimoni_meteo.py --ordre-posterior "python desplegador_ftp.py deploy-package"
+"""
+
+import re
+import sys
+import time
+import shlex
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Configuració
+BASE_DIR = Path(__file__).parent
+SCRIPTS_DIR = BASE_DIR / "src"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import scraper_periode_complet as scraper
+import latencia_publicacio
+import magatzem_historic
+import agregador_diari
+import generador_banners as generador
+from generador_banners import DataLoader
+from executor_meteo import executar_script_simple, resum_web_ja_fet_avui
+
+MINUTS_PERIODE = 30
+INICI_CICLE = latencia_publicacio.RETARD_MINIM * 60  # Segons després del final del període
+DELAI_PUBLICACIO = 4 * 60    # Primer intent de les estacions sense retard après
+INTERVAL_REINTENT = 120      # Segons entre intents per a les estacions que falten
+INTERVAL_PUBLICACIO = 120    # Segons mínims entre regeneracions dins d'un cicle
+MARGE_CICLE = 60             # Segons de marge abans del cicle següent
+PERIODES_VIGENCIA = 4        # Períodes que es continua publicant el darrer registre d'una estació
+
+# Estat que es manté entre cicles
+DARRERS = {}                 # Codi → darrer període d'avui trobat
+CAPCALERES = {}              # Codi → estudi de capçaleres del darrer període
+AHIR = {'dia': None, 'periodes': {}}
+GENERADOR = {'metadades': {}, 'dia_normals': None, 'tendencies': False}
+
+
+# --- CALENDARI DE PUBLICACIÓ ---
+def periode_publicat(ara):
+    """Inici (UTC) del darrer període que a 'ara' ja hauria d'estar publicat"""
+    limit = ara - timedelta(seconds=INICI_CICLE)
+    final = limit.replace(minute=limit.minute // MINUTS_PERIODE * MINUTS_PERIODE, second=0, microsecond=0)
+    return final - timedelta(minutes=MINUTS_PERIODE)
+
+def hora_publicacio(periode, retard_segons=INICI_CICLE):
+    """Moment en què un període hauria d'estar publicat amb el retard indicat"""
+    return periode + timedelta(minutes=MINUTS_PERIODE, seconds=retard_segons)
+
+def venciments(codis, periode, model):
+    """Primer intent de cada estació: final del període + el seu retard previst (o d'exploració)"""
+    return {codi: hora_publicacio(periode, 60 * latencia_publicacio.primer_intent(codi, periode, model,
+                                                                                  DELAI_PUBLICACIO / 60))
+            for codi in codis}
+
+def es_el_periode(registre, periode):
+    """El registre correspon al període demanat (i no a un d'anterior encara visible)?"""
+    coincidencia = re.match(r'\s*(\d{1,2}):(\d{2})', registre.get('PERIODE_UTC', ''))
+    return bool(coincidencia) and (int(coincidencia.group(1)), int(coincidencia.group(2))) == (periode.hour, periode.minute)
+
+def caducar(periode):
+    """Oblida els registres de DARRERS de fa més de PERIODES_VIGENCIA períodes. Retorna els codis"""
+    limit = (periode - timedelta(minutes=MINUTS_PERIODE * PERIODES_VIGENCIA)).strftime('%Y-%m-%dT%H:%MZ')
+    vells = [codi for codi, registre in DARRERS.items()
+             if (magatzem_historic.instant_del_periode(registre) or '') < limit]
+    for codi in vells:
+        DARRERS.pop(codi)
+        CAPCALERES.pop(codi, None)
+    return vells
+
+
+# --- DESCÀRREGA ---
+def passada(pendents, periode):
+    """Demana el període a les estacions pendents. Retorna els codis que l'han publicat"""
+    trobats = []
+    for codi in pendents:
+        try:
+            periodes = scraper.extreure_periode_desde_url(codi, periode, es_ahir=False,
+                                                         max_periodes=scraper.PERIODES_DIA)
+        except scraper.ErrorDescarrega:
+            continue
+        scraper.CONSULTES_LATENCIA.append((codi, periode, periodes[0] if periodes else None, datetime.utcnow()))
+        if periodes and es_el_periode(periodes[0], periode):
+            DARRERS[codi] = periodes[0]
+            CAPCALERES[codi] = scraper.capcaleres_del_periode(codi, periodes[0].get('NOM_ESTACIO', codi), periodes[0])
+            scraper.PERIODES_NOMES_MAGATZEM.extend(periodes[1:])
+            trobats.append(codi)
+    return trobats
+
+def actualitzar_ahir(codis):
+    """Els períodes d'ahir no canvien: es descarreguen una vegada per dia UTC"""
+    dia = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
+    if AHIR['dia'] == dia:
+        return False
+    print(f"\n🌙 Nou dia: descarregant els períodes d'ahir ({dia})...")
+    AHIR['periodes'] = {codi: scraper.obtenir_periodes_ahir(codi) for codi in codis}
+    AHIR['dia'] = dia
+    return True
+
+def completar_sense_dades(codis, periode):
+    """Estacions sense cap període en memòria (primer cicle): cerca retroactiva com l'executor"""
+    afegits = 0
+    for codi in codis:
+        if codi in DARRERS:
+            continue
+        registre = scraper.cerca_periode_avui(codi, periode - timedelta(minutes=MINUTS_PERIODE))
+        if registre.get('ESTAT') == 'OK':
+            DARRERS[codi] = registre
+            CAPCALERES[codi] = scraper.capcaleres_del_periode(codi, registre.get('NOM_ESTACIO', codi), registre)
+            afegits += 1
+    return afegits
+
+
+# --- PUBLICACIÓ ---
+def context_generador():
+    """
+    Dades del generador: les metadades es llegeixen una vegada, les normals una
+    vegada per dia i les sèries memmap només es preparen a la primera; el període
+    i el diari, que acaben de canviar, es tornen a llegir cada vegada
+    """
+    if not GENERADOR['metadades']:
+        GENERADOR['metadades'] = DataLoader.llegir_metadades()
+        generador.Config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        generador.copiar_estils_existents()
+    if generador.magatzem_historic is not None:
+        avui = datetime.utcnow().strftime('%Y-%m-%d')
+        if GENERADOR['dia_normals'] != avui:
+            DataLoader.normals = DataLoader.llegir_normals()
+            GENERADOR['dia_normals'] = avui
+        if not GENERADOR['tendencies']:
+            GENERADOR['tendencies'] = DataLoader.preparar_tendencies()
+    return GENERADOR['metadades'], DataLoader.llegir_dades_periode(), DataLoader.llegir_dades_diari()
+
+def publicar(codis, ordre_posterior=None):
+    """Desa el lot actual i regenera els banners"""
+    dades_periode = []
+    for codi in codis:
+        if codi in DARRERS:
+            dades_periode.append(DARRERS[codi])
+        dades_periode.extend(AHIR['periodes'].get(codi, []))
+    capcaleres = [CAPCALERES[codi] for codi in codis if codi in CAPCALERES]
+
+    scraper.desar_lot(dades_periode, capcaleres)
+    scraper.PERIODES_NOMES_MAGATZEM.clear()
+
+    if not resum_web_ja_fet_avui():
+        executar_script_simple("scraper_resum_diari_final.py",
+                               ["python", str(SCRIPTS_DIR / "scraper_resum_diari_final.py")])
+    try:
+        agregador_diari.escriure_resum_diari()
+    except Exception as e:
+        print(f"⚠️  Agregador diari: {e!r}")
+
+    try:
+        metadades, periode_data, diari_data = context_generador()
+        if not metadades or not periode_data:
+            print("❌ Dades insuficients per al generador")
+            return False
+        generador.generar_sortides(metadades, periode_data, diari_data)
+    except Exception as e:
+        print(f"❌ Error al generador: {e!r}")
+        return False
+    if ordre_posterior:
+        executar_script_simple(ordre_posterior, shlex.split(ordre_posterior))
+    return True
+
+def cicle(periode, estacions, ordre_posterior=None):
+    """Un període: cada estació es demana quan toca i es reintenta fins que publica"""
+    codis = [e.get('code') for e in estacions]
+    pendents = list(codis)
+    limit = hora_publicacio(periode + timedelta(minutes=MINUTS_PERIODE)) - timedelta(seconds=MARGE_CICLE)
+    try:
+        model = latencia_publicacio.carregar_model()
+    except Exception as e:
+        print(f"⚠️  Model de latència no disponible: {e}")
+        model = {}
+    properes = venciments(codis, periode, model)
+    primera = True
+    per_publicar = False
+    darrera_publicacio = None
+    caducats = caducar(periode)
+
+    print("\n" + "=" * 60)
+    print(f"🛰️  CICLE DEL PERÍODE {periode.strftime('%Y-%m-%d %H:%M')} UTC ({len(pendents)} estacions, "
+          f"{len(model)} amb retard après)")
+    print("=" * 60)
+    if caducats:
+        print(f"🗑️  {len(caducats)} estacions sense publicar des de fa {PERIODES_VIGENCIA} períodes: "
+              f"{', '.join(caducats)}")
+
+    while pendents:
+        ara = datetime.utcnow()
+        a_punt = [c for c in pendents if properes[c] <= ara]
+        if not a_punt:
+            seguent = min(properes[c] for c in pendents)
+            if seguent >= limit:
+                break
+            time.sleep((seguent - ara).total_seconds())
+            continue
+
+        inici = time.perf_counter()
+        trobats = passada(a_punt, periode)
+        pendents = [c for c in pendents if c not in trobats]
+        for codi in a_punt:
+            properes[codi] = datetime.utcnow() + timedelta(seconds=INTERVAL_REINTENT)
+        print(f"📡 {datetime.utcnow().strftime('%H:%M:%S')} Passada de {len(a_punt)}: {len(trobats)} estacions noves, "
+              f"{len(pendents)} pendents ({time.perf_counter() - inici:.0f} s)")
+
+        per_publicar = per_publicar or bool(trobats)
+        if primera:
+            per_publicar = completar_sense_dades(pendents, periode) > 0 or per_publicar
+            per_publicar = actualitzar_ahir(codis) or per_publicar
+            primera = False
+
+        # Les estacions arriben escalonades: com a molt una regeneració per INTERVAL_PUBLICACIO
+        if per_publicar and (not pendents or darrera_publicacio is None
+                             or time.monotonic() - darrera_publicacio >= INTERVAL_PUBLICACIO):
+            publicar(codis, ordre_posterior)
+            per_publicar = False
+            darrera_publicacio = time.monotonic()
+
+    if per_publicar:
+        publicar(codis, ordre_posterior)
+    if pendents:
+        print(f"⏭️  {len(pendents)} estacions sense el període: es tornaran a provar al cicle següent")
+    else:
+        print("✅ Totes les estacions han publicat el període")
+
+
+# --- BUCLE PRINCIPAL ---
+def main():
+    parser = argparse.ArgumentParser(description="Procés permanent de scraping i generació de banners")
+    parser.add_argument('--una-vegada', action='store_true', help="Fa el cicle del darrer període publicat i surt")
+    parser.add_argument('--ordre-posterior', help="Ordre que s'executa després de cada regeneració (p. ex. el desplegament)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🛰️  DIMONI METEO.CAT")
+    print("=" * 60)
+    print(f"⏱️  Primer intent segons el retard après de cada estació ({DELAI_PUBLICACIO // 60} min sense model), "
+          f"reintents cada {INTERVAL_REINTENT} s")
+
+    darrer = None
+    try:
+        while True:
+            periode = periode_publicat(datetime.utcnow())
+            if periode != darrer:
+                darrer = periode
+                try:
+                    cicle(periode, scraper.STATIONS, args.ordre_posterior)
+                except Exception as e:
+                    # Un error (desar, generador, xarxa...) no pot aturar el dimoni: s'espera al cicle següent
+                    print(f"❌ Error al cicle del període {periode.strftime('%H:%M')} UTC: {e!r}")
+                    if args.una_vegada:
+                        return 1
+                if args.una_vegada:
+                    return 0
+                continue
+
+            seguent = hora_publicacio(periode + timedelta(minutes=MINUTS_PERIODE))
+            print(f"💤 Proper cicle a les {seguent.strftime('%H:%M:%S')} UTC")
+            time.sleep(max((seguent - datetime.utcnow()).total_seconds(), 1))
+    except KeyboardInterrupt:
+        print("\n🛑 Dimoni aturat")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
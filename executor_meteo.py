@@ -3,6 +3,7 @@
 executor_meteo.py - Versió simple sense problemes d'encoding
 """
 
+import argparse
 import subprocess
 import sys
 from pathlib import Path
@@ -12,6 +13,16 @@ from datetime import datetime
 BASE_DIR = Path(__file__).parent
 SCRIPTS_DIR = BASE_DIR / "src"
 
+def resum_web_ja_fet_avui():
+    """El resum diari de la web només cal una vegada al dia (per conciliar l'agregador)"""
+    try:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+        from agregador_diari import resum_web_fet_avui
+        return resum_web_fet_avui()
+    except Exception as e:
+        print(f"⚠️  No s'ha pogut consultar el magatzem històric: {e}")
+        return False
+
 def executar_script_simple(nom_script, comanda):
     """Executa un script sense preocupar-se de l'encoding"""
     print(f"▶  Executant {nom_script}...")
@@ -39,30 +50,97 @@ def executar_script_simple(nom_script, comanda):
         print(f"❌ Error executant {nom_script}: {e}")
         return False
 
+def executar_en_shards(nom_script, tipus, shards):
+    """Un procés per shard en paral·lel i, quan acaben, la fusió dels trossos"""
+    print(f"▶  Executant {nom_script} en {shards} shards...")
+    try:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+        from fusiona_shards import netejar
+        netejar(tipus)  # Un tros vell no es pot confondre amb un d'aquesta execució
+        
+        processos = []
+        for index in range(1, shards + 1):
+            proces = subprocess.Popen(
+                ["python", str(SCRIPTS_DIR / nom_script), "--shard", f"{index}/{shards}"],
+                stdin=subprocess.PIPE
+            )
+            proces.stdin.write(b"1\n1\ns\n")
+            proces.stdin.close()
+            processos.append((index, proces))
+        
+        fallats = [index for index, proces in processos if proces.wait() != 0]
+    except Exception as e:
+        print(f"❌ Error executant {nom_script} en shards: {e}")
+        return False
+    
+    if fallats:
+        print(f"⚠️  Shards fallats de {nom_script}: {', '.join(map(str, fallats))}")
+    if len(fallats) == shards:
+        print(f"❌ {nom_script} fallat en tots els shards")
+        return False
+    
+    return executar_script_simple(
+        f"fusiona_shards.py {tipus}",
+        ["python", str(SCRIPTS_DIR / "fusiona_shards.py"), tipus, "--esborra"]
+    )
+
+def executar_scraper(nom_script, tipus, shards):
+    if shards > 1:
+        return executar_en_shards(nom_script, tipus, shards)
+    return executar_script_simple(nom_script, ["python", str(SCRIPTS_DIR / nom_script)])
+
 def main():
     """Executa tot en ordre"""
+    parser = argparse.ArgumentParser(description="Executor dels scrapers de meteo.cat")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="Reparteix les estacions de cada scraper entre N processos en paral·lel")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Scraper de períodes i pàgines index_XX.html en cadena (pipeline_continu.py)")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("🚀 EXECUTOR SIMPLE METEO.CAT")
     print("=" * 60)
     
+    # Límit de temps comú per a tots els scrapers (i shards) d'aquesta execució
+    try:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+        from pressupost_temps import fixar_limit
+        print(f"⏳ Pressupost dels scrapers: {fixar_limit().descripcio()}")
+    except Exception as e:
+        print(f"⚠️  Sense límit de temps: {e}")
+    
     print("\n📥 EXECUTANT SCRAPERS...")
+    if args.shards > 1:
+        print(f"🧩 {args.shards} shards per scraper")
     
-    # 1. Scraper període
-    if not executar_script_simple(
-        "scraper_periode_complet.py",
-        ["python", str(SCRIPTS_DIR / "scraper_periode_complet.py")]
-    ):
+    # 1. Scraper període (amb --pipeline, cada pàgina es renderitza tan bon punt s'acaba la seva estació;
+    #    el generador complet és el pas següent del workflow)
+    if args.pipeline:
+        if args.shards > 1:
+            print("ℹ️  --pipeline: el scraper de períodes va en un sol procés (els shards només per al diari)")
+        correcte = executar_script_simple(
+            "pipeline_continu.py", ["python", str(BASE_DIR / "pipeline_continu.py"), "--sense-generador"])
+    else:
+        correcte = executar_scraper("scraper_periode_complet.py", "periode", args.shards)
+    if not correcte:
         print("❌ Primer scraper fallat. Aturant.")
         return 1
     
-    # 2. Scraper diari
-    if not executar_script_simple(
-        "scraper_resum_diari_final.py", 
-        ["python", str(SCRIPTS_DIR / "scraper_resum_diari_final.py")]
-    ):
+    # 2. Scraper diari (només la primera execució del dia; la resta surt dels períodes)
+    if resum_web_ja_fet_avui():
+        print("⏭️  Resum diari de la web ja desat avui: es calcula a partir dels períodes")
+    elif not executar_scraper("scraper_resum_diari_final.py", "diari", args.shards):
         print("❌ Segon scraper fallat. Aturant.")
         return 1
     
+    # 3. Resum diari a partir dels períodes desats, conciliat amb la web
+    if not executar_script_simple(
+        "agregador_diari.py",
+        ["python", str(SCRIPTS_DIR / "agregador_diari.py")]
+    ):
+        print("⚠️  Agregador diari fallat: es manté el resum diari anterior")
+    
     print("\n" + "=" * 60)
     print("✅ TOTS ELS SCRAPERS COMPLETATS")
     print("=" * 60)
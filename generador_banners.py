@@ -12,12 +12,28 @@ Incorpora TOTES les correccions sol·licitades:
 7. Verificació de dades amb font oficial
 """
 
+import argparse
+import gzip
 import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import re
 from datetime import datetime, timedelta
 import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # Opcional: sense brotli només es generen els .gz
+
+# Magatzem històric (src/magatzem_historic.py); el generador funciona igual sense
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+try:
+    import magatzem_historic
+except ImportError:
+    magatzem_historic = None
 
 # ============================================================================
 # CONFIGURACIÓ
@@ -32,10 +48,30 @@ class Config:
     
     # Ruta de sortida
     OUTPUT_DIR = Path("public")    
+    OVERLAY_DATA_JSON = OUTPUT_DIR / "data" / "overlay_data.json"
     
     # Configuració de rotació
     ROTATION_SECONDS = 120  # Canvi cada 2 minuts
     
+    # Mode de generació: "pagines" (un index_XX.html per estació), "shell" (pàgina
+    # estàtica + stations_data.json) o "tot" (les dues sortides)
+    MODE_GENERACIO = "pagines"
+    SHELL_HTML = "estacio.html"
+    DADES_ESTACIONS_JSON = "stations_data.json"
+    SHELL_REFRESC_DADES_SEGONS = 300  # La shell torna a llegir les dades cada 5 minuts
+    
+    # Manifest per als rotadors (public/index.html, integrador.py)
+    ROTATION_MANIFEST_JSON = "rotation_manifest.json"
+    
+    # Sparklines de 24 h (pàgines individuals i targetes de banner.html)
+    SPARKLINE_PUNTS_PAGINA = 48
+    SPARKLINE_PUNTS_TARGETA = 24
+    
+    # Etapa final: HTML minificat i germans .gz/.br (servits amb el .htaccess generat)
+    MINIFICAR_HTML = True
+    PRECOMPRIMIR = True
+    PATRO_FITXERS_PRECOMPRIMITS = r'^(index_[A-Z0-9]+\.html|banner\.html|estacio\.html|stations_data\.json|rotation_manifest\.json|station_list\.json)$'
+    
     # Variables per a index.html (part inferior) - només 3 variables diàries
     VARIABLES_DIARI_INDEX = [
         "TEMPERATURA_MITJANA_DIA",
@@ -245,6 +281,24 @@ class Utilitats:
             return data_dia.strftime("%d/%m/%Y")
         except:
             return data_dia_str
+    
+    @staticmethod
+    def valor_numeric(valor):
+        """Extreu el número d'un valor com "17.0", "20.0 °C 11:52 TU" o "75%" (None si no n'hi ha)"""
+        if valor is None:
+            return None
+        match = re.search(r'-?\d+(?:\.\d+)?', str(valor))
+        if not match:
+            return None
+        return float(match.group(0))
+    
+    @staticmethod
+    def hora_tu_del_valor(valor):
+        """Extreu l'hora de registre d'un valor diari com "20.0 °C 11:52 TU" (format HH:MM)"""
+        if not valor:
+            return ''
+        match = re.search(r'(\d{1,2}:\d{2})\s*TU', str(valor))
+        return Utilitats.format_hora_tu(match.group(1)) if match else ''
 
 # ============================================================================
 # FUNCIONS DE NETEJA
@@ -321,6 +375,55 @@ class DataLoader:
             traceback.print_exc()
             return {}
 
+    @staticmethod
+    def seleccionar_periode(estacio_id, llista_periodes):
+        """
+        Període a mostrar d'una estació (el d'avui més recent; si no n'hi ha, el
+        d'ahir) amb només les variables de COLUMNES_ESTRUCTURA. None si no n'hi ha.
+        """
+        periodes_avui = [p for p in llista_periodes if p.get('ES_AHIR') == 'NO']
+        periodes_ahir = [p for p in llista_periodes if p.get('ES_AHIR') == 'SÍ']
+        
+        periode_seleccionat = None
+        tipus_periode = "DESCONEGUT"
+        
+        if periodes_avui:
+            periodes_avui_ordenats = sorted(
+                periodes_avui,
+                key=lambda x: x.get('DATA_EXTRACCIO', ''),
+                reverse=True
+            )
+            periode_seleccionat = periodes_avui_ordenats[0]
+            tipus_periode = "avui"
+        
+        elif periodes_ahir:
+            periodes_ahir_ordenats = sorted(
+                periodes_ahir,
+                key=lambda x: x.get('DATA_EXTRACCIO', ''),
+                reverse=True
+            )
+            periode_seleccionat = periodes_ahir_ordenats[0]
+            tipus_periode = "ahir"
+            print(f"   ⚠️  {estacio_id}: Usant dades d'ahir")
+        
+        if not periode_seleccionat:
+            return None
+        
+        dades_filtrades = {}
+        for col_grup in Config.COLUMNES_ESTRUCTURA.values():
+            for var, _ in col_grup:
+                if var in periode_seleccionat and periode_seleccionat[var] not in ['', None]:
+                    dades_filtrades[var] = periode_seleccionat[var]
+        
+        dades_filtrades['NOM_ESTACIO'] = periode_seleccionat.get('NOM_ESTACIO', estacio_id)
+        dades_filtrades['DATA_UTC'] = periode_seleccionat.get('DATA_UTC', '')
+        dades_filtrades['DATA_EXTRACCIO'] = periode_seleccionat.get('DATA_EXTRACCIO', '')
+        dades_filtrades['PERIODE_UTC'] = periode_seleccionat.get('PERIODE_UTC', '')
+        dades_filtrades['ES_AHIR'] = periode_seleccionat.get('ES_AHIR', 'DESCONEGUT')
+        dades_filtrades['TIPUS_PERIODE'] = tipus_periode
+        
+        return dades_filtrades
+
     @staticmethod
     def llegir_dades_periode():
         """Llegeix les dades periòdiques del JSON"""
@@ -342,48 +445,9 @@ class DataLoader:
                 print(f"   Estacions amb dades: {len(tots_periodes_per_estacio)}")
                 
                 for estacio_id, llista_periodes in tots_periodes_per_estacio.items():
-                    periodes_avui = [p for p in llista_periodes if p.get('ES_AHIR') == 'NO']
-                    periodes_ahir = [p for p in llista_periodes if p.get('ES_AHIR') == 'SÍ']
-                    
-                    periode_seleccionat = None
-                    tipus_periode = "DESCONEGUT"
-                    
-                    if periodes_avui:
-                        periodes_avui_ordenats = sorted(
-                            periodes_avui,
-                            key=lambda x: x.get('DATA_EXTRACCIO', ''),
-                            reverse=True
-                        )
-                        periode_seleccionat = periodes_avui_ordenats[0]
-                        tipus_periode = "avui"
-                    
-                    elif periodes_ahir:
-                        periodes_ahir_ordenats = sorted(
-                            periodes_ahir,
-                            key=lambda x: x.get('DATA_EXTRACCIO', ''),
-                            reverse=True
-                        )
-                        periode_seleccionat = periodes_ahir_ordenats[0]
-                        tipus_periode = "ahir"
-                        print(f"   ⚠️  {estacio_id}: Usant dades d'ahir")
-                    
-                    if not periode_seleccionat:
-                        continue
-                    
-                    dades_filtrades = {}
-                    for col_grup in Config.COLUMNES_ESTRUCTURA.values():
-                        for var, _ in col_grup:
-                            if var in periode_seleccionat and periode_seleccionat[var] not in ['', None]:
-                                dades_filtrades[var] = periode_seleccionat[var]
-                    
-                    dades_filtrades['NOM_ESTACIO'] = periode_seleccionat.get('NOM_ESTACIO', estacio_id)
-                    dades_filtrades['DATA_UTC'] = periode_seleccionat.get('DATA_UTC', '')
-                    dades_filtrades['DATA_EXTRACCIO'] = periode_seleccionat.get('DATA_EXTRACCIO', '')
-                    dades_filtrades['PERIODE_UTC'] = periode_seleccionat.get('PERIODE_UTC', '')
-                    dades_filtrades['ES_AHIR'] = periode_seleccionat.get('ES_AHIR', 'DESCONEGUT')
-                    dades_filtrades['TIPUS_PERIODE'] = tipus_periode
-                    
-                    periode_per_estacio[estacio_id] = dades_filtrades
+                    dades_filtrades = DataLoader.seleccionar_periode(estacio_id, llista_periodes)
+                    if dades_filtrades:
+                        periode_per_estacio[estacio_id] = dades_filtrades
             
             total_avui = sum(1 for d in periode_per_estacio.values() if d.get('TIPUS_PERIODE') == 'avui')
             total_ahir = sum(1 for d in periode_per_estacio.values() if d.get('TIPUS_PERIODE') == 'ahir')
@@ -453,6 +517,86 @@ class DataLoader:
             traceback.print_exc()
             return {}
 
+    @staticmethod
+    def llegir_context_mensual():
+        """{estacio_id: rollup del mes en curs} dels rollups materialitzats (una consulta)"""
+        if magatzem_historic is None:
+            return {}
+        try:
+            import rollups_historic
+            return rollups_historic.rollups_de_periode('mes', datetime.utcnow().strftime("%Y-%m"))
+        except Exception as e:
+            print(f"⚠️  Error llegint els rollups mensuals: {e}")
+            return {}
+
+    @staticmethod
+    def preparar_tendencies():
+        """
+        Deixa a punt les sèries memmap (src/series_memmap.py); si no n'hi ha (o
+        fa massa que no s'actualitzen) es creen a partir del magatzem. Retorna
+        si es poden llegir tendències.
+        """
+        if magatzem_historic is None:
+            return False
+        try:
+            import series_memmap
+            if not series_memmap.inicialitzat():
+                estacions, periodes = series_memmap.reconstruir()
+                print(f"🧮 Sèries memmap creades: {estacions} estacions, {periodes} períodes")
+            return True
+        except Exception as e:
+            print(f"⚠️  Sense sèries memmap per a tendències: {e}")
+            return False
+
+    @staticmethod
+    def llegir_finestra(estacio_id, hores=24, columnes=('tm',)):
+        """Darreres 'hores' de l'estació del fitxer memmap: {'instant', columna: array} o None"""
+        if magatzem_historic is None:
+            return None
+        try:
+            import series_memmap
+            return series_memmap.finestra(estacio_id, hores, columnes)
+        except Exception as e:
+            print(f"⚠️  Error llegint la sèrie memmap de {estacio_id}: {e}")
+            return None
+
+    @staticmethod
+    def llegir_tendencies(estacio_id, hores_temperatura=24, dies_precipitacio=7):
+        """
+        Temperatura de les darreres hores i precipitació acumulada dels darrers dies,
+        llegides del fitxer memmap de l'estació: {'instants', 'temperatura' (array
+        amb NaN als buits), 'precipitacio_acumulada'} o None si no n'hi ha.
+        """
+        precipitacio = DataLoader.llegir_finestra(estacio_id, dies_precipitacio * 24, ('ppt',))
+        if precipitacio is None:
+            return None
+        try:
+            temperatura = DataLoader.llegir_finestra(estacio_id, hores_temperatura, ('tm',))
+            ppt = precipitacio['ppt'][~np.isnan(precipitacio['ppt'])]
+            return {
+                'instants': temperatura['instant'],
+                'temperatura': temperatura['tm'],
+                'precipitacio_acumulada': round(float(ppt.sum()), 1) if len(ppt) else None
+            }
+        except Exception as e:
+            print(f"⚠️  Error llegint les tendències de {estacio_id}: {e}")
+            return None
+
+    # Normals horàries d'avui carregades per main(); buit = no es mostren anomalies
+    normals = {}
+
+    @staticmethod
+    def llegir_normals():
+        """{(estacio_id, hora UTC): normal} d'avui, precalculades pel manteniment (src/normals_climatiques.py)"""
+        if magatzem_historic is None:
+            return {}
+        try:
+            import normals_climatiques
+            return normals_climatiques.carregar_normals_horaries()
+        except Exception as e:
+            print(f"⚠️  Error llegint les normals climàtiques: {e}")
+            return {}
+
 # ============================================================================
 # GENERADOR HTML - AMB TOTES LES CORRECCIONS I MILLORES
 # ============================================================================
@@ -857,6 +1001,58 @@ class HTMLGenerator:
         .temp-molt-calenta {{ color: #ff5252; }}
         .temp-desconeguda {{ color: #bbdefb; }}
         
+        /* 🔹 SPARKLINES DE 24 h (SVG generat pel generador) */
+        .sparklines {{
+            display: flex;
+            gap: 10px;
+            flex-wrap: wrap;
+            margin-top: 15px;
+        }}
+        
+        .sparkline-item {{
+            flex: 1 1 200px;
+            background: linear-gradient(145deg, #1a237e, #283593);
+            border: 2px solid #3949ab;
+            border-left: 4px solid #ff7b00;
+            border-radius: 6px;
+            padding: 8px 10px;
+        }}
+        
+        .sparkline {{
+            display: block;
+            width: 100%;
+            height: 36px;
+            margin: 4px 0;
+        }}
+        
+        .sparkline path {{
+            fill: none;
+            stroke-width: 1.5;
+            vector-effect: non-scaling-stroke;
+        }}
+        
+        .spark-temperatura path {{ stroke: #ff7b00; }}
+        .spark-vent path {{ stroke: #90caf9; }}
+        .spark-precipitacio path {{ stroke: #4fc3f7; stroke-width: 3; }}
+        
+        .sparkline-rang {{
+            font-size: 12px;
+            color: #ffcc80;
+            text-align: right;
+        }}
+        
+        .card-sparklines {{
+            display: flex;
+            gap: 6px;
+            margin-top: 8px;
+        }}
+        
+        .card-sparklines .sparkline {{
+            flex: 1;
+            height: 22px;
+            margin: 0;
+        }}
+        
         .station-footer {{
             margin-top: 12px;
             padding-top: 8px;
@@ -1133,8 +1329,8 @@ class HTMLGenerator:
 """
     
     @staticmethod
-    def generar_footer(hora_actualitzacio=None):
-        """Genera el peu de pàgina"""
+    def formatar_hora_footer(hora_actualitzacio=None):
+        """Formata l'hora d'actualització del peu de pàgina en hora local (CET/CEST)"""
         if hora_actualitzacio:
             try:
                 dt_utc = datetime.strptime(hora_actualitzacio, "%Y-%m-%d %H:%M:%S")
@@ -1144,18 +1340,26 @@ class HTMLGenerator:
                 else:
                     dt_local = dt_utc + timedelta(hours=1)
                     zona = "CET"
-                hora_formatted = dt_local.strftime("%d/%m/%Y %H:%M:%S") + " " + zona
+                return dt_local.strftime("%d/%m/%Y %H:%M:%S") + " " + zona
             except:
-                hora_formatted = hora_actualitzacio
+                return hora_actualitzacio
+        
+        ara_utc = datetime.utcnow()
+        if Utilitats.es_cest(ara_utc):
+            ara_local = ara_utc + timedelta(hours=2)
+            zona = "CEST"
         else:
-            ara_utc = datetime.utcnow()
-            if Utilitats.es_cest(ara_utc):
-                ara_local = ara_utc + timedelta(hours=2)
-                zona = "CEST"
-            else:
-                ara_local = ara_utc + timedelta(hours=1)
-                zona = "CET"
-            hora_formatted = ara_local.strftime("%d/%m/%Y %H:%M:%S") + " " + zona
+            ara_local = ara_utc + timedelta(hours=1)
+            zona = "CET"
+        return ara_local.strftime("%d/%m/%Y %H:%M:%S") + " " + zona
+    
+    @staticmethod
+    def generar_footer(hora_actualitzacio=None, text_hora=None):
+        """Genera el peu de pàgina (text_hora permet fixar el text de l'hora, p.ex. a la pàgina shell)"""
+        if text_hora is not None:
+            hora_formatted = text_hora
+        else:
+            hora_formatted = HTMLGenerator.formatar_hora_footer(hora_actualitzacio)
         
         return f"""
     <div class="overlay-footer">
@@ -1203,67 +1407,111 @@ class HTMLGenerator:
 """
     
     @staticmethod
-    def generar_columnes_dades(periode_data, metadades, estacio_id, nom_estacio, diari_data=None):
-        """Genera les 4 columnes de dades"""
-        html = '<div class="mobile-container">\n'
-        
-        data_formatted = ""
-        periode_formatted = ""
-        zona_horaria = "TU"
+    def valors_columnes(periode_data, metadades, estacio_id):
+        """
+        Calcula els valors visibles de les 4 columnes, ja formatats amb unitats.
+        És la font comuna de generar_columnes_dades i de stations_data.json.
+        """
+        valors = {grup: [] for grup in ("basiques", "precip_vent", "altres")}
+        for grup in valors:
+            for var, label in Config.COLUMNES_ESTRUCTURA[grup]:
+                if var in periode_data and periode_data[var] not in ['', None]:
+                    valors[grup].append((var, label, Utilitats.afegir_unitats(var, periode_data[var])))
         
+        valors['periode'] = None
         if 'DATA_UTC' in periode_data and periode_data['DATA_UTC'] and 'PERIODE_UTC' in periode_data and periode_data['PERIODE_UTC']:
-            data_formatted, periode_formatted, zona_horaria = Utilitats.convertir_utc_a_local(
+            data_formatted, periode_formatted, _ = Utilitats.convertir_utc_a_local(
                 periode_data['DATA_UTC'], 
                 periode_data['PERIODE_UTC']
             )
+            if data_formatted and periode_formatted:
+                valors['periode'] = {
+                    'data': data_formatted,
+                    'interval': periode_formatted,
+                    'ahir': periode_data.get('TIPUS_PERIODE') == 'ahir'
+                }
+        
+        valors['altitud'] = None
+        valors['comarca'] = None
+        if estacio_id in metadades:
+            valors['altitud'] = metadades[estacio_id].get('altitud')
+            valors['comarca'] = metadades[estacio_id].get('comarca')
+        
+        valors['hora_actualitzacio'] = None
+        if 'DATA_EXTRACCIO' in periode_data and periode_data['DATA_EXTRACCIO']:
+            try:
+                data_hora_utc_str = periode_data['DATA_EXTRACCIO']
+                data_hora_utc = datetime.strptime(data_hora_utc_str, "%Y-%m-%d %H:%M:%S")
+                
+                if Utilitats.es_cest(data_hora_utc):
+                    desplacament = 2
+                    zona = "CEST"
+                else:
+                    desplacament = 1
+                    zona = "CET"
+                
+                data_hora_local = data_hora_utc + timedelta(hours=desplacament)
+                valors['hora_actualitzacio'] = data_hora_local.strftime("%H:%M:%S") + " " + zona
+            except:
+                pass
         
-        # COLUMNA 1: Dades bàsiques
-        html += '<div class="column col-basics">\n'
-        html += '<div class="data-column">\n'
-        html += '<div class="column-title">Dades bàsiques</div>\n'
-        
-        for var, label in Config.COLUMNES_ESTRUCTURA["basiques"]:
-            if var in periode_data and periode_data[var] not in ['', None]:
-                valor_amb_unitats = Utilitats.afegir_unitats(var, periode_data[var])
-                html += f'''
-                <div class="data-item">
-                    <div class="data-label">{label}</div>
-                    <div class="data-value">{valor_amb_unitats}</div>
-                </div>'''
-        
-        html += '</div>\n</div>\n'
-        
-        # COLUMNA 2: Precipitació i vent
-        html += '<div class="column col-precip-wind">\n'
-        html += '<div class="data-column">\n'
-        html += '<div class="column-title">Precipitació i vent</div>\n'
-        
-        for var, label in Config.COLUMNES_ESTRUCTURA["precip_vent"]:
-            if var in periode_data and periode_data[var] not in ['', None]:
-                valor_amb_unitats = Utilitats.afegir_unitats(var, periode_data[var])
-                html += f'''
-                <div class="data-item">
-                    <div class="data-label">{label}</div>
-                    <div class="data-value">{valor_amb_unitats}</div>
-                </div>'''
-        
-        html += '</div>\n</div>\n'
-        
-        # COLUMNA 3: Altres dades
-        html += '<div class="column col-other">\n'
-        html += '<div class="data-column">\n'
-        html += '<div class="column-title">Altres dades</div>\n'
+        return valors
+    
+    # Anomalies de temperatura: (clau, etiqueta) i color segons el percentil
+    ETIQUETES_ANOMALIA = (('tm', 'Actual'), ('tx', 'Màx.'))
+    COLORS_ANOMALIA = {'alt': '#ff9999', 'baix': '#99ccff', None: 'inherit'}
+    
+    @staticmethod
+    def anomalies_temperatura(periode_data, diari_data, estacio_id):
+        """
+        Desviació respecte de la normal de la mateixa hora UTC: la temperatura del
+        període (VAR_TM_grausC) amb la mitjana d'aquella hora i la màxima del dia fins
+        ara amb la màxima normal fins a aquella hora (només si el resum diari és del
+        mateix dia que el període). {'tm': ..., 'tx': ...}, buit sense normals.
+        """
+        if not DataLoader.normals:
+            return {}
+        import normals_climatiques
+        
+        inici = re.match(r'\s*(\d{1,2}):', periode_data.get('PERIODE_UTC', '') or '')
+        hora = int(inici.group(1)) if inici else None
+        diari = (diari_data or {}).get(estacio_id) or {}
+        valors = {'tm': Utilitats.valor_numeric(periode_data.get('VAR_TM_grausC'))}
+        if diari.get('DATA_DIA') and diari.get('DATA_DIA') == periode_data.get('DATA_UTC'):
+            valors['tx'] = Utilitats.valor_numeric(diari.get('TEMPERATURA_MAXIMA_DIA'))
+        
+        anomalies = {}
+        for clau, valor in valors.items():
+            anomalia = normals_climatiques.anomalia_horaria(DataLoader.normals, estacio_id, hora, clau, valor)
+            if anomalia:
+                anomalies[clau] = anomalia
+        return anomalies
+    
+    @staticmethod
+    def generar_columnes_dades(periode_data, metadades, estacio_id, nom_estacio, diari_data=None):
+        """Genera les 4 columnes de dades"""
+        valors = HTMLGenerator.valors_columnes(periode_data, metadades, estacio_id)
+        anomalies = HTMLGenerator.anomalies_temperatura(periode_data, diari_data, estacio_id)
+        html = '<div class="mobile-container">\n'
         
-        for var, label in Config.COLUMNES_ESTRUCTURA["altres"]:
-            if var in periode_data and periode_data[var] not in ['', None]:
-                valor_amb_unitats = Utilitats.afegir_unitats(var, periode_data[var])
+        # COLUMNES 1-3: Dades bàsiques, Precipitació i vent, Altres dades
+        for grup, classe, titol in (
+            ("basiques", "col-basics", "Dades bàsiques"),
+            ("precip_vent", "col-precip-wind", "Precipitació i vent"),
+            ("altres", "col-other", "Altres dades")
+        ):
+            html += f'<div class="column {classe}">\n'
+            html += '<div class="data-column">\n'
+            html += f'<div class="column-title">{titol}</div>\n'
+            
+            for var, label, valor_amb_unitats in valors[grup]:
                 html += f'''
                 <div class="data-item">
                     <div class="data-label">{label}</div>
                     <div class="data-value">{valor_amb_unitats}</div>
                 </div>'''
-        
-        html += '</div>\n</div>\n'
+            
+            html += '</div>\n</div>\n'
         
         # COLUMNA 4: Dades addicionals
         html += '<div class="column col-additional">\n'
@@ -1271,14 +1519,14 @@ class HTMLGenerator:
         html += '<div class="column-title">Dades addicionals</div>\n'
         
         # 🔹 CANVI IMPORTANT: Període amb zona horària correcta (CET/CEST)
-        if data_formatted and periode_formatted:
-            # Utilitzem periode_formatted que ja inclou la zona horària correcta (CET o CEST)
+        if valors['periode']:
+            # L'interval ja inclou la zona horària correcta (CET o CEST)
             periode_display = f'''<div style="line-height: 1.3;">
-                <div style="font-size: 15px;">{data_formatted}</div>
-                <div style="font-size: 13px; color: #ffcc80;">{periode_formatted}</div>
+                <div style="font-size: 15px;">{valors['periode']['data']}</div>
+                <div style="font-size: 13px; color: #ffcc80;">{valors['periode']['interval']}</div>
             </div>'''
             
-            if periode_data.get('TIPUS_PERIODE') == 'ahir':
+            if valors['periode']['ahir']:
                 periode_display += '<div style="font-size: 11px; color: #ff9999;">(ahir)</div>'
             
             html += f'''
@@ -1287,41 +1535,38 @@ class HTMLGenerator:
                 <div class="data-value">{periode_display}</div>
             </div>'''
         
-        if estacio_id in metadades and 'altitud' in metadades[estacio_id]:
+        if valors['altitud'] is not None:
             html += f'''
             <div class="data-item">
                 <div class="data-label">Altitud:</div>
-                <div class="data-value">{metadades[estacio_id]['altitud']} m</div>
+                <div class="data-value">{valors['altitud']} m</div>
             </div>'''
         
-        if 'DATA_EXTRACCIO' in periode_data and periode_data['DATA_EXTRACCIO']:
-            try:
-                data_hora_utc_str = periode_data['DATA_EXTRACCIO']
-                data_hora_utc = datetime.strptime(data_hora_utc_str, "%Y-%m-%d %H:%M:%S")
-                
-                if Utilitats.es_cest(data_hora_utc):
-                    desplacament = 2
-                    zona = "CEST"
-                else:
-                    desplacament = 1
-                    zona = "CET"
-                
-                data_hora_local = data_hora_utc + timedelta(hours=desplacament)
-                hora_formatted = data_hora_local.strftime("%H:%M:%S") + " " + zona
-                
-                html += f'''
+        # Anomalia respecte de la normal de la mateixa hora (si el magatzem en té prou història)
+        if anomalies:
+            colors = HTMLGenerator.COLORS_ANOMALIA
+            linies = ''.join(
+                f'<div style="color: {colors[anomalies[clau]["percentil"]]};">{etiqueta} {anomalies[clau]["diferencia"]:+.1f} °C</div>'
+                for clau, etiqueta in HTMLGenerator.ETIQUETES_ANOMALIA if clau in anomalies
+            )
+            html += f'''
+            <div class="data-item">
+                <div class="data-label">Respecte a la normal:</div>
+                <div class="data-value"><div style="line-height: 1.3;">{linies}</div></div>
+            </div>'''
+        
+        if valors['hora_actualitzacio']:
+            html += f'''
                 <div class="data-item">
                     <div class="data-label">Hora d'actualització:</div>
-                    <div class="data-value">{hora_formatted}</div>
+                    <div class="data-value">{valors['hora_actualitzacio']}</div>
                 </div>'''
-            except:
-                pass
         
-        if estacio_id in metadades and 'comarca' in metadades[estacio_id]:
+        if valors['comarca'] is not None:
             html += f'''
             <div class="data-item">
                 <div class="data-label">Comarca:</div>
-                <div class="data-value">{metadades[estacio_id]['comarca']}</div>
+                <div class="data-value">{valors['comarca']}</div>
             </div>'''
         
         html += '</div>\n</div>\n'
@@ -1329,10 +1574,70 @@ class HTMLGenerator:
         
         return html
     
+    @staticmethod
+    def generar_sparklines(estacio_id):
+        """Bloc de sparklines de 24 h (temperatura, vent i precipitació) de la pàgina individual"""
+        series = series_sparkline(estacio_id, Config.SPARKLINE_PUNTS_PAGINA)
+        if not series:
+            return ''
+        
+        html = '<div class="sparklines">\n'
+        for clau, etiqueta in (('temperatura', 'Temperatura 24 h'), ('vent', 'Vent mitjà 24 h'), ('precipitacio', 'Precipitació 24 h')):
+            if clau in series:
+                html += f'''
+            <div class="sparkline-item">
+                <div class="data-label">{etiqueta}</div>
+                {series[clau]['svg']}
+                <div class="sparkline-rang">{series[clau]['text']}</div>
+            </div>'''
+        html += '\n</div>\n'
+        return html
+    
+    @staticmethod
+    def generar_sparklines_targeta(estacio_id):
+        """Versió reduïda per a les targetes de banner.html (menys punts, sense etiquetes)"""
+        series = series_sparkline(estacio_id, Config.SPARKLINE_PUNTS_TARGETA)
+        if not series:
+            return ''
+        return '<div class="card-sparklines">' + ''.join(series[clau]['svg'] for clau in ('temperatura', 'vent', 'precipitacio') if clau in series) + '</div>'
+    
+    @staticmethod
+    def valors_diaris(diari_data, estacio_id):
+        """
+        Calcula els valors visibles del resum diari: {var: (valor_amb_unitats, hora)}.
+        Retorna None si l'estació no té dades diàries (cal mostrar el rètol d'espera).
+        """
+        if estacio_id not in diari_data or not diari_data[estacio_id]:
+            return None
+        
+        diari = diari_data[estacio_id]
+        valors = {}
+        
+        for var, label, hora_var in Config.VARIABLES_DIARI_COMPLETES:
+            if var in diari and diari[var]:
+                if var == 'RATXA_VENT_MAX':
+                    valor_amb_unitats = NetejaDades.netejar_ratxa(diari[var])
+                elif var == 'PRESSIO_ATMOSFERICA':
+                    valor_amb_unitats = NetejaDades.netejar_pressio(diari[var])
+                else:
+                    valor_amb_unitats = Utilitats.afegir_unitats(var, diari[var])
+                
+                hora_formatted = ""
+                if hora_var and hora_var in diari and diari[hora_var]:
+                    hora_formatted = Utilitats.format_hora_tu(diari[hora_var])
+                
+                valors[var] = (valor_amb_unitats, hora_formatted)
+        
+        return {
+            'data': Utilitats.format_data_dia(diari.get('DATA_DIA', '')),
+            'valors': valors
+        }
+    
     @staticmethod
     def generar_dades_diaries(diari_data, estacio_id):
         """Genera la secció de dades diàries - AMB DATA FORMATADA I RÈTOL D'ESPERA"""
-        if estacio_id not in diari_data or not diari_data[estacio_id]:
+        valors_dia = HTMLGenerator.valors_diaris(diari_data, estacio_id)
+        if valors_dia is None:
             # 🔹 NOU: Rètol d'espera quan no hi ha dades diàries
             html = '''
             <div class="espera-container">
@@ -1345,11 +1650,8 @@ class HTMLGenerator:
             '''
             return html
         
-        diari = diari_data[estacio_id]
-        
-        # 🔹 NOU: Obtenir i formatar la data del dia
-        data_dia_original = diari.get('DATA_DIA', '')
-        data_dia_formatted = Utilitats.format_data_dia(data_dia_original)
+        # 🔹 NOU: Data del dia ja formatada
+        data_dia_formatted = valors_dia['data']
         titol_diari = f"📅 Dades Diàries del dia {data_dia_formatted} (Des de les 00:00 UTC)" if data_dia_formatted else "📅 Dades Diàries (Des de les 00:00 UTC)"
         
         html = f'''
@@ -1369,19 +1671,11 @@ class HTMLGenerator:
                 html += '<div class="column"><div class="data-column">'
                 
                 for var, label, hora_var in vars_columna:
-                    if var in diari and diari[var]:
-                        if var == 'RATXA_VENT_MAX':
-                            valor_net = NetejaDades.netejar_ratxa(diari[var])
-                            valor_amb_unitats = valor_net
-                        elif var == 'PRESSIO_ATMOSFERICA':
-                            valor_net = NetejaDades.netejar_pressio(diari[var])
-                            valor_amb_unitats = valor_net
-                        else:
-                            valor_amb_unitats = Utilitats.afegir_unitats(var, diari[var])
+                    if var in valors_dia['valors']:
+                        valor_amb_unitats, hora_formatted = valors_dia['valors'][var]
                         
                         hora_text = ""
-                        if hora_var and hora_var in diari and diari[hora_var]:
-                            hora_formatted = Utilitats.format_hora_tu(diari[hora_var])
+                        if hora_formatted:
                             hora_text = f'<span class="hora-registre">({hora_formatted})</span>'
                         
                         html += f'''
@@ -1402,6 +1696,98 @@ class HTMLGenerator:
         
         return html
 
+# ============================================================================
+# 🔹 SPARKLINES DE 24 h (LTTB + SVG EN LÍNIA)
+# ============================================================================
+SPARKLINE_AMPLADA = 94  # 47 intervals de mitja hora × 2 unitats
+SPARKLINE_ALCADA = 20
+
+def lttb(x, y, punts):
+    """Largest-Triangle-Three-Buckets: redueix (x, y) a 'punts' conservant-ne la forma"""
+    n = len(x)
+    if punts >= n or punts < 3:
+        return x, y
+    mida = (n - 2) / (punts - 2)
+    seleccio = [0]
+    anterior = 0
+    for i in range(punts - 2):
+        inici, final = int(i * mida) + 1, int((i + 1) * mida) + 1
+        seguent_final = min(int((i + 2) * mida) + 1, n)
+        mitjana_x, mitjana_y = x[final:seguent_final].mean(), y[final:seguent_final].mean()
+        # El punt del bucket que fa el triangle més gran amb l'anterior i la mitjana del següent
+        arees = np.abs((x[anterior] - mitjana_x) * (y[inici:final] - y[anterior])
+                       - (x[anterior] - x[inici:final]) * (mitjana_y - y[anterior]))
+        anterior = inici + int(np.argmax(arees))
+        seleccio.append(anterior)
+    seleccio.append(n - 1)
+    return x[seleccio], y[seleccio]
+
+def parells_relatius(xs, ys):
+    """'2-1 2 0 2 3': desplaçaments enters d'un camí SVG relatiu, sense espais sobrers"""
+    text = ''
+    for dx, dy in zip(np.diff(xs), np.diff(ys)):
+        for valor in (dx, dy):
+            text += ('' if valor < 0 or not text else ' ') + str(int(valor))
+    return text
+
+def cami_linia(posicions, valors, total):
+    """Camí SVG de la línia, quantitzat a enters dins el viewBox"""
+    minim, maxim = valors.min(), valors.max()
+    xs = np.round(posicions * SPARKLINE_AMPLADA / max(total - 1, 1)).astype(int)
+    ys = SPARKLINE_ALCADA - 1 - np.round((valors - minim) / ((maxim - minim) or 1) * (SPARKLINE_ALCADA - 2)).astype(int)
+    return f"M{xs[0]} {ys[0]}l{parells_relatius(xs, ys)}"
+
+def cami_barres(valors):
+    """Camí SVG de barres verticals (una per valor positiu) sobre una línia de base"""
+    maxim = valors.max() if len(valors) else 0
+    cami = f"M0 {SPARKLINE_ALCADA - 0.5}h{SPARKLINE_AMPLADA}"
+    if maxim <= 0:
+        return cami
+    pas = SPARKLINE_AMPLADA / max(len(valors) - 1, 1)
+    for i, valor in enumerate(valors):
+        if valor > 0:
+            alcada = max(1, int(round(valor / maxim * (SPARKLINE_ALCADA - 1))))
+            cami += f"M{int(round(i * pas))} {SPARKLINE_ALCADA}v-{alcada}"
+    return cami
+
+def svg_sparkline(clau, cami):
+    return (f'<svg class="sparkline spark-{clau}" viewBox="0 0 {SPARKLINE_AMPLADA} {SPARKLINE_ALCADA}" '
+            f'preserveAspectRatio="none" aria-hidden="true"><path d="{cami}"/></svg>')
+
+def series_sparkline(estacio_id, punts):
+    """
+    Sparklines de les darreres 24 h d'una estació: {clau: {'svg', 'text'}} per a
+    temperatura i vent (LTTB fins a 'punts') i precipitació (sumes per tram, que
+    no es poden mostrejar sense perdre pluja). Buit si no hi ha sèrie.
+    """
+    finestra = DataLoader.llegir_finestra(estacio_id, 24, ('tm', 'vvm', 'ppt'))
+    if finestra is None:
+        return {}
+    total = len(finestra['instant'])
+    series = {}
+    
+    for clau, columna, format_rang in (('temperatura', 'tm', '{:.1f} – {:.1f} °C'), ('vent', 'vvm', '{:.0f} – {:.0f} km/h')):
+        valors = finestra[columna].astype(np.float64)
+        posicions = np.flatnonzero(~np.isnan(valors))
+        if len(posicions) < 2:
+            continue
+        x, y = lttb(posicions.astype(np.float64), valors[posicions], punts)
+        series[clau] = {
+            'svg': svg_sparkline(clau, cami_linia(x, y, total)),
+            'text': format_rang.format(y.min(), y.max())
+        }
+    
+    precipitacio = finestra['ppt'].astype(np.float64)
+    if (~np.isnan(precipitacio)).any():
+        precipitacio = np.nan_to_num(precipitacio)
+        if punts < total:
+            precipitacio = np.add.reduceat(precipitacio, np.linspace(0, total, punts + 1).astype(int)[:-1])
+        series['precipitacio'] = {
+            'svg': svg_sparkline('precipitacio', cami_barres(precipitacio)),
+            'text': f"Total {precipitacio.sum():.1f} mm"
+        }
+    return series
+
 # ============================================================================
 # FUNCIONS PRINCIPALS DE GENERACIÓ
 # ============================================================================
@@ -1563,7 +1949,7 @@ def generar_banner_html(metadades, periode_data, diari_data):
                             <div class="weather-value">{precipitacio_periode} mm</div>
                             <div class="periode-info">Pluja acumulada del període</div>
                         </div>
-                    </div>
+                    </div>{HTMLGenerator.generar_sparklines_targeta(estacio_id)}
                 </div>
                 <div class="station-footer">
                     ID: {estacio_id}
@@ -1602,26 +1988,19 @@ def generar_banner_html(metadades, periode_data, diari_data):
 # ============================================================================
 # 🔹 FUNCIÓ GENERADORA D'INDIVIDUALS (AMB TOTES LES MILLORES)
 # ============================================================================
-def generar_banners_individuals(metadades, periode_data, diari_data):
-    """Genera banners individuals per a cada estació - AMB TOTES LES MILLORES"""
-    print("🔄 Generant banners individuals...")
+def generar_banner_individual(estacio_id, metadades, periode_data, diari_data, estacions_ordenades=None):
+    """HTML de la pàgina individual (index_XX.html) d'una estació"""
+    meta = metadades.get(estacio_id, {})
+    periode = periode_data[estacio_id]
+    diari = diari_data.get(estacio_id, {})
     
-    banners_generats = []
+    # Obtenir hora d'actualització per al footer
+    hora_actualitzacio = periode.get('DATA_EXTRACCIO')
     
-    for estacio_id, meta in metadades.items():
-        if estacio_id not in periode_data:
-            continue
-        
-        periode = periode_data[estacio_id]
-        diari = diari_data.get(estacio_id, {})
-        
-        # Obtenir hora d'actualització per al footer
-        hora_actualitzacio = periode.get('DATA_EXTRACCIO')
-        
-        html = HTMLGenerator.generar_head(f"Banner Fix - {periode.get('NOM_ESTACIO', estacio_id)}")
-        
-        # 🔹 NOVA CAPÇALERA REDISSENYADA
-        html += f'''
+    html = HTMLGenerator.generar_head(f"Banner Fix - {periode.get('NOM_ESTACIO', estacio_id)}")
+    
+    # 🔹 NOVA CAPÇALERA REDISSENYADA
+    html += f'''
     <div class="meteo-overlay">
         <div class="overlay-header">
             <div class="station-info">
@@ -1641,23 +2020,17 @@ def generar_banners_individuals(metadades, periode_data, diari_data):
                         <select id="navEstacions" onchange="window.location.href=this.value">
                             <option value="">-- Selecciona una estació --</option>
         '''
-        
-        # Ordenar estacions per nom (alfabèticament)
-        estacions_ordenades = []
-        for altre_id, altre_meta in metadades.items():
-            if altre_id in periode_data:
-                nom_altre = periode_data[altre_id].get('NOM_ESTACIO', altre_id)
-                estacions_ordenades.append((nom_altre, altre_id))
-        
-        # Ordenar per nom
-        estacions_ordenades.sort(key=lambda x: x[0].lower())
-        
-        # Afegir opcions ordenades
-        for nom_altre, altre_id in estacions_ordenades:
-            selected = 'selected' if altre_id == estacio_id else ''
-            html += f'<option value="index_{altre_id}.html" {selected}>{nom_altre}</option>\n'
-        
-        html += f'''
+    
+    # Ordenades per nom (alfabèticament); generar_banners_individuals les calcula una sola vegada
+    if estacions_ordenades is None:
+        estacions_ordenades = estacions_ordenades_per_nom(metadades, periode_data)
+    
+    # Afegir opcions ordenades
+    for nom_altre, altre_id in estacions_ordenades:
+        selected = 'selected' if altre_id == estacio_id else ''
+        html += f'<option value="index_{altre_id}.html" {selected}>{nom_altre}</option>\n'
+    
+    html += f'''
                         </select>
                     </div>
                     
@@ -1700,21 +2073,24 @@ def generar_banners_individuals(metadades, periode_data, diari_data):
         
         <div class="overlay-content">
         '''
-        
-        # Generar columnes amb totes les correccions
-        html += HTMLGenerator.generar_columnes_dades(periode, metadades, estacio_id, periode.get('NOM_ESTACIO', estacio_id), diari_data)
-        
-        # Generar dades diàries (amb la data formatada i el rètol d'espera)
-        html += HTMLGenerator.generar_dades_diaries(diari_data, estacio_id)
-        
-        html += f'''
+    
+    # Generar columnes amb totes les correccions
+    html += HTMLGenerator.generar_columnes_dades(periode, metadades, estacio_id, periode.get('NOM_ESTACIO', estacio_id), diari_data)
+    
+    # Sparklines de les darreres 24 h (SVG ja calculat, res a fer al navegador)
+    html += HTMLGenerator.generar_sparklines(estacio_id)
+    
+    # Generar dades diàries (amb la data formatada i el rètol d'espera)
+    html += HTMLGenerator.generar_dades_diaries(diari_data, estacio_id)
+    
+    html += f'''
         </div>
         '''
-        
-        # ============================================================================
-        # 🆕 CANVI: Modifiquem el botó "Principal" perquè no obri pestanya nova
-        # ============================================================================
-        html += f'''
+    
+    # ============================================================================
+    # 🆕 CANVI: Modifiquem el botó "Principal" perquè no obri pestanya nova
+    # ============================================================================
+    html += f'''
         <script>
         (function() {{
             // Esperem que el DOM estigui carregat
@@ -1749,22 +2125,644 @@ def generar_banners_individuals(metadades, periode_data, diari_data):
         }})();
         </script>
         '''
+    
+    html += HTMLGenerator.generar_footer(hora_actualitzacio)
+    
+    return html
+
+def escriure_banner_individual(estacio_id, metadades, periode_data, diari_data, estacions_ordenades=None):
+    """Genera i desa index_XX.html d'una estació. Retorna la ruta"""
+    html = generar_banner_individual(estacio_id, metadades, periode_data, diari_data, estacions_ordenades)
+    output_path = Config.OUTPUT_DIR / f"index_{estacio_id}.html"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return output_path
+
+def generar_banners_individuals(metadades, periode_data, diari_data):
+    """Genera banners individuals per a cada estació - AMB TOTES LES MILLORES"""
+    print("🔄 Generant banners individuals...")
+    
+    banners_generats = []
+    estacions_ordenades = estacions_ordenades_per_nom(metadades, periode_data)
+    
+    for estacio_id in metadades:
+        if estacio_id not in periode_data:
+            continue
         
-        html += HTMLGenerator.generar_footer(hora_actualitzacio)
-        
-        # Guardar el fitxer individual
-        output_path = Config.OUTPUT_DIR / f"index_{estacio_id}.html"
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html)
-        
+        output_path = escriure_banner_individual(estacio_id, metadades, periode_data, diari_data, estacions_ordenades)
         banners_generats.append(output_path)
         print(f"   ✅ Banner individual: {estacio_id} → {output_path.name}")
     
     print(f"✅ {len(banners_generats)} banners individuals generats")
     return banners_generats
 
+# ============================================================================
+# 🔹 MODE SHELL: PÀGINA ESTÀTICA + DADES COMPACTES
+# ============================================================================
+def escriure_si_canvia(output_path, contingut):
+    """Escriu el fitxer només si el contingut ha canviat (manté la data per a la memòria cau)"""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.exists() and output_path.read_text(encoding='utf-8') == contingut:
+        return False
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(contingut)
+    return True
+
+def estacions_ordenades_per_nom(metadades, periode_data):
+    """Retorna [(nom, id)] de les estacions amb dades, en l'ordre del desplegable"""
+    estacions = []
+    for estacio_id in metadades.keys():
+        if estacio_id in periode_data:
+            estacions.append((periode_data[estacio_id].get('NOM_ESTACIO', estacio_id), estacio_id))
+    estacions.sort(key=lambda x: x[0].lower())
+    return estacions
+
+def generar_dades_estacions_json(metadades, periode_data, diari_data):
+    """
+    Genera stations_data.json: només els valors que mostren generar_columnes_dades
+    i generar_dades_diaries, ja formatats. La pàgina shell els pinta al navegador.
+    """
+    print(f"🔄 Generant {Config.DADES_ESTACIONS_JSON}...")
+
+    estacions = []
+    for nom_estacio, estacio_id in estacions_ordenades_per_nom(metadades, periode_data):
+        periode = periode_data[estacio_id]
+        valors = HTMLGenerator.valors_columnes(periode, metadades, estacio_id)
+        valors_dia = HTMLGenerator.valors_diaris(diari_data, estacio_id)
+        anomalies = HTMLGenerator.anomalies_temperatura(periode, diari_data, estacio_id)
+
+        estacions.append({
+            'id': estacio_id,
+            'nom': nom_estacio,
+            'comarca': valors['comarca'],
+            'altitud': valors['altitud'],
+            'valors': {var: valor for grup in ("basiques", "precip_vent", "altres") for var, _, valor in valors[grup]},
+            'periode': valors['periode'],
+            'actualitzacio': valors['hora_actualitzacio'],
+            'anomalia': [[etiqueta, anomalies[clau]['diferencia'], anomalies[clau]['percentil']]
+                         for clau, etiqueta in HTMLGenerator.ETIQUETES_ANOMALIA if clau in anomalies] or None,
+            'peu': HTMLGenerator.formatar_hora_footer(periode.get('DATA_EXTRACCIO')),
+            'diari': None if valors_dia is None else {
+                'data': valors_dia['data'],
+                'valors': {var: list(valor_hora) for var, valor_hora in valors_dia['valors'].items()}
+            }
+        })
+
+    dades = {
+        'versio': 1,
+        'generat': datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'estacions': estacions
+    }
+
+    output_path = Config.OUTPUT_DIR / Config.DADES_ESTACIONS_JSON
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(dades, f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"✅ {Config.DADES_ESTACIONS_JSON} generat: {len(estacions)} estacions, {output_path.stat().st_size} bytes")
+    return output_path
+
+def generar_shell_html():
+    """
+    Genera la pàgina shell estàtica (estacio.html). No conté dades: llegeix
+    stations_data.json, pinta l'estació i fa la rotació al navegador sense recarregar.
+    Paràmetres d'URL: #XX o ?estacio=XX (fixa) i ?rotacio=segons (0 = sense rotació).
+    Els rotadors canvien només el fragment (#XX), així la pàgina no es recarrega.
+    """
+    print(f"🔄 Generant {Config.SHELL_HTML}...")
+
+    config_shell = {
+        'dades': Config.DADES_ESTACIONS_JSON,
+        'rotacio': Config.ROTATION_SECONDS,
+        'refresc': Config.SHELL_REFRESC_DADES_SEGONS,
+        'columnes': [
+            {'classe': classe, 'titol': titol, 'vars': [list(v) for v in Config.COLUMNES_ESTRUCTURA[grup]]}
+            for grup, classe, titol in (
+                ("basiques", "col-basics", "Dades bàsiques"),
+                ("precip_vent", "col-precip-wind", "Precipitació i vent"),
+                ("altres", "col-other", "Altres dades")
+            )
+        ],
+        'diari': [[var, label] for var, label, _ in Config.VARIABLES_DIARI_COMPLETES],
+        'colorsAnomalia': {clau: color for clau, color in HTMLGenerator.COLORS_ANOMALIA.items() if clau},
+        'varsPerColumna': len(Config.VARIABLES_DIARI_COMPLETES) // 4 + 1
+    }
+
+    html = HTMLGenerator.generar_head("Banner Fix - Estacions")
+
+    html += '''
+    <div class="meteo-overlay">
+        <div class="overlay-header">
+            <div class="station-info">
+                <div class="station-name" id="shellNom">🏔️ --</div>
+                <div class="location-details">
+                    <span class="location-label">Comarca:</span> <span id="shellComarca">--</span> |
+                    <span class="location-label">Altitud:</span> <span id="shellAltitud">--</span> m |
+                    <span class="location-label">ID:</span> <span id="shellId">--</span>
+                </div>
+            </div>
+
+            <div class="header-center">
+                <div class="top-controls-group">
+                    <div class="station-selector-wrapper">
+                        <select id="navEstacions">
+                            <option value="">-- Selecciona una estació --</option>
+                        </select>
+                    </div>
+
+                    <div class="station-icon">
+                        <a href="banner.html" title="Veure totes les estacions">
+                            <i class="fas fa-list"></i>
+                            <span class="icon-text">Totes</span>
+                        </a>
+                    </div>
+                    <div class="station-icon">
+                        <button onclick="window.parent.location.href='index.html'" title="Tornar al banner principal">
+                            <i class="fas fa-home"></i>
+                            <span class="icon-text">Principal</span>
+                        </button>
+                    </div>
+                </div>
+
+                <div class="rotation-status-container">
+                    <div class="rotation-status">
+                        <i class="fas fa-info-circle"></i>
+                        Per veure aquesta o una altra estació de forma estàtica estant en scroll, prem “Estacions” i escull la desitjada.
+                    </div>
+                </div>
+            </div>
+
+            <div class="header-right">
+                <div class="dual-clock-digital">
+                    <div class="clock-row-digital">
+                        <div class="clock-time-digital" id="hora-local">--:--</div>
+                        <div class="clock-label-digital">LT</div>
+                    </div>
+                    <div class="clock-row-digital">
+                        <div class="clock-time-digital" id="hora-utc">--:--</div>
+                        <div class="clock-label-digital">UTC</div>
+                    </div>
+                </div>
+            </div>
+        </div>
+
+        <div class="overlay-content" id="shellContingut"></div>
+
+    <script>
+    const SHELL = ''' + json.dumps(config_shell, ensure_ascii=False) + ''';
+    const params = new URLSearchParams(window.location.search);
+    let estacioFixa = window.location.hash.slice(1) || params.get('estacio');
+    const segonsRotacio = params.has('rotacio') ? parseInt(params.get('rotacio'), 10) : SHELL.rotacio;
+    let estacions = [];
+    let indexActual = 0;
+    let timerRotacio = null;
+
+    function esc(text) {
+        return String(text).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+    }
+
+    function item(label, valor) {
+        return '<div class="data-item"><div class="data-label">' + label + '</div><div class="data-value">' + valor + '</div></div>';
+    }
+
+    function pintarColumnes(e) {
+        let html = '<div class="mobile-container">';
+        SHELL.columnes.forEach(col => {
+            html += '<div class="column ' + col.classe + '"><div class="data-column"><div class="column-title">' + col.titol + '</div>';
+            col.vars.forEach(([variable, label]) => {
+                if (variable in e.valors) html += item(label, esc(e.valors[variable]));
+            });
+            html += '</div></div>';
+        });
+
+        html += '<div class="column col-additional"><div class="data-column"><div class="column-title">Dades addicionals</div>';
+        if (e.periode) {
+            let periode = '<div style="line-height: 1.3;"><div style="font-size: 15px;">' + esc(e.periode.data) + '</div>' +
+                '<div style="font-size: 13px; color: #ffcc80;">' + esc(e.periode.interval) + '</div></div>';
+            if (e.periode.ahir) periode += '<div style="font-size: 11px; color: #ff9999;">(ahir)</div>';
+            html += item('Període:', periode);
+        }
+        if (e.altitud !== null) html += item('Altitud:', esc(e.altitud) + ' m');
+        if (e.anomalia) {
+            const linies = e.anomalia.map(([etiqueta, diferencia, percentil]) =>
+                '<div style="color: ' + (SHELL.colorsAnomalia[percentil] || 'inherit') + ';">' + esc(etiqueta) + ' ' +
+                (diferencia >= 0 ? '+' : '') + diferencia.toFixed(1) + ' °C</div>').join('');
+            html += item('Respecte a la normal:', '<div style="line-height: 1.3;">' + linies + '</div>');
+        }
+        if (e.actualitzacio) html += item("Hora d'actualització:", esc(e.actualitzacio));
+        if (e.comarca !== null) html += item('Comarca:', esc(e.comarca));
+        html += '</div></div></div>';
+        return html;
+    }
+
+    function pintarDiari(e) {
+        if (!e.diari) {
+            return '<div class="espera-container"><div class="espera-missatge"><span class="espera-punt"></span>' +
+                '<span>Esperant dades vàlides del període</span><span class="espera-punt"></span></div></div>';
+        }
+        const titol = e.diari.data ? '📅 Dades Diàries del dia ' + esc(e.diari.data) + ' (Des de les 00:00 UTC)' : '📅 Dades Diàries (Des de les 00:00 UTC)';
+        let html = '<div style="margin-top: 15px; padding: 15px; background: rgba(26, 35, 126, 0.7); border-radius: 8px; border: 2px solid #5c6bc0;">' +
+            '<div class="column-title" style="text-align: center; margin-bottom: 10px;">' + titol + '</div><div class="mobile-container">';
+        for (let i = 0; i < 4; i++) {
+            const vars = SHELL.diari.slice(i * SHELL.varsPerColumna, (i + 1) * SHELL.varsPerColumna);
+            if (vars.length === 0) continue;
+            html += '<div class="column"><div class="data-column">';
+            vars.forEach(([variable, label]) => {
+                if (!(variable in e.diari.valors)) return;
+                const [valor, hora] = e.diari.valors[variable];
+                const horaText = hora ? '<span class="hora-registre">(' + esc(hora) + ')</span>' : '';
+                html += item(label + ':', esc(valor) + ' ' + horaText);
+            });
+            html += '</div></div>';
+        }
+        return html + '</div></div>';
+    }
+
+    function mostrarEstacio(index) {
+        if (estacions.length === 0) return;
+        indexActual = (index + estacions.length) % estacions.length;
+        const e = estacions[indexActual];
+        document.title = 'Banner Fix - ' + e.nom;
+        document.getElementById('shellNom').textContent = '🏔️ ' + e.nom;
+        document.getElementById('shellComarca').textContent = e.comarca;
+        document.getElementById('shellAltitud').textContent = e.altitud;
+        document.getElementById('shellId').textContent = e.id;
+        document.getElementById('navEstacions').value = e.id;
+        document.getElementById('shellContingut').innerHTML = pintarColumnes(e) + pintarDiari(e);
+        const peu = document.querySelector('.footer-right span');
+        if (peu) peu.textContent = '🔄 ' + e.peu;
+    }
+
+    function omplirSelector() {
+        const select = document.getElementById('navEstacions');
+        select.length = 1;
+        estacions.forEach(e => select.add(new Option(e.nom, e.id)));
+    }
+
+    async function carregarDades() {
+        try {
+            const resposta = await fetch(SHELL.dades + '?t=' + Date.now(), { cache: 'no-store' });
+            if (!resposta.ok) throw new Error('HTTP ' + resposta.status);
+            const dades = await resposta.json();
+            const idActual = estacions.length ? estacions[indexActual].id : estacioFixa;
+            estacions = dades.estacions || [];
+            omplirSelector();
+            const index = estacions.findIndex(e => e.id === idActual);
+            mostrarEstacio(index >= 0 ? index : 0);
+        } catch (error) {
+            console.error('❌ Error carregant ' + SHELL.dades + ':', error);
+        }
+    }
+
+    document.getElementById('navEstacions').addEventListener('change', function() {
+        const index = estacions.findIndex(e => e.id === this.value);
+        if (index < 0) return;
+        mostrarEstacio(index);
+        if (timerRotacio) {
+            clearInterval(timerRotacio);
+            timerRotacio = null;
+        }
+    });
+
+    window.addEventListener('hashchange', function() {
+        estacioFixa = window.location.hash.slice(1);
+        const index = estacions.findIndex(e => e.id === estacioFixa);
+        if (index >= 0) mostrarEstacio(index);
+    });
+
+    carregarDades().then(() => {
+        if (!estacioFixa && segonsRotacio > 0) {
+            timerRotacio = setInterval(() => mostrarEstacio(indexActual + 1), segonsRotacio * 1000);
+        }
+    });
+    setInterval(carregarDades, SHELL.refresc * 1000);
+    </script>
+    '''
+
+    html += HTMLGenerator.generar_footer(text_hora="--")
+
+    if Config.MINIFICAR_HTML:
+        html = minificar_html(html)
+
+    output_path = Config.OUTPUT_DIR / Config.SHELL_HTML
+    if escriure_si_canvia(output_path, html):
+        print(f"✅ {Config.SHELL_HTML} generat: {output_path}")
+    else:
+        print(f"✅ {Config.SHELL_HTML} sense canvis (es manté a la memòria cau)")
+    return output_path
+
+# ============================================================================
+# 🔹 FEED overlay_data.json PER ALS OVERLAYS LLEUGERS D'OBS
+# ============================================================================
+def primer_numero(dades, variables):
+    """Retorna el primer valor numèric disponible d'una llista de variables"""
+    for var in variables:
+        numero = Utilitats.valor_numeric(dades.get(var))
+        if numero is not None:
+            return numero
+    return None
+
+def generar_overlay_data_json(metadades, periode_data, diari_data, context_mensual=None):
+    """
+    Genera data/overlay_data.json, el feed que llegeix el MeteoDataLoader de
+    templates/overlay.html. Esquema estable (versio 1): valors numèrics del darrer
+    període per estació, extrems del dia, context del mes (rollups) i marca de
+    frescor de les dades. 'anomalia' és la desviació respecte de la normal
+    climàtica de la mateixa hora (src/normals_climatiques.py) i 'tendencia' ve de les
+    sèries memmap (24 h de temperatura, 7 dies de precipitació).
+    """
+    context_mensual = context_mensual or {}
+    print("🔄 Generant overlay_data.json...")
+
+    stations = []
+    darrera_extraccio = ''
+    for nom_estacio, estacio_id in estacions_ordenades_per_nom(metadades, periode_data):
+        periode = periode_data[estacio_id]
+        diari = diari_data.get(estacio_id, {})
+        darrera_extraccio = max(darrera_extraccio, periode.get('DATA_EXTRACCIO', ''))
+
+        anomalies = HTMLGenerator.anomalies_temperatura(periode, diari_data, estacio_id)
+        tendencies = DataLoader.llegir_tendencies(estacio_id)
+        temperatures = [] if tendencies is None else tendencies['temperatura'][~np.isnan(tendencies['temperatura'])]
+        dia = None
+        if diari:
+            dia = {
+                'data': diari.get('DATA_DIA', ''),
+                'temp_mitjana': Utilitats.valor_numeric(diari.get('TEMPERATURA_MITJANA_DIA')),
+                'temp_max': Utilitats.valor_numeric(diari.get('TEMPERATURA_MAXIMA_DIA')),
+                'hora_temp_max': Utilitats.format_hora_tu(diari.get('HORA_TX', '')) or Utilitats.hora_tu_del_valor(diari.get('TEMPERATURA_MAXIMA_DIA')),
+                'temp_min': Utilitats.valor_numeric(diari.get('TEMPERATURA_MINIMA_DIA')),
+                'hora_temp_min': Utilitats.format_hora_tu(diari.get('HORA_TN', '')) or Utilitats.hora_tu_del_valor(diari.get('TEMPERATURA_MINIMA_DIA')),
+                'humitat': Utilitats.valor_numeric(diari.get('HUMITAT_MITJANA_DIA')),
+                'precipitacio': Utilitats.valor_numeric(diari.get('PRECIPITACIO_ACUM_DIA')),
+                'ratxa_max': Utilitats.valor_numeric(diari.get('RATXA_VENT_MAX')),
+                'gruix_neu_max': Utilitats.valor_numeric(diari.get('GRUIX_NEU_MAX'))
+            }
+
+        stations.append({
+            'code': estacio_id,
+            'nom': nom_estacio,
+            'comarca': metadades[estacio_id].get('comarca', 'Desconeguda'),
+            'altitud': Utilitats.valor_numeric(metadades[estacio_id].get('altitud')),
+            'data_utc': periode.get('DATA_UTC', ''),
+            'periode_utc': periode.get('PERIODE_UTC', ''),
+            'data_extraccio': periode.get('DATA_EXTRACCIO', ''),
+            'es_ahir': periode.get('TIPUS_PERIODE') == 'ahir',
+            'temp_actual': primer_numero(periode, ['VAR_TM_grausC']),
+            'temp_max': primer_numero(periode, ['VAR_TX_grausC']),
+            'temp_min': primer_numero(periode, ['VAR_TN_grausC']),
+            'humitat': primer_numero(periode, ['VAR_HRM_perc']),
+            'precipitacio': primer_numero(periode, ['VAR_PPT_mm']),
+            'vent_velocitat': primer_numero(periode, ['VAR_VVM_10_m_km_h', 'VAR_VVM_6_m_km_h', 'VAR_VVM_2_m_km_h']),
+            'vent_direccio': primer_numero(periode, ['VAR_DVM_10_m_graus', 'VAR_DVM_6_m_graus', 'VAR_DVM_2_m_graus']),
+            'vent_ratxa': primer_numero(periode, ['VAR_VVX_10_m_km_h', 'VAR_VVX_6_m_km_h', 'VAR_VVX_2_m_km_h']),
+            'pressio': primer_numero(periode, ['VAR_PM_hPa']),
+            'radiacio': primer_numero(periode, ['VAR_RS_W_m_2']),
+            'gruix_neu': primer_numero(periode, ['VAR_GN_cm']),
+            'neu_fresca': None,
+            'dia': dia,
+            'mes': None if estacio_id not in context_mensual else {
+                'mes': context_mensual[estacio_id]['inici'],
+                'temp_mitjana': context_mensual[estacio_id]['tm_mitjana'],
+                'temp_max': context_mensual[estacio_id]['tx'],
+                'temp_min': context_mensual[estacio_id]['tn'],
+                'precipitacio': context_mensual[estacio_id]['ppt_total'],
+                'periodes': context_mensual[estacio_id]['n_periodes']
+            },
+            'anomalia': None if not anomalies else {
+                'temp_actual': anomalies.get('tm'),
+                'temp_max': anomalies.get('tx')
+            },
+            'tendencia': None if tendencies is None else {
+                'temp_min_24h': round(float(temperatures.min()), 1) if len(temperatures) else None,
+                'temp_max_24h': round(float(temperatures.max()), 1) if len(temperatures) else None,
+                'precipitacio_7d': tendencies['precipitacio_acumulada']
+            }
+        })
+
+    ultima_actualitzacio = ''
+    if darrera_extraccio:
+        # DATA_EXTRACCIO és hora UTC del runner (mateix criteri que generar_footer)
+        ultima_actualitzacio = darrera_extraccio.replace(' ', 'T') + 'Z'
+
+    dades = {
+        'versio': 1,
+        'ultima_actualitzacio': ultima_actualitzacio,
+        'data_actualitzacio': datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'stations': stations
+    }
+
+    output_path = Config.OVERLAY_DATA_JSON
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(dades, f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"✅ overlay_data.json generat: {len(stations)} estacions, {output_path.stat().st_size} bytes")
+    return output_path
+
+# ============================================================================
+# 🔹 MANIFEST DE ROTACIÓ (rotation_manifest.json)
+# ============================================================================
+def generar_rotation_manifest(metadades, periode_data, shell=False):
+    """
+    Genera rotation_manifest.json: llista ordenada (la del desplegable) de les
+    estacions a rotar, amb nom, pàgina i marca de temps de les dades. Els rotadors
+    la llegeixen amb una sola petició en lloc de rascar HTML o provar HEADs.
+    Si s'ha generat la shell, 'url' és estacio.html#XX; si no, index_XX.html.
+    """
+    print(f"🔄 Generant {Config.ROTATION_MANIFEST_JSON}...")
+
+    estacions = []
+    for nom_estacio, estacio_id in estacions_ordenades_per_nom(metadades, periode_data):
+        periode = periode_data[estacio_id]
+        estacions.append({
+            'id': estacio_id,
+            'nom': nom_estacio,
+            'url': f"{Config.SHELL_HTML}#{estacio_id}" if shell else f"index_{estacio_id}.html",
+            'data_extraccio': periode.get('DATA_EXTRACCIO', ''),
+            'periode_utc': periode.get('PERIODE_UTC', ''),
+            'data_utc': periode.get('DATA_UTC', '')
+        })
+
+    manifest = {
+        'versio': 1,
+        'generat': datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'rotacio_segons': Config.ROTATION_SECONDS,
+        'estacions': estacions
+    }
+
+    output_path = Config.OUTPUT_DIR / Config.ROTATION_MANIFEST_JSON
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"✅ {Config.ROTATION_MANIFEST_JSON} generat: {len(estacions)} estacions")
+    return output_path
+
+# ============================================================================
+# 🔹 SORTIDA MINIFICADA I PRECOMPRIMIDA (.gz / .br)
+# ============================================================================
+PATRO_BLOCS_LITERALS = re.compile(r'(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)', re.S | re.I)
+
+def minificar_css(css):
+    """Treu comentaris i espais sobrers del CSS (sense tocar selectors com 'div :hover')"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};])\s*', r'\1', css)
+    css = re.sub(r'([:,])\s+', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+def minificar_js(js):
+    """
+    Només treu el sagnat i les línies buides. Es mantenen els salts de línia
+    (inserció automàtica de ';' i comentaris '//') i les línies de dins de
+    plantilles `...` que ocupen més d'una línia.
+    """
+    linies = []
+    dins_plantilla = False
+    for linia in js.split('\n'):
+        if dins_plantilla:
+            linies.append(linia)
+        elif linia.strip():
+            linies.append(linia.strip())
+        if len(re.findall(r'(?<!\\)`', linia)) % 2:
+            dins_plantilla = not dins_plantilla
+    return '\n'.join(linies)
+
+def minificar_html(html):
+    """
+    Minifica l'HTML generat sense canviar com es pinta: treu comentaris i sagnat
+    (un salt de línia equival a un espai) i minifica el CSS i JS incrustats.
+    El contingut de <pre> i <textarea> no es toca.
+    """
+    def minificar_text(text):
+        text = re.sub(r'<!--(?!\[if).*?-->', '', text, flags=re.S)
+        return re.sub(r'[ \t]*\n\s*', '\n', text)
+
+    resultat = []
+    posicio = 0
+    for bloc in PATRO_BLOCS_LITERALS.finditer(html):
+        resultat.append(minificar_text(html[posicio:bloc.start()]))
+        obertura, etiqueta, contingut, tancament = bloc.group(1), bloc.group(2).lower(), bloc.group(3), bloc.group(4)
+        if etiqueta == 'style':
+            contingut = minificar_css(contingut)
+        elif etiqueta == 'script':
+            contingut = minificar_js(contingut)
+        resultat.append(obertura + contingut + tancament)
+        posicio = bloc.end()
+    resultat.append(minificar_text(html[posicio:]))
+    return ''.join(resultat).strip() + '\n'
+
+def escriure_bytes_si_canvia(output_path, contingut):
+    """Com escriure_si_canvia però per a fitxers binaris"""
+    if output_path.exists() and output_path.read_bytes() == contingut:
+        return False
+    output_path.write_bytes(contingut)
+    return True
+
+def generar_htaccess():
+    """Configuració d'Apache per servir els .br/.gz precomprimits quan el navegador els accepta"""
+    htaccess = '''# Generat per generador_banners.py: serveix les versions precomprimides
+<IfModule mod_rewrite.c>
+RewriteEngine On
+RewriteCond %{HTTP:Accept-Encoding} br
+RewriteCond %{REQUEST_FILENAME}.br -f
+RewriteRule ^(.+)\\.(html|json)$ $1.$2.br [L]
+RewriteCond %{HTTP:Accept-Encoding} gzip
+RewriteCond %{REQUEST_FILENAME}.gz -f
+RewriteRule ^(.+)\\.(html|json)$ $1.$2.gz [L]
+</IfModule>
+
+<FilesMatch "\\.html\\.(br|gz)$">
+ForceType "text/html; charset=utf-8"
+</FilesMatch>
+<FilesMatch "\\.json\\.(br|gz)$">
+ForceType "application/json; charset=utf-8"
+</FilesMatch>
+
+<IfModule mod_headers.c>
+<FilesMatch "\\.br$">
+Header set Content-Encoding br
+Header append Vary Accept-Encoding
+</FilesMatch>
+<FilesMatch "\\.gz$">
+Header set Content-Encoding gzip
+Header append Vary Accept-Encoding
+</FilesMatch>
+</IfModule>
+
+# Evita que mod_deflate torni a comprimir els fitxers ja comprimits
+<IfModule mod_deflate.c>
+SetEnvIfNoCase Request_URI "\\.(br|gz)$" no-gzip
+</IfModule>
+'''
+    escriure_si_canvia(Config.OUTPUT_DIR / ".htaccess", htaccess)
+
+def optimitzar_fitxer(path):
+    """
+    Minifica (si és HTML) i precomprimeix un fitxer de sortida.
+    Retorna (bytes originals, minificats, .gz, .br).
+    """
+    contingut = path.read_text(encoding='utf-8')
+    original = len(contingut.encode('utf-8'))
+
+    if Config.MINIFICAR_HTML and path.suffix == '.html':
+        contingut = minificar_html(contingut)
+        escriure_si_canvia(path, contingut)
+    dades = contingut.encode('utf-8')
+    if not Config.PRECOMPRIMIR:
+        return original, len(dades), 0, 0
+
+    # mtime=0 perquè el .gz no canviï si el contingut no canvia
+    comprimit_gz = gzip.compress(dades, compresslevel=9, mtime=0)
+    escriure_bytes_si_canvia(path.with_name(path.name + '.gz'), comprimit_gz)
+
+    path_br = path.with_name(path.name + '.br')
+    mida_br = 0
+    if brotli is not None:
+        comprimit_br = brotli.compress(dades, quality=11)
+        escriure_bytes_si_canvia(path_br, comprimit_br)
+        mida_br = len(comprimit_br)
+    elif path_br.exists():
+        # Un .br antic deixaria de correspondre a la pàgina nova
+        path_br.unlink()
+    return original, len(dades), len(comprimit_gz), mida_br
+
+def optimitzar_sortida():
+    """
+    Etapa posterior al renderitzat: minifica les pàgines HTML generades i escriu
+    els germans .gz (i .br si hi ha el paquet 'brotli') de les pàgines i els JSON.
+    Mostra els bytes estalviats respecte de la sortida original.
+    """
+    print("🔄 Optimitzant sortida (minificació + precompressió)...")
+
+    if Config.PRECOMPRIMIR and brotli is None:
+        print("⚠️  brotli no instal·lat, només es generen els .gz")
+
+    fitxers = sorted(p for p in Config.OUTPUT_DIR.iterdir()
+                     if p.is_file() and re.match(Config.PATRO_FITXERS_PRECOMPRIMITS, p.name))
+
+    original = minificat = total_gz = total_br = 0
+    for path in fitxers:
+        mides = optimitzar_fitxer(path)
+        original += mides[0]
+        minificat += mides[1]
+        total_gz += mides[2]
+        total_br += mides[3]
+
+    if Config.PRECOMPRIMIR:
+        generar_htaccess()
+
+    if original:
+        print(f"✅ {len(fitxers)} fitxers: {original} → {minificat} bytes minificats "
+              f"(-{original - minificat}, {100 * (original - minificat) / original:.1f}%)")
+        print(f"   📦 gzip: {total_gz} bytes ({100 * total_gz / original:.1f}% de l'original)")
+        if total_br:
+            print(f"   📦 brotli: {total_br} bytes ({100 * total_br / original:.1f}% de l'original)")
+    return original, minificat, total_gz, total_br
+
 def copiar_estils_existents():
     """Copia estils CSS addicionals si existeixen"""
     estils_origen = Path("estils")
@@ -1777,11 +2775,46 @@ def copiar_estils_existents():
         except Exception as e:
             print(f"⚠️  No s'han pogut copiar els estils: {e}")
 
+def generar_sortides(metadades, periode_data, diari_data, mode=Config.MODE_GENERACIO):
+    """
+    Totes les sortides del mode a partir de dades ja carregades (les fan servir
+    main() i dimoni_meteo.py, que manté el context entre cicles). Retorna les
+    pàgines individuals generades.
+    """
+    print("\n🛠️  Generant HTML...")
+    
+    # NO generem index.html perquè ja el tens fix
+    generar_banner_html(metadades, periode_data, diari_data)
+    
+    banners_individuals = []
+    if mode in ('pagines', 'tot'):
+        banners_individuals = generar_banners_individuals(metadades, periode_data, diari_data)
+    if mode in ('shell', 'tot'):
+        generar_shell_html()
+        generar_dades_estacions_json(metadades, periode_data, diari_data)
+    
+    # Feed lleuger per als overlays d'OBS (templates/overlay.html)
+    generar_overlay_data_json(metadades, periode_data, diari_data, DataLoader.llegir_context_mensual())
+    
+    # Llista de rotació per als rotadors (una sola petició petita)
+    generar_rotation_manifest(metadades, periode_data, shell=mode in ('shell', 'tot'))
+    
+    # Etapa final: HTML minificat i germans .gz/.br per al servidor
+    if Config.MINIFICAR_HTML or Config.PRECOMPRIMIR:
+        optimitzar_sortida()
+    return banners_individuals
+
 def main():
+    parser = argparse.ArgumentParser(description="Generador de banners Meteocat")
+    parser.add_argument('--mode', choices=['pagines', 'shell', 'tot'], default=Config.MODE_GENERACIO,
+                        help="pagines: un index_XX.html per estació; shell: estacio.html + stations_data.json; tot: les dues")
+    args = parser.parse_args()
+    
     print("\n" + "="*80)
     print("🚀 GENERADOR DE BANNERS METEOCAT")
     print("="*80)
     print(f"📁 Sortida: {Config.OUTPUT_DIR.absolute()}")
+    print(f"🎛️  Mode: {args.mode}")
     
     Config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     copiar_estils_existents()
@@ -1790,16 +2823,20 @@ def main():
     metadades = DataLoader.llegir_metadades()
     periode_data = DataLoader.llegir_dades_periode()
     diari_data = DataLoader.llegir_dades_diari()
+    if magatzem_historic is not None:
+        resum = magatzem_historic.resum_magatzem()
+        print(f"🗄️  Magatzem històric: {resum['observacions']} observacions de {resum['estacions']} estacions")
+        DataLoader.normals = DataLoader.llegir_normals()
+        if DataLoader.normals:
+            print(f"📐 Normals climàtiques: {len({clau[0] for clau in DataLoader.normals})} estacions")
+        # Sèries memmap per a sparklines i tendències (es creen si és un checkout nou)
+        DataLoader.preparar_tendencies()
     
     if not metadades or not periode_data:
         print("❌ Dades insuficients")
         return
     
-    print("\n🛠️  Generant HTML...")
-    
-    # NO generem index.html perquè ja el tens fix
-    banner_path = generar_banner_html(metadades, periode_data, diari_data)
-    banners_individuals = generar_banners_individuals(metadades, periode_data, diari_data)
+    banners_individuals = generar_sortides(metadades, periode_data, diari_data, args.mode)
     
     print("\n" + "="*80)
     print("✅ GENERACIÓ COMPLETADA")
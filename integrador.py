@@ -195,7 +195,28 @@ html_rotador = '''<!DOCTYPE html>
         let rotacioAturada = false;
 
         // 1. OBTENIR LLISTAT D'ESTACIONS
+        // Primer rotation_manifest.json (generat per generador_banners.py); si no hi és, banner.html
         function carregarLlistatEstacions() {
+            fetch('rotation_manifest.json?t=' + Date.now(), { cache: 'no-store' })
+                .then(resp => {
+                    if (!resp.ok) throw new Error('HTTP ' + resp.status);
+                    return resp.json();
+                })
+                .then(manifest => {
+                    if (manifest.versio !== 1 || !Array.isArray(manifest.estacions) || manifest.estacions.length === 0) {
+                        throw new Error('Manifest no vàlid');
+                    }
+                    llistaEstacions = manifest.estacions;
+                    console.log(`✅ Manifest: ${llistaEstacions.length} estacions.`);
+                    iniciarRotacio();
+                })
+                .catch(err => {
+                    console.log('⚠️ Sense manifest, llegint banner.html:', err);
+                    carregarLlistatDesDeBanner();
+                });
+        }
+
+        function carregarLlistatDesDeBanner() {
             fetch('banner.html')
                 .then(resp => resp.text())
                 .then(html => {
@@ -246,7 +267,7 @@ html_rotador = '''<!DOCTYPE html>
             if (llistaEstacions.length === 0) return;
             indexActual = (indexActual + 1) % llistaEstacions.length;
             const estacio = llistaEstacions[indexActual];
-            const urlFitxer = `index_${estacio.id}.html`;
+            const urlFitxer = estacio.url || `index_${estacio.id}.html`;
             console.log(`Carregant: ${urlFitxer} - ${estacio.nom}`)
 
             document.getElementById('visorEstacio').src = urlFitxer;
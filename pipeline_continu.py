@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+pipeline_continu.py - Scraping i renderitzat en cadena, estació per estació
+
+L'execució habitual va per fases: primer es descarreguen totes les estacions,
+després es desen els fitxers, el generador els torna a llegir (DataLoader) i
+només llavors es pinten les pàgines; la primera index_XX.html nova surt quan
+l'última estació ja s'ha descarregat. Aquí les fases es solapen:
+  - un fil fa el scraping de sempre (prioritat, limitador, pressupost, salut,
+    punt de control) i deixa cada estació acabada en una cua limitada (MIDA_CUA)
+  - el fil principal la treu, hi passa el control de qualitat i el format del
+    generador i reescriu la seva index_XX.html (minificada i precomprimida)
+  - si el renderitzat es queda enrere, la cua plena atura el scraper
+Al final es desa el lot sencer com sempre (QC, fitxers fixos, magatzem,
+latències, salut) i el generador refà la resta (banner.html, manifest, overlays).
+
+Ús:
+  python pipeline_continu.py
+  python pipeline_continu.py --mida-cua 4 --sense-generador
+  python executor_meteo.py --pipeline   (el workflow: després hi van el diari, l'agregador i el generador)
+"""
+
+import sys
+import time
+import queue
+import argparse
+import threading
+from pathlib import Path
+
+# Configuració
+BASE_DIR = Path(__file__).parent
+SCRIPTS_DIR = BASE_DIR / "src"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import scraper_periode_complet as scraper
+import generador_banners as generador
+from generador_banners import Config, DataLoader
+from executor_meteo import executar_script_simple
+from pressupost_temps import fixar_limit
+from punt_control import PuntControlFinestra, finestra_periode
+
+MIDA_CUA = 8                 # Estacions descarregades que poden esperar el renderitzat
+FINAL = object()             # Marca de final de la cua
+
+
+# --- PRODUCTOR: SCRAPING ---
+def descarregar(estacions, cua, punt_control, resultat):
+    """Fil del scraper: cada estació acabada va a la cua (bloqueja si és plena)"""
+    def en_acabar_estacio(codi, periodes, capcaleres):
+        cua.put((codi, periodes, time.perf_counter()))
+
+    try:
+        resultat['lot'] = scraper.executa_scraping_intelligent(estacions, 'tot', punt_control=punt_control,
+                                                               en_acabar_estacio=en_acabar_estacio)
+    except Exception as e:
+        resultat['error'] = e
+    finally:
+        cua.put(FINAL)
+
+
+# --- CONSUMIDOR: QC, FORMAT I RENDERITZAT ---
+def carregar_context():
+    """El que el generador llegeix una vegada: metadades, dades actuals, diari, normals i sèries"""
+    metadades = DataLoader.llegir_metadades()
+    periode_data = DataLoader.llegir_dades_periode()
+    diari_data = DataLoader.llegir_dades_diari()
+    if generador.magatzem_historic is not None:
+        DataLoader.normals = DataLoader.llegir_normals()
+        DataLoader.preparar_tendencies()
+    return metadades, periode_data, diari_data
+
+def renderitzar(codi, periodes, context, ordenades):
+    """Una estació: QC (sobre una còpia), període a mostrar i index_XX.html. Retorna la ruta o None"""
+    metadades, periode_data, diari_data = context
+    registres = [dict(r) for r in periodes]
+    try:
+        # El QC definitiu del lot el fa desar_lot: aquí només perquè la pàgina no mostri valors dolents
+        from control_qualitat import aplicar_control
+        aplicar_control(registres)
+    except Exception as e:
+        print(f"⚠️  {codi}: control de qualitat no aplicat ({e})")
+
+    seleccionat = DataLoader.seleccionar_periode(codi, registres)
+    if not seleccionat:
+        return None
+    nova = codi not in periode_data
+    periode_data[codi] = seleccionat
+    if nova or not ordenades:
+        ordenades[:] = generador.estacions_ordenades_per_nom(metadades, periode_data)
+
+    ruta = generador.escriure_banner_individual(codi, metadades, periode_data, diari_data, ordenades)
+    if Config.MINIFICAR_HTML or Config.PRECOMPRIMIR:
+        generador.optimitzar_fitxer(ruta)
+    return ruta
+
+def consumir(cua, context, inici):
+    """Renderitza cada estació que arriba. Retorna (pàgines, segons fins a la primera, espera mitjana)"""
+    ordenades = []
+    pagines = 0
+    primera = None
+    esperes = []
+    while True:
+        element = cua.get()
+        if element is FINAL:
+            break
+        codi, periodes, acabada = element
+        try:
+            ruta = renderitzar(codi, periodes, context, ordenades)
+        except Exception as e:
+            print(f"❌ {codi}: no s'ha pogut renderitzar ({e})")
+            continue
+        if ruta is None:
+            continue
+        pagines += 1
+        esperes.append(time.perf_counter() - acabada)
+        if primera is None:
+            primera = time.perf_counter() - inici
+            print(f"⚡ Primera pàgina: {ruta.name} als {primera:.1f} s")
+    return pagines, primera, sum(esperes) / len(esperes) if esperes else 0.0
+
+
+# --- EXECUCIÓ ---
+def main():
+    parser = argparse.ArgumentParser(description="Scraping i renderitzat de les pàgines estació per estació")
+    parser.add_argument('--mida-cua', type=int, default=MIDA_CUA, help="Estacions que poden esperar el renderitzat")
+    parser.add_argument('--sense-generador', action='store_true',
+                        help="No executa el generador complet al final (banner.html, manifest, overlays)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔀 PIPELINE CONTINU: SCRAPING → QC → PÀGINES")
+    print("=" * 60)
+    inici = time.perf_counter()
+    scraper.PRESSUPOST = fixar_limit()
+    scraper.carregar_models()
+    Config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    context = carregar_context()
+    if not context[0]:
+        print("❌ Sense metadades: no es poden generar les pàgines")
+        return 1
+
+    cua = queue.Queue(maxsize=max(1, args.mida_cua))
+    punt_control = PuntControlFinestra('periode', finestra_periode())
+    resultat = {}
+    productor = threading.Thread(target=descarregar, name='scraper',
+                                 args=(scraper.STATIONS, cua, punt_control, resultat))
+    productor.start()
+    pagines, primera, espera = consumir(cua, context, inici)
+    productor.join()
+
+    if 'error' in resultat:
+        print(f"❌ Error al scraper: {resultat['error']}")
+        return 1
+    print(f"\n🔀 {pagines} pàgines actualitzades en {time.perf_counter() - inici:.0f} s "
+          f"(primera als {primera or 0:.1f} s; {espera:.2f} s de mitjana entre estació i pàgina)")
+
+    dades_periode, dades_capcaleres = resultat['lot']
+    if not (dades_periode or dades_capcaleres):
+        print("\n❌ No s'han obtingut dades.")
+        return 1
+    scraper.desar_lot(dades_periode, dades_capcaleres)
+    punt_control.completar()
+
+    if not args.sense_generador:
+        executar_script_simple("generador_banners.py", ["python", str(BASE_DIR / "generador_banners.py")])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
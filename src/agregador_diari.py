@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# agregador_diari.py - Resum diari calculat a partir dels períodes semihoraris desats
+#
+# Cada període nou que entra al magatzem històric actualitza l'agregat del seu dia
+# (sumes, comptadors i extrems amb la seva hora) amb una sola sentència: cost O(1)
+# per període, sense tornar a llegir el dia. D'aquí surt resum_diari_meteocat.json
+# amb les HORA_TX/HORA_TN/HORA_VVX/HORA_GN que espera el generador. El "Resum diari"
+# de la web (scraper_resum_diari_final.py) només s'usa per conciliar: guanya quan és
+# més recent que l'últim període agregat; si és anterior, només omple les variables
+# que falten i, si al dia hi falten períodes, els extrems que l'agregat no ha vist.
+#
+# Ús:
+#   python src/agregador_diari.py                  # escriu el resum d'avui
+#   python src/agregador_diari.py --reconstrueix   # recalcula tots els agregats
+
+# --- 1. IMPORTACIONS ---
+import sys
+import re
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import STATIONS, DATA_DIR, HISTORICAL_DB
+
+import magatzem_historic
+
+# --- CONFIGURACIÓ ---
+RUTA_RESUM_DIARI = Path(DATA_DIR) / "resum_diari_meteocat.json"
+SEGONS_PER_PERIODE = 1800
+TOLERANCIA_CONCILIACIO = 0.5  # Diferència a partir de la qual s'avisa (dies tancats)
+
+# Variables que s'acumulen (suma + comptador) i extrems (amb l'hora del període)
+VARIABLES_SUMA = ['tm', 'hr', 'ppt', 'pm', 'rs']
+VARIABLES_EXTREM = [('tx', '>'), ('tn', '<'), ('vvx', '>'), ('gn', '>')]
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS agregats_diaris (
+    id_estac TEXT NOT NULL,
+    data TEXT NOT NULL,
+    n_periodes INTEGER NOT NULL,
+    darrer_instant TEXT NOT NULL,
+    {', '.join(f'suma_{v} REAL NOT NULL DEFAULT 0, n_{v} INTEGER NOT NULL DEFAULT 0' for v in VARIABLES_SUMA)},
+    {', '.join(f'{v} REAL, hora_{v} TEXT' for v, _ in VARIABLES_EXTREM)},
+    dvx REAL,                       -- direcció del vent del període de la ratxa màxima
+    PRIMARY KEY (id_estac, data)
+) WITHOUT ROWID;
+"""
+
+# Variables que durant el dia només creixen (o baixen): amb forats a l'agregat, un
+# resum web anterior encara pot tenir el valor bo (el del període que falta)
+EXTREMS_CONCILIACIO = {
+    'TEMPERATURA_MAXIMA_DIA': max,
+    'TEMPERATURA_MINIMA_DIA': min,
+    'RATXA_VENT_MAX': max,
+    'GRUIX_NEU_MAX': max,
+    'PRECIPITACIO_ACUM_DIA': max
+}
+
+# Variable del resum web → (clau d'hora que espera el generador)
+HORES_RESUM = {
+    'TEMPERATURA_MAXIMA_DIA': 'HORA_TX',
+    'TEMPERATURA_MINIMA_DIA': 'HORA_TN',
+    'GRUIX_NEU_MAX': 'HORA_GN',
+    'RATXA_VENT_MAX': 'HORA_VVX'
+}
+
+
+def _sql_acumular():
+    """INSERT ... ON CONFLICT DO UPDATE que suma un període a l'agregat del seu dia"""
+    columnes = ['id_estac', 'data', 'n_periodes', 'darrer_instant']
+    columnes += [c for v in VARIABLES_SUMA for c in (f'suma_{v}', f'n_{v}')]
+    columnes += [c for v, _ in VARIABLES_EXTREM for c in (v, f'hora_{v}')]
+    columnes += ['dvx']
+
+    actualitzacions = [
+        "n_periodes = n_periodes + 1",
+        "darrer_instant = max(darrer_instant, excluded.darrer_instant)"
+    ]
+    for v in VARIABLES_SUMA:
+        actualitzacions.append(f"suma_{v} = suma_{v} + excluded.suma_{v}")
+        actualitzacions.append(f"n_{v} = n_{v} + excluded.n_{v}")
+    for v, operador in VARIABLES_EXTREM:
+        # A SQLite, la dreta de cada SET veu els valors antics de la fila
+        millor = f"excluded.{v} IS NOT NULL AND ({v} IS NULL OR excluded.{v} {operador} {v})"
+        actualitzacions.append(f"{v} = CASE WHEN {millor} THEN excluded.{v} ELSE {v} END")
+        actualitzacions.append(f"hora_{v} = CASE WHEN {millor} THEN excluded.hora_{v} ELSE hora_{v} END")
+        if v == 'vvx':
+            actualitzacions.append(f"dvx = CASE WHEN {millor} THEN excluded.dvx ELSE dvx END")
+
+    return (f"INSERT INTO agregats_diaris ({', '.join(columnes)}) VALUES ({', '.join('?' * len(columnes))}) "
+            f"ON CONFLICT(id_estac, data) DO UPDATE SET {', '.join(actualitzacions)}")
+
+SQL_ACUMULAR = _sql_acumular()
+
+
+# --- 3. ACTUALITZACIÓ INCREMENTAL ---
+def preparar(connexio):
+    """Crea la taula d'agregats si no existeix"""
+    connexio.executescript(ESQUEMA)
+
+def acumular(connexio, id_estac, instant, valors):
+    """
+    Suma un període nou (instant 'AAAA-MM-DDTHH:MMZ', valors {columna: float|None})
+    a l'agregat del seu dia. Només s'ha de cridar una vegada per període: el
+    magatzem ho fa quan la fila és realment nova.
+    """
+    hora = instant[11:16]
+    parametres = [id_estac, instant[:10], 1, instant]
+    for v in VARIABLES_SUMA:
+        valor = valors.get(v)
+        parametres += [valor or 0, 0 if valor is None else 1]
+    for v, _ in VARIABLES_EXTREM:
+        valor = valors.get(v)
+        parametres += [valor, hora if valor is not None else None]
+    parametres.append(valors.get('dvm'))
+    connexio.execute(SQL_ACUMULAR, parametres)
+
+def reconstruir(ruta_db=HISTORICAL_DB):
+    """Torna a calcular tots els agregats a partir de les observacions i dels segments compactats"""
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        preparar(connexio)
+        total = 0
+        with connexio:
+            connexio.execute("DELETE FROM agregats_diaris")
+            for id_estac, instant, valors in magatzem_historic.totes_les_files(connexio):
+                acumular(connexio, id_estac, instant, valors)
+                total += 1
+        return total
+    finally:
+        connexio.close()
+
+
+# --- 4. RESUM DIARI (FORMAT DE resum_diari_meteocat.json) ---
+def format_numero(valor, decimals=1):
+    return f"{valor:.{decimals}f}"
+
+def resum_des_d_agregat(fila):
+    """Converteix una fila d'agregats_diaris en {variable_resum: valor} + hores"""
+    a = dict(fila)
+    resum = {}
+    if a['n_tm']:
+        resum['TEMPERATURA_MITJANA_DIA'] = f"{format_numero(a['suma_tm'] / a['n_tm'])} °C"
+    if a['tx'] is not None:
+        resum['TEMPERATURA_MAXIMA_DIA'] = f"{format_numero(a['tx'])} °C"
+        resum['HORA_TX'] = a['hora_tx']
+    if a['tn'] is not None:
+        resum['TEMPERATURA_MINIMA_DIA'] = f"{format_numero(a['tn'])} °C"
+        resum['HORA_TN'] = a['hora_tn']
+    if a['n_hr']:
+        resum['HUMITAT_MITJANA_DIA'] = f"{round(a['suma_hr'] / a['n_hr'])}%"
+    if a['n_ppt']:
+        resum['PRECIPITACIO_ACUM_DIA'] = f"{format_numero(a['suma_ppt'])} mm"
+    if a['gn'] is not None:
+        resum['GRUIX_NEU_MAX'] = f"{format_numero(a['gn'], 0)} cm"
+        resum['HORA_GN'] = a['hora_gn']
+    if a['vvx'] is not None:
+        direccio = f" - {format_numero(a['dvx'], 0)}º" if a['dvx'] is not None else ''
+        resum['RATXA_VENT_MAX'] = f"{format_numero(a['vvx'])} km/h{direccio}"
+        resum['HORA_VVX'] = a['hora_vvx']
+    if a['n_rs']:
+        # W/m² mitjans de cada mitja hora → MJ/m² del dia
+        resum['RADIACIO_GLOBAL'] = f"{format_numero(a['suma_rs'] * SEGONS_PER_PERIODE / 1e6)} MJ/m2"
+    if a['n_pm']:
+        resum['PRESSIO_ATMOSFERICA'] = f"{format_numero(a['suma_pm'] / a['n_pm'])} hPa"
+    return resum
+
+def resum_des_de_web(variables):
+    """Separa l'hora dels valors web ("20.0 °C 11:52 TU" → "20.0 °C" + HORA_TX "11:52")"""
+    resum = {}
+    for var, valor in variables.items():
+        if var in HORES_RESUM:
+            hora = re.search(r'\s*(\d{1,2}):(\d{2})\s*TU\s*$', valor)
+            if hora:
+                resum[HORES_RESUM[var]] = f"{int(hora.group(1)):02d}:{hora.group(2)}"
+                valor = valor[:hora.start()].strip()
+        resum[var] = valor
+    return resum
+
+def agregat_complet(fila):
+    """Cert si no falta cap període des de les 00:00 fins a l'últim agregat"""
+    darrer = datetime.strptime(fila['darrer_instant'], "%Y-%m-%dT%H:%MZ")
+    esperats = (darrer.hour * 60 + darrer.minute) // 30 + 1
+    return fila['n_periodes'] >= esperats
+
+def mes_extrem(var, valor_web, valor_agregat):
+    """El valor web va més enllà del de l'agregat en una variable d'EXTREMS_CONCILIACIO?"""
+    funcio = EXTREMS_CONCILIACIO.get(var)
+    w = magatzem_historic.valor_numeric(valor_web)
+    a = magatzem_historic.valor_numeric(valor_agregat)
+    return funcio is not None and w is not None and a is not None and w != a and funcio(w, a) == w
+
+def conciliar(fila, web):
+    """
+    Combina l'agregat d'una estació amb el resum web del mateix dia.
+    Retorna (resum, font) on font és 'periodes', 'web' o 'conciliat'.
+    """
+    agregat = resum_des_d_agregat(fila) if fila else {}
+    if not web:
+        return agregat, 'periodes'
+    valors_web = resum_des_de_web(json.loads(web['variables']))
+    if not agregat:
+        return valors_web, 'web'
+
+    # La web guanya si és posterior al final de l'últim període agregat. Si és anterior
+    # (p. ex. la de just passada la mitjanit) només omple el que falta: amb forats al
+    # dia, també els extrems que l'agregat s'ha perdut
+    final_agregat = datetime.strptime(fila['darrer_instant'], "%Y-%m-%dT%H:%MZ") + timedelta(seconds=SEGONS_PER_PERIODE)
+    try:
+        web_mes_recent = datetime.strptime(web['data_extraccio'], "%Y-%m-%d %H:%M:%S") >= final_agregat
+    except (TypeError, ValueError):
+        web_mes_recent = False
+    amb_forats = not agregat_complet(fila)
+
+    resum = dict(agregat)
+    for var, valor in valors_web.items():
+        if var in HORES_RESUM.values():
+            continue
+        if web_mes_recent or var not in resum or (amb_forats and mes_extrem(var, valor, resum[var])):
+            resum[var] = valor
+            if var in HORES_RESUM:
+                if HORES_RESUM[var] in valors_web:
+                    resum[HORES_RESUM[var]] = valors_web[HORES_RESUM[var]]
+                else:
+                    resum.pop(HORES_RESUM[var], None)
+    return resum, 'conciliat' if resum != agregat else 'periodes'
+
+def avisar_discrepancies(id_estac, fila, web):
+    """En un dia tancat i complet, avisa si l'agregat i la web no coincideixen"""
+    if not fila or not web or fila['n_periodes'] < 48:
+        return
+    agregat = resum_des_d_agregat(fila)
+    valors_web = resum_des_de_web(json.loads(web['variables']))
+    for var in ('TEMPERATURA_MAXIMA_DIA', 'TEMPERATURA_MINIMA_DIA', 'PRECIPITACIO_ACUM_DIA'):
+        a = magatzem_historic.valor_numeric(agregat.get(var))
+        w = magatzem_historic.valor_numeric(valors_web.get(var))
+        if a is not None and w is not None and abs(a - w) > TOLERANCIA_CONCILIACIO:
+            print(f"   ⚠️  {id_estac} {fila['data']} {var}: períodes {a} ≠ web {w}")
+
+def resums_del_dia(dia, ruta_db=HISTORICAL_DB):
+    """Llista de registres (format de resum_diari_meteocat.json) d'un dia 'AAAA-MM-DD'"""
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        preparar(connexio)
+        connexio.row_factory = sqlite3.Row
+        agregats = {f['id_estac']: f for f in connexio.execute(
+            "SELECT * FROM agregats_diaris WHERE data = ?", (dia,))}
+        webs = {f['id_estac']: f for f in connexio.execute(
+            "SELECT * FROM resums_diaris WHERE data = ?", (dia,))}
+    finally:
+        connexio.close()
+
+    ara = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    registres = []
+    fonts = {'periodes': 0, 'web': 0, 'conciliat': 0}
+    for estacio in STATIONS:
+        codi = estacio['code']
+        fila, web = agregats.get(codi), webs.get(codi)
+        if not fila and not web:
+            continue
+        avisar_discrepancies(codi, fila, web)
+        resum, font = conciliar(fila, web)
+        if not resum:
+            continue
+        fonts[font] += 1
+        registres.append({
+            **resum,
+            'ID_ESTAC': codi,
+            'NOM_ESTACIO': estacio.get('display_name', estacio.get('name', codi)),
+            'NOM_ORIGINAL': estacio.get('name', ''),
+            'DATA_DIA': dia,
+            'DATA_EXTRACCIO': ara,
+            'FONT_RESUM': font,
+            'PERIODES_AGREGATS': fila['n_periodes'] if fila else 0
+        })
+    return registres, fonts
+
+def escriure_resum_diari(dia=None, ruta_db=HISTORICAL_DB, ruta_json=RUTA_RESUM_DIARI):
+    """Escriu resum_diari_meteocat.json (mateixa estructura que el scraper diari)"""
+    dia = dia or datetime.utcnow().strftime("%Y-%m-%d")
+    registres, fonts = resums_del_dia(dia, ruta_db)
+    dades_json = {
+        'metadata': {
+            'data_consulta': dia,
+            'data_extractcio': datetime.now().isoformat(),
+            'total_estacions': len(registres),
+            'font': 'agregador_diari',
+            'fonts': fonts
+        },
+        'estacions': registres
+    }
+    with open(ruta_json, 'w', encoding='utf-8') as f:
+        json.dump(dades_json, f, ensure_ascii=False, indent=2)
+    return registres, fonts
+
+def resum_web_fet_avui(minim_estacions=None, ruta_db=HISTORICAL_DB):
+    """
+    Cert si avui ja s'ha desat el resum diari de la web (per no tornar-lo a rascar)
+    d'almenys minim_estacions estacions (per defecte, la majoria de STATIONS): un
+    scraper diari que només n'ha tret unes quantes s'ha de tornar a executar.
+    """
+    if not Path(ruta_db).exists():
+        return False
+    if minim_estacions is None:
+        minim_estacions = len(STATIONS) // 2 + 1
+    avui = datetime.utcnow().strftime("%Y-%m-%d")
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        n = connexio.execute("SELECT COUNT(*) FROM resums_diaris WHERE data = ?", (avui,)).fetchone()[0]
+        return n >= minim_estacions
+    finally:
+        connexio.close()
+
+
+# --- EXECUCIÓ PRINCIPAL ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resum diari a partir dels períodes desats")
+    parser.add_argument('--dia', default=None, help="Dia a resumir (AAAA-MM-DD, per defecte avui UTC)")
+    parser.add_argument('--reconstrueix', action='store_true', help="Recalcula tots els agregats des de zero")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("🧮 AGREGADOR DIARI - Resum a partir dels períodes")
+    print("=" * 70)
+
+    if args.reconstrueix:
+        total = reconstruir()
+        print(f"🔁 Agregats reconstruïts a partir de {total} períodes")
+
+    registres, fonts = escriure_resum_diari(args.dia)
+    print(f"📋 {RUTA_RESUM_DIARI}: {len(registres)} estacions")
+    print(f"   • Només períodes: {fonts['periodes']} | Conciliades amb la web: {fonts['conciliat']} | "
+          f"Només web: {fonts['web']}")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# control_qualitat.py - Control de qualitat vectoritzat dels registres de període
+#
+# S'aplica a tot el lot del scraper de períodes (totes les estacions, avui i ahir)
+# abans d'escriure res: els valors passen a una matriu numpy (registre × variable)
+# i es fan tres proves en bloc:
+#   - rang: límits físics per variable (80 °C o una ratxa de 300 km/h no passen)
+#   - salt/pic: canvi massa gran respecte del període anterior de la mateixa
+#     estació, o un valor que se separa dels dos veïns en el mateix sentit
+#     (el context són els períodes del lot i els darrers del magatzem)
+#   - coherència: TN ≤ TM ≤ TX i vent mitjà ≤ ratxa
+# Els valors que fallen rang o salt/pic se suprimeixen (queden buits, com un
+# '(s/d)' de la web); els de coherència només es marquen. Cada registre afectat
+# porta QC_FLAGS amb 'VARIABLE=valor original:prova'.
+
+# --- 1. IMPORTACIONS ---
+import sys
+import time
+from pathlib import Path
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import HISTORICAL_DB
+
+from magatzem_historic import COLUMNES_NUMERIQUES
+
+# --- CONFIGURACIÓ ---
+SUPRIMIR = True  # False: només es marquen (QC_FLAGS) i es deixen els valors
+
+LIMITS_RANG = {
+    'tm': (-40, 50), 'tx': (-40, 50), 'tn': (-40, 50),
+    'hr': (0, 100),
+    'ppt': (0, 150),        # mm en mitja hora
+    'vvm': (0, 200), 'vvx': (0, 250),
+    'dvm': (0, 360),
+    'pm': (500, 1100),      # hPa a l'altitud de l'estació
+    'rs': (0, 1400),
+    'gn': (0, 800)
+}
+# Canvi màxim entre dos períodes consecutius (30 min) i desviació màxima d'un pic
+LIMITS_SALT = {'tm': 8, 'tx': 8, 'tn': 8, 'hr': 45, 'pm': 6}
+LIMITS_PIC = {'tm': 5, 'tx': 5, 'tn': 5, 'hr': 30, 'pm': 3}
+TOLERANCIA_COHERENCIA = 0.2
+HORES_CONTEXT = 3  # Períodes anteriors del magatzem per a la prova de salt
+
+
+# --- 3. MATRIU DEL LOT ---
+def matriu_valors(df):
+    """(valors float n×k amb NaN, columna VAR_ d'origen de cada variable i registre)"""
+    valors = np.full((len(df), len(COLUMNES_NUMERIQUES)), np.nan)
+    origen = np.full(valors.shape, None, dtype=object)
+    for j, variables_web in enumerate(COLUMNES_NUMERIQUES.values()):
+        for var in variables_web:
+            if var not in df.columns:
+                continue
+            text = df[var].astype('string').str.replace(',', '.', regex=False)
+            numeros = pd.to_numeric(text.str.extract(r'(-?\d+(?:\.\d+)?)', expand=False), errors='coerce').to_numpy(dtype=float)
+            buits = np.isnan(valors[:, j]) & ~np.isnan(numeros)
+            valors[buits, j] = numeros[buits]
+            origen[buits, j] = var
+    return valors, origen
+
+def instants_del_lot(df):
+    """Inici UTC de cada període, sense zona (NaT si no es pot calcular)"""
+    hora = df.get('PERIODE_UTC', pd.Series('', index=df.index)).astype('string').str.extract(r'(\d{1,2}):(\d{2})')
+    text = df.get('DATA_UTC', pd.Series('', index=df.index)).astype('string') + ' ' + hora[0].str.zfill(2) + ':' + hora[1]
+    return pd.to_datetime(text, format='%Y-%m-%d %H:%M', errors='coerce')
+
+def context_magatzem(estacions, desde, fins, ruta_db=HISTORICAL_DB):
+    """Períodes desats de les estacions del lot entre desde i fins (DataFrame id_estac, instant, columnes)"""
+    if not Path(ruta_db).exists() or not estacions:
+        return None
+    import magatzem_historic
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        context = pd.read_sql_query(
+            f"SELECT id_estac, instant, {', '.join(COLUMNES_NUMERIQUES)} FROM observacions "
+            f"WHERE instant >= ? AND instant <= ? AND id_estac IN ({', '.join('?' * len(estacions))})",
+            connexio, params=[desde.strftime('%Y-%m-%dT%H:%MZ'), fins.strftime('%Y-%m-%dT%H:%MZ'), *estacions])
+    finally:
+        connexio.close()
+    context['instant'] = pd.to_datetime(context['instant'], format='%Y-%m-%dT%H:%MZ')
+    return context
+
+
+# --- 4. PROVES ---
+def proves(estacions, instants, valors, es_lot):
+    """
+    Totes les proves sobre la matriu (files ordenades per estació i instant).
+    Retorna {nom_prova: màscara booleana n×k} només per a les files del lot.
+    """
+    columnes = list(COLUMNES_NUMERIQUES)
+    minim = np.array([LIMITS_RANG[c][0] for c in columnes])
+    maxim = np.array([LIMITS_RANG[c][1] for c in columnes])
+    with np.errstate(invalid='ignore'):
+        rang = (valors < minim) | (valors > maxim)
+
+    # Veí anterior i següent de la mateixa estació, a 30 min exactes
+    minuts = instants.astype('datetime64[m]').astype(np.int64)
+    mateixa_anterior = np.r_[False, (estacions[1:] == estacions[:-1]) & (np.diff(minuts) == 30)]
+    mateixa_seguent = np.r_[mateixa_anterior[1:], False]
+    # Un valor fora de rang no serveix de referència per als veïns
+    nets = np.where(rang, np.nan, valors)
+    anterior = np.where(mateixa_anterior[:, None], np.roll(nets, 1, axis=0), np.nan)
+    seguent = np.where(mateixa_seguent[:, None], np.roll(nets, -1, axis=0), np.nan)
+
+    salt = np.zeros_like(rang)
+    pic = np.zeros_like(rang)
+    for c, limit in LIMITS_SALT.items():
+        j = columnes.index(c)
+        with np.errstate(invalid='ignore'):
+            salt[:, j] = np.abs(nets[:, j] - anterior[:, j]) > limit
+            desviacio = np.abs(nets[:, j] - (anterior[:, j] + seguent[:, j]) / 2) - np.abs(seguent[:, j] - anterior[:, j]) / 2
+            pic[:, j] = desviacio > LIMITS_PIC[c]
+    # Un salt seguit del retorn al valor d'abans és un pic: es marca el del mig, no el següent
+    salt &= ~np.roll(pic, 1, axis=0) | ~mateixa_anterior[:, None]
+
+    # La coherència es mira amb els valors que sobreviuen a les proves anteriors
+    coherencia = np.zeros_like(rang)
+    restants = np.where(salt | pic, np.nan, nets)
+    tm, tx, tn, vvm, vvx = (restants[:, columnes.index(c)] for c in ('tm', 'tx', 'tn', 'vvm', 'vvx'))
+    with np.errstate(invalid='ignore'):
+        temperatura = (tn > tm + TOLERANCIA_COHERENCIA) | (tm > tx + TOLERANCIA_COHERENCIA) | (tn > tx + TOLERANCIA_COHERENCIA)
+        vent = vvm > vvx + TOLERANCIA_COHERENCIA
+    for c in ('tm', 'tx', 'tn'):
+        coherencia[:, columnes.index(c)] = temperatura
+    for c in ('vvm', 'vvx'):
+        coherencia[:, columnes.index(c)] = vent
+
+    return {nom: mascara[es_lot] for nom, mascara in
+            (('rang', rang), ('salt', salt | pic), ('coherencia', coherencia))}
+
+
+# --- 5. APLICACIÓ AL LOT ---
+def aplicar_control(registres, ruta_db=HISTORICAL_DB, suprimir=SUPRIMIR):
+    """
+    Revisa els registres OK del lot (modificant-los): suprimeix o marca els valors
+    sospitosos i hi afegeix QC_FLAGS. Retorna un resum amb els comptadors i el temps.
+    """
+    inici = time.perf_counter()
+    resum = {'registres': 0, 'rang': 0, 'salt': 0, 'coherencia': 0, 'suprimits': 0, 'ms': 0.0}
+    revisables = [r for r in registres if r.get('ESTAT') == 'OK' and r.get('ID_ESTAC')]
+    if not revisables:
+        return resum
+
+    df = pd.DataFrame(revisables)
+    valors, origen = matriu_valors(df)
+    instants = instants_del_lot(df)
+    valids = instants.notna().to_numpy()
+    estacions = df['ID_ESTAC'].astype(str).to_numpy(dtype=str)
+
+    # Context: períodes anteriors ja desats (sense repetir els que també són al lot)
+    lot = pd.DataFrame({'id_estac': estacions[valids], 'instant': instants[valids].to_numpy(),
+                        'posicio': np.flatnonzero(valids)})
+    context = None
+    if len(lot):
+        context = context_magatzem(sorted(set(lot['id_estac'])), instants[valids].min() - timedelta(hours=HORES_CONTEXT),
+                                   instants[valids].max() + timedelta(minutes=30), ruta_db)
+    matriu_context = np.empty((0, valors.shape[1]))
+    if context is not None and len(context):
+        context = context.merge(lot[['id_estac', 'instant']], how='left', indicator=True)
+        context = context[context['_merge'] == 'left_only']
+        matriu_context = context[list(COLUMNES_NUMERIQUES)].to_numpy(dtype=float)
+        lot = pd.concat([lot, context[['id_estac', 'instant']].assign(posicio=-1)], ignore_index=True)
+
+    # Tot el lot i el context en una sola matriu ordenada per estació i temps
+    totes = np.vstack([valors[valids], matriu_context])
+    ordre = np.lexsort((lot['instant'].to_numpy(), lot['id_estac'].to_numpy(dtype=str)))
+    es_lot = lot['posicio'].to_numpy()[ordre] >= 0
+    resultats = proves(lot['id_estac'].to_numpy(dtype=str)[ordre], lot['instant'].to_numpy()[ordre], totes[ordre], es_lot)
+    posicions = lot['posicio'].to_numpy()[ordre][es_lot]
+
+    # Només els registres amb alguna marca tornen a Python
+    marcats = np.zeros((len(df), valors.shape[1]), dtype=object)
+    columnes = list(COLUMNES_NUMERIQUES)
+    for prova, mascara in resultats.items():
+        resum[prova] = int(mascara.sum())
+        for fila, j in zip(*np.nonzero(mascara)):
+            i = posicions[fila]
+            marcats[i, j] = marcats[i, j] or prova
+
+    for i, j in zip(*np.nonzero(marcats)):
+        registre, var, prova = revisables[i], origen[i, j], marcats[i, j]
+        registre['QC_FLAGS'] = ';'.join(filter(None, [registre.get('QC_FLAGS'), f"{var}={registre.get(var)}:{prova}"]))
+        if suprimir and prova in ('rang', 'salt'):
+            # Totes les variants (10/6/2 m) de la mateixa variable
+            for variant in COLUMNES_NUMERIQUES[columnes[j]]:
+                if registre.get(variant) not in (None, ''):
+                    registre[variant] = ''
+            resum['suprimits'] += 1
+
+    resum['registres'] = len(revisables)
+    resum['ms'] = (time.perf_counter() - inici) * 1000
+    return resum
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# exportador_historic.py - Exportació del magatzem històric per a anàlisi (Arrow / Parquet)
+#
+# Retorna trossos estació × rang de temps de tot el magatzem (files recents del
+# SQLite + segments compactats) com a DataFrame, taula Arrow o fitxer Parquet /
+# Arrow IPC. Els segments es descodifiquen directament a arrays numpy
+# columnars (sense crear cap fila Python) i el SQLite es llegeix amb una sola
+# consulta per a totes les estacions.
+#
+# Els segments són diferències comprimides (segments_historic.py): s'han de
+# descodificar, així que no es poden mapar a memòria tal com són. El que sí es
+# pot mapar és l'exportació: el fitxer Arrow IPC s'escriu sense comprimir i
+# obrir_arrow() el llegeix amb memory_map, sense copiar les columnes.
+#
+# pyarrow és opcional (requirements-analisi.txt): sense, només hi ha DataFrame i CSV.
+#
+# Ús:
+#   python src/exportador_historic.py --desde 2026-01-01 --fins 2026-12-31 --sortida any.parquet
+#   python src/exportador_historic.py --estacions YT,Z1 --columnes tm,ppt --sortida yt.arrow
+
+# --- 1. IMPORTACIONS ---
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None  # Opcional: sense pyarrow només DataFrame/CSV
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import HISTORICAL_DB
+
+import magatzem_historic
+import segments_historic
+
+FORMATS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.csv': 'csv'}
+
+
+# --- 3. CONSULTA ---
+def estacions_disponibles(ruta_db=HISTORICAL_DB):
+    """Codis amb files al SQLite o amb segments"""
+    estacions = set()
+    if Path(ruta_db).exists():
+        connexio = magatzem_historic.obrir(ruta_db)
+        try:
+            estacions = {f[0] for f in connexio.execute("SELECT DISTINCT id_estac FROM observacions")}
+        finally:
+            connexio.close()
+    if segments_historic.DIRECTORI_SEGMENTS.exists():
+        estacions |= {p.name for p in segments_historic.DIRECTORI_SEGMENTS.iterdir() if p.is_dir()}
+    return sorted(estacions)
+
+def consultar(estacions=None, desde=None, fins=None, columnes=None, ruta_db=HISTORICAL_DB):
+    """
+    DataFrame (id_estac, instant UTC, data_extraccio, columnes...) ordenat per
+    estació i instant. 'desde' i 'fins' són dates o instants 'AAAA-MM-DDTHH:MMZ'
+    inclosos; sense estacions ni columnes, totes.
+    """
+    columnes = [c for c in (columnes or magatzem_historic.COLUMNES_NUMERIQUES) if c in magatzem_historic.COLUMNES_NUMERIQUES]
+    estacions = list(estacions or estacions_disponibles(ruta_db))
+    if fins and len(fins) == 10:
+        fins += 'T23:59Z'
+    noms = ['id_estac', 'instant', 'data_extraccio', *columnes]
+
+    # Files recents: una consulta per a totes les estacions
+    recents = pd.DataFrame(columns=noms)
+    if Path(ruta_db).exists() and estacions:
+        condicions = [f"id_estac IN ({', '.join('?' * len(estacions))})"]
+        parametres = list(estacions)
+        if desde:
+            condicions.append("instant >= ?")
+            parametres.append(desde)
+        if fins:
+            condicions.append("instant <= ?")
+            parametres.append(fins)
+        connexio = magatzem_historic.obrir(ruta_db)
+        try:
+            recents = pd.read_sql_query(
+                f"SELECT {', '.join(noms)} FROM observacions WHERE {' AND '.join(condicions)}",
+                connexio, params=parametres)
+        finally:
+            connexio.close()
+        recents['instant'] = pd.to_datetime(recents['instant'], format="%Y-%m-%dT%H:%MZ", utc=True)
+
+    # Files compactades: arrays dels segments, sense passar per files Python
+    trossos = []
+    for id_estac in estacions:
+        arrays = segments_historic.llegir_columnes_rang(id_estac, desde, fins)
+        if arrays is None or not len(arrays['instant']):
+            continue
+        tros = {'id_estac': np.full(len(arrays['instant']), id_estac, dtype=object),
+                'instant': pd.to_datetime(arrays['instant'], utc=True)}
+        tros.update({c: arrays[c] for c in ['data_extraccio', *columnes]})
+        trossos.append(pd.DataFrame(tros))
+
+    df = pd.concat([*trossos, recents], ignore_index=True) if trossos else recents
+    # Si una compactació es va interrompre, la mateixa fila pot ser als dos llocs
+    df = df.drop_duplicates(subset=['id_estac', 'instant'], keep='last')
+    return df.sort_values(['id_estac', 'instant'], kind='stable').reset_index(drop=True)
+
+def taula_arrow(estacions=None, desde=None, fins=None, columnes=None, ruta_db=HISTORICAL_DB):
+    """Com consultar(), però com a pyarrow.Table (instants en UTC, buits com a nuls)"""
+    if pa is None:
+        raise RuntimeError("Cal pyarrow per a taules Arrow (pip install -r requirements-analisi.txt)")
+    return pa.Table.from_pandas(consultar(estacions, desde, fins, columnes, ruta_db), preserve_index=False)
+
+
+# --- 4. EXPORTACIÓ ---
+def exportar(ruta_sortida, estacions=None, desde=None, fins=None, columnes=None, ruta_db=HISTORICAL_DB):
+    """Escriu l'exportació en el format que indica l'extensió. Retorna el nombre de files"""
+    ruta_sortida = Path(ruta_sortida)
+    format_sortida = FORMATS.get(ruta_sortida.suffix.lower())
+    if format_sortida is None:
+        raise ValueError(f"Extensió no suportada: {ruta_sortida.suffix} (usa {', '.join(FORMATS)})")
+    if format_sortida != 'csv' and pa is None:
+        raise RuntimeError(f"Cal pyarrow per exportar a {format_sortida} (pip install -r requirements-analisi.txt); "
+                           "el CSV no en necessita")
+
+    ruta_sortida.parent.mkdir(parents=True, exist_ok=True)
+    if format_sortida == 'csv':
+        df = consultar(estacions, desde, fins, columnes, ruta_db)
+        df.to_csv(ruta_sortida, index=False)
+        return len(df)
+
+    taula = taula_arrow(estacions, desde, fins, columnes, ruta_db)
+    if format_sortida == 'parquet':
+        pq.write_table(taula, ruta_sortida, compression='zstd')
+    else:
+        # Sense comprimir: obrir_arrow() el pot mapar a memòria sense còpies
+        feather.write_feather(taula, ruta_sortida, compression='uncompressed')
+    return taula.num_rows
+
+def obrir_arrow(ruta):
+    """pyarrow.Table d'una exportació .arrow mapada a memòria (les columnes no es copien)"""
+    if pa is None:
+        raise RuntimeError("Cal pyarrow per llegir fitxers Arrow (pip install -r requirements-analisi.txt)")
+    with pa.memory_map(str(ruta), 'r') as font:
+        return pa.ipc.open_file(font).read_all()
+
+
+# --- EXECUCIÓ DIRECTA ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportació del magatzem històric (Parquet, Arrow o CSV)")
+    parser.add_argument('--sortida', required=True, help="Fitxer de sortida (.parquet, .arrow/.feather o .csv)")
+    parser.add_argument('--estacions', default='', help="Codis separats per comes (per defecte totes)")
+    parser.add_argument('--desde', help="Primer dia o instant inclòs")
+    parser.add_argument('--fins', help="Últim dia o instant inclòs")
+    parser.add_argument('--columnes', default='', help=f"Subconjunt de {','.join(magatzem_historic.COLUMNES_NUMERIQUES)}")
+    args = parser.parse_args()
+
+    inici = time.perf_counter()
+    try:
+        files = exportar(args.sortida,
+                         [c.strip() for c in args.estacions.split(',') if c.strip()] or None,
+                         args.desde, args.fins,
+                         [c.strip() for c in args.columnes.split(',') if c.strip()] or None)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"📤 {files} files → {args.sortida} ({Path(args.sortida).stat().st_size / 1024:.1f} KB) "
+          f"en {time.perf_counter() - inici:.2f} s")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# fusiona_shards.py - Repartiment de les estacions en shards i fusió dels resultats
+#
+# Els scrapers accepten --shard i/N: cada procés (o job d'una matriu de CI) només
+# fa les estacions que li toquen i desa el seu tros a data/shards/ en lloc dels
+# fitxers resum_*_meteocat. El repartiment és determinista i equilibrat: els codis
+# ordenats alfabèticament es reparteixen per torns, de manera que tots els
+# processos reben el mateix (±1) i no depèn de l'ordre de STATIONS.
+#
+# La fusió torna a ordenar els registres segons STATIONS (el mateix ordre que una
+# execució sense shards) i fa el desat habitual: control de qualitat, fitxers
+# fixos, magatzem històric i latències. Si falta algun shard, la fusió s'atura
+# sense tocar els fitxers resum_* (les estacions que falten hi desapareixerien),
+# tret que es passi --permet-parcial.
+#
+# Ús:
+#   python src/scraper_periode_complet.py --shard 2/4
+#   python src/fusiona_shards.py periode
+#   python src/fusiona_shards.py tot --esborra
+#   python src/fusiona_shards.py diari --permet-parcial
+
+# --- 1. IMPORTACIONS ---
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import STATIONS, DATA_DIR
+
+# --- CONFIGURACIÓ ---
+DIRECTORI_SHARDS = Path(DATA_DIR) / 'shards'
+EDAT_MAXIMA = timedelta(hours=3)  # Trossos més antics són d'una execució anterior
+TIPUS = ['periode', 'diari']
+
+
+class ShardsIncomplets(Exception):
+    """Falten trossos de l'execució i no s'ha permès una fusió parcial"""
+
+
+# --- 3. REPARTIMENT ---
+def llegir_shard(text):
+    """'2/4' → (2, 4). Els shards es numeren de 1 a N"""
+    try:
+        index, total = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Format de shard no vàlid: '{text}' (cal i/N, p. ex. 2/4)")
+    if total < 1 or not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"Shard fora de rang: {index}/{total}")
+    return index, total
+
+def estacions_del_shard(estacions, shard=None):
+    """Estacions que toquen al shard (totes si no n'hi ha), en l'ordre original"""
+    if shard is None:
+        return estacions
+    index, total = shard
+    codis = sorted({e.get('code', '') for e in estacions})
+    del_shard = set(codis[index - 1::total])
+    return [e for e in estacions if e.get('code', '') in del_shard]
+
+
+# --- 4. TROSSOS ---
+def ruta_shard(tipus, shard):
+    index, total = shard
+    return DIRECTORI_SHARDS / f"{tipus}_{index}de{total}.json"
+
+def desar_shard(tipus, shard, contingut):
+    """Desa el tros d'un shard (contingut: diccionari serialitzable)"""
+    DIRECTORI_SHARDS.mkdir(parents=True, exist_ok=True)
+    ruta = ruta_shard(tipus, shard)
+    dades = {'shard': list(shard), 'generat': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'), **contingut}
+    temporal = ruta.with_suffix('.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(dades, f, ensure_ascii=False, default=str)
+    temporal.replace(ruta)
+    return ruta
+
+def netejar(tipus):
+    """Esborra els trossos d'un tipus (abans d'una execució nova)"""
+    for ruta in DIRECTORI_SHARDS.glob(f"{tipus}_*de*.json"):
+        ruta.unlink(missing_ok=True)
+
+def llegir_trossos(tipus):
+    """
+    Trossos vigents d'un tipus: els de l'execució més recent (mateix N) i no més
+    antics que EDAT_MAXIMA. Retorna (trossos ordenats per índex, shards que falten).
+    """
+    trossos = []
+    for ruta in DIRECTORI_SHARDS.glob(f"{tipus}_*de*.json"):
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                dades = json.load(f)
+            dades['_generat'] = datetime.strptime(dades['generat'], '%Y-%m-%dT%H:%M:%SZ')
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Tros il·legible {ruta.name}: {e}")
+            continue
+        dades['_ruta'] = ruta
+        trossos.append(dades)
+    if not trossos:
+        return [], []
+
+    total = max(trossos, key=lambda t: t['_generat'])['shard'][1]
+    limit = datetime.utcnow() - EDAT_MAXIMA
+    vigents = sorted((t for t in trossos if t['shard'][1] == total and t['_generat'] >= limit),
+                     key=lambda t: t['shard'][0])
+    falten = sorted(set(range(1, total + 1)) - {t['shard'][0] for t in vigents})
+    return vigents, falten
+
+def ordenar_per_estacio(registres):
+    """Ordre de STATIONS (estable: dins de cada estació es manté l'ordre del tros)"""
+    posicio = {e.get('code'): i for i, e in enumerate(STATIONS)}
+    return sorted(registres, key=lambda r: posicio.get(r.get('ID_ESTAC'), len(posicio)))
+
+
+# --- 5. FUSIÓ ---
+def fusionar_periode(trossos):
+    """Fitxers resum_periode_meteocat, QC, magatzem, latències i salut de tots els trossos"""
+    import scraper_periode_complet as scraper
+
+    dades_periode = ordenar_per_estacio([r for t in trossos for r in t.get('dades_periode', [])])
+    capcaleres = ordenar_per_estacio([r for t in trossos for r in t.get('estudi_capcaleres', [])])
+    scraper.PERIODES_NOMES_MAGATZEM.extend(
+        ordenar_per_estacio([r for t in trossos for r in t.get('periodes_nomes_magatzem', [])]))
+    for codi, demanat, registre, moment in (c for t in trossos for c in t.get('consultes_latencia', [])):
+        scraper.CONSULTES_LATENCIA.append((codi, datetime.fromisoformat(demanat), registre, datetime.fromisoformat(moment)))
+    for tros in trossos:
+        scraper.RESULTATS_SALUT.update(tros.get('resultats_salut', {}))
+
+    scraper.desar_lot(dades_periode, capcaleres)
+    return len(dades_periode)
+
+def fusionar_diari(trossos):
+    """Fitxers resum_diari_meteocat i resums diaris del magatzem"""
+    import scraper_resum_diari_final as scraper
+
+    dies = {t.get('dia') for t in trossos}
+    if len(dies) > 1:
+        print(f"⚠️  Trossos de dies diferents ({', '.join(sorted(map(str, dies)))}): es fa servir el més recent")
+    dia = max(dies, key=str)
+    dades = ordenar_per_estacio([r for t in trossos if t.get('dia') == dia for r in t.get('estacions', [])])
+    if not dades:
+        return 0
+
+    scraper.guarda_tots_formats(dades, dia)
+    try:
+        from magatzem_historic import afegir_resums_diaris
+        print(f"🗄️  Magatzem històric: {afegir_resums_diaris(dades)} resums diaris desats")
+    except Exception as e:
+        print(f"⚠️  No s'ha pogut actualitzar el magatzem històric: {e}")
+    return len(dades)
+
+FUSIONS = {'periode': fusionar_periode, 'diari': fusionar_diari}
+
+def fusionar(tipus, esborrar=False, permet_parcial=False):
+    """
+    Fusiona els trossos vigents d'un tipus. Retorna el nombre de registres (None si
+    no n'hi ha). Si en falta algun i no es permet la fusió parcial, ShardsIncomplets
+    i els trossos es conserven.
+    """
+    trossos, falten = llegir_trossos(tipus)
+    if not trossos:
+        print(f"ℹ️  Cap tros de '{tipus}' a {DIRECTORI_SHARDS}")
+        return None
+    total = trossos[0]['shard'][1]
+    print(f"🧩 {tipus}: {len(trossos)}/{total} shards")
+    if falten:
+        if not permet_parcial:
+            raise ShardsIncomplets(f"Falten els shards {', '.join(map(str, falten))} de '{tipus}': no es reescriuen "
+                                   f"els fitxers (--permet-parcial per fusionar-los sense les seves estacions)")
+        print(f"⚠️  Falten els shards {', '.join(map(str, falten))}: les seves estacions no sortiran als fitxers")
+
+    registres = FUSIONS[tipus](trossos)
+    if esborrar:
+        for tros in trossos:
+            tros['_ruta'].unlink(missing_ok=True)
+    return registres
+
+
+# --- EXECUCIÓ DIRECTA ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fusió dels trossos dels scrapers executats amb --shard i/N")
+    parser.add_argument('tipus', choices=[*TIPUS, 'tot'])
+    parser.add_argument('--esborra', action='store_true', help="Esborra els trossos un cop fusionats")
+    parser.add_argument('--permet-parcial', action='store_true',
+                        help="Fusiona encara que faltin shards (les seves estacions no surten als fitxers)")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("🧩 FUSIÓ DE SHARDS")
+    print("=" * 80)
+
+    try:
+        resultats = {tipus: fusionar(tipus, args.esborra, args.permet_parcial)
+                     for tipus in (TIPUS if args.tipus == 'tot' else [args.tipus])}
+    except ShardsIncomplets as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if all(r is None for r in resultats.values()):
+        sys.exit(1)
+    print("✅ " + ' | '.join(f"{tipus}: {r} registres" for tipus, r in resultats.items() if r is not None))
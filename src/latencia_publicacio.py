@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# latencia_publicacio.py - Retard de publicació après per a cada estació
+#
+# Cada consulta d'una pàgina de període diu alguna cosa del retard amb què
+# l'estació publica (minuts des del final del període), però només del període
+# demanat: si no hi és, el retard és més gran que el temps transcorregut; si hi
+# és, és com a molt aquest temps. Aquests límits es desen per (estació, període)
+# a la taula latencies_publicacio del magatzem.
+#
+# Un límit superior sol no val com a mesura: només diu quan s'ha demanat, i
+# demanar segons el mateix model faria pujar el retard previst a cada execució.
+# El model només fa servir els períodes acotats (una consulta sense el període i
+# una de posterior amb el període, a menys d'AMPLADA_MAXIMA minuts) i en pren un
+# quantil baix dels límits superiors. Perquè el model també pugui baixar, un de
+# cada CICLES_EXPLORACIO períodes el dimoni demana el període de cada estació des
+# del primer minut (primer_intent).
+#
+# El scraper el fa servir per triar quin període demanar primer i el dimoni per
+# decidir quan demanar-lo a cada estació.
+#
+# Ús:
+#   python src/latencia_publicacio.py
+#   python src/latencia_publicacio.py --estacio YT
+
+# --- 1. IMPORTACIONS ---
+import sys
+import zlib
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import HISTORICAL_DB
+
+import magatzem_historic
+
+# --- CONFIGURACIÓ ---
+MINUTS_PERIODE = 30
+RETARD_MINIM = 1             # Minuts: cap estació publica abans del final del període
+RETARD_MAXIM = 90            # Més enllà, l'estació està aturada, no endarrerida
+AMPLADA_MAXIMA = 10          # Minuts entre els dos límits perquè un període compti
+QUANTIL_RETARD = 0.25        # Retard previst: quantil baix dels límits superiors
+MIN_MOSTRES = 6              # Períodes acotats per fiar-se del model
+CICLES_EXPLORACIO = 8        # Un de cada tants períodes es demana des de RETARD_MINIM
+DIES_MODEL = 14
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS latencies_publicacio (
+    id_estac TEXT NOT NULL,
+    periode TEXT NOT NULL,          -- inici del període 'AAAA-MM-DDTHH:MMZ'
+    min_retard REAL,                -- minuts després del final: encara no era publicat
+    max_retard REAL,                -- minuts després del final: ja era publicat
+    PRIMARY KEY (id_estac, periode)
+) WITHOUT ROWID;
+"""
+
+# Cada límit només s'estreny: l'inferior puja i el superior baixa
+SQL_REGISTRAR = """
+INSERT INTO latencies_publicacio (id_estac, periode, min_retard, max_retard) VALUES (?, ?, ?, ?)
+ON CONFLICT(id_estac, periode) DO UPDATE SET
+    min_retard = coalesce(max(min_retard, excluded.min_retard), min_retard, excluded.min_retard),
+    max_retard = coalesce(min(max_retard, excluded.max_retard), max_retard, excluded.max_retard)
+"""
+
+
+# --- 3. OBSERVACIONS ---
+def minuts_des_del_final(periode, moment):
+    return round((moment - periode).total_seconds() / 60 - MINUTS_PERIODE, 1)
+
+def limits_de_consultes(consultes):
+    """
+    consultes: [(id_estac, període demanat, registre més recent de la pàgina o None,
+    moment UTC)]. Retorna files (id_estac, periode, min_retard, max_retard), sempre
+    del període demanat: els anteriors que surten a la pàgina no diuen quan es van
+    publicar. Una pàgina buida (error o sense taula) no diu res.
+    """
+    files = []
+    for id_estac, demanat, registre, moment in consultes:
+        instant = magatzem_historic.instant_del_periode(registre) if registre else None
+        if not instant:
+            continue
+        trobat = datetime.strptime(instant, '%Y-%m-%dT%H:%MZ')
+        retard = minuts_des_del_final(demanat, moment)
+        if trobat < demanat:
+            files.append((id_estac, demanat.strftime('%Y-%m-%dT%H:%MZ'), retard, None))
+        elif retard <= RETARD_MAXIM:
+            # Més tard ja no és un retard, és una estació que s'ha recuperat
+            files.append((id_estac, demanat.strftime('%Y-%m-%dT%H:%MZ'), None, retard))
+    return files
+
+def registrar(consultes, ruta_db=HISTORICAL_DB):
+    """Desa els límits de les consultes i esborra els de fa més de DIES_MODEL. Retorna les files"""
+    files = limits_de_consultes(consultes)
+    if not files:
+        return 0
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        connexio.executescript(ESQUEMA)
+        limit = (datetime.utcnow() - timedelta(days=DIES_MODEL)).strftime('%Y-%m-%dT%H:%MZ')
+        with connexio:
+            connexio.executemany(SQL_REGISTRAR, files)
+            connexio.execute("DELETE FROM latencies_publicacio WHERE periode < ?", (limit,))
+        return len(files)
+    finally:
+        connexio.close()
+
+
+# --- 4. MODEL ---
+def estimacions(df):
+    """
+    Retard dels períodes acotats (límit inferior per sota del superior i a menys
+    d'AMPLADA_MAXIMA): el límit superior, el primer moment en què ja hi era.
+    La resta de files no hi surten.
+    """
+    inferior = pd.to_numeric(df['min_retard'], errors='coerce')
+    superior = pd.to_numeric(df['max_retard'], errors='coerce')
+    acotats = (inferior < superior) & (superior - inferior <= AMPLADA_MAXIMA)
+    return superior[acotats].clip(lower=RETARD_MINIM, upper=RETARD_MAXIM)
+
+def carregar_model(ruta_db=HISTORICAL_DB):
+    """{id_estac: retard previst en minuts} de les estacions amb prou mostres"""
+    if not Path(ruta_db).exists():
+        return {}
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        connexio.executescript(ESQUEMA)
+        df = pd.read_sql_query(
+            "SELECT id_estac, min_retard, max_retard FROM latencies_publicacio "
+            "WHERE min_retard IS NOT NULL AND max_retard IS NOT NULL", connexio)
+    finally:
+        connexio.close()
+    retards = estimacions(df)
+    if retards.empty:
+        return {}
+
+    grups = retards.groupby(df.loc[retards.index, 'id_estac'])
+    model = grups.quantile(QUANTIL_RETARD)[grups.size() >= MIN_MOSTRES]
+    return model.round(1).to_dict()
+
+def primer_intent(id_estac, periode, model, per_defecte):
+    """
+    Minuts després del final del període per demanar-lo per primer cop: el retard
+    après o 'per_defecte'. Un de cada CICLES_EXPLORACIO períodes (escalonats per
+    estació) es demana des de RETARD_MINIM, perquè si l'estació ara publica abans
+    el model també ho aprengui.
+    """
+    if id_estac not in model:
+        return per_defecte
+    index = (periode - datetime(1970, 1, 1)) // timedelta(minutes=MINUTS_PERIODE)
+    if (index + zlib.crc32(id_estac.encode())) % CICLES_EXPLORACIO == 0:
+        return RETARD_MINIM
+    return model[id_estac]
+
+
+# --- EXECUCIÓ DIRECTA ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retard de publicació après per estació")
+    parser.add_argument('--estacio', help="Mostra només una estació")
+    args = parser.parse_args()
+
+    model = carregar_model()
+    if not model:
+        print(f"ℹ️  Encara no hi ha prou períodes acotats (mínim {MIN_MOSTRES} per estació)")
+        sys.exit(0)
+
+    if args.estacio:
+        print(f"⏱️  {args.estacio}: {model.get(args.estacio, 'sense model')} min")
+    else:
+        retards = pd.Series(model)
+        print(f"⏱️  Retard previst (quantil {QUANTIL_RETARD:.0%}) de {len(retards)} estacions: "
+              f"mediana {retards.median():.1f} min, mínim {retards.min():.1f}, màxim {retards.max():.1f}")
+        for id_estac, retard in retards.sort_values(ascending=False).head(10).items():
+            print(f"   {id_estac}: {retard:.1f} min")
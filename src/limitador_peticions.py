@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# limitador_peticions.py - Límit de peticions a meteo.cat compartit entre fils i processos
+#
+# Cubell de fitxes (token bucket): SCRAPING_REQUESTS_PER_SECOND de ritme sostingut
+# i fins a SCRAPING_BURST peticions seguides. L'estat (fitxes i darrer instant) és
+# un fitxer de 16 bytes al directori temporal de la màquina, protegit amb un
+# bloqueig de fitxer (fcntl a Linux/macOS, msvcrt a Windows), de manera que tots
+# els scrapers de la màquina (shards, dimoni, recuperador) comparteixen el mateix
+# límit. Cada petició reserva la seva fitxa i dorm fora del bloqueig el temps que
+# li toca, sense esperes actives.
+#
+# El cubell sempre s'omple al ritme de config_banner: un procés no pot demanar un
+# ritme més alt (configurar() ho rebutja), i si en demana un de més baix (p. ex.
+# el recuperador amb --peticions-per-segon) només espaia les seves peticions, sense
+# canviar el ritme al qual els altres processos recuperen fitxes.
+#
+# Ús:
+#   from limitador_peticions import esperar_torn
+#   esperar_torn()  # abans de cada petició
+#   python src/limitador_peticions.py --proves 20
+
+# --- 1. IMPORTACIONS ---
+import os
+import sys
+import time
+import struct
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: msvcrt
+    import msvcrt
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import SCRAPING_REQUESTS_PER_SECOND, SCRAPING_BURST
+
+# --- CONFIGURACIÓ ---
+RUTA_ESTAT = Path(tempfile.gettempdir()) / 'meteocat_limitador_peticions.bin'
+FORMAT_ESTAT = struct.Struct('<dd')  # fitxes disponibles, instant de l'última actualització
+
+
+# --- 3. BLOQUEIG DE FITXER ---
+def bloquejar(fitxer):
+    if fcntl is not None:
+        fcntl.flock(fitxer.fileno(), fcntl.LOCK_EX)
+    else:
+        fitxer.seek(0)
+        msvcrt.locking(fitxer.fileno(), msvcrt.LK_LOCK, 1)
+
+def desbloquejar(fitxer):
+    if fcntl is not None:
+        fcntl.flock(fitxer.fileno(), fcntl.LOCK_UN)
+    else:
+        fitxer.seek(0)
+        msvcrt.locking(fitxer.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# --- 4. LIMITADOR ---
+class LimitadorPeticions:
+    """Cubell de fitxes compartit: entre fils amb un Lock i entre processos amb el fitxer d'estat"""
+
+    def __init__(self, peticions_per_segon=SCRAPING_REQUESTS_PER_SECOND, rafaga=SCRAPING_BURST,
+                 ruta=RUTA_ESTAT, ritme_propi=None):
+        self.ritme = peticions_per_segon
+        self.rafaga = max(1, rafaga)
+        self.ruta = Path(ruta)
+        self.bloqueig = threading.Lock()
+        # Ritme més baix només per a aquest procés (None: el del cubell)
+        self.interval_propi = 1 / ritme_propi if ritme_propi else 0.0
+        self.proper_propi = 0.0
+
+    def reservar(self):
+        """Agafa una fitxa (encara que el saldo quedi negatiu) i retorna els segons d'espera"""
+        if self.ritme <= 0:
+            return 0.0
+        with self.bloqueig:
+            ara = time.monotonic()
+            torn_propi = max(ara, self.proper_propi)
+            self.proper_propi = torn_propi + self.interval_propi
+            espera_propia = torn_propi - ara
+
+            self.ruta.touch(exist_ok=True)
+            with open(self.ruta, 'r+b') as fitxer:
+                bloquejar(fitxer)
+                try:
+                    ara = time.time()
+                    contingut = fitxer.read(FORMAT_ESTAT.size)
+                    if len(contingut) == FORMAT_ESTAT.size:
+                        fitxes, darrer = FORMAT_ESTAT.unpack(contingut)
+                        fitxes = min(self.rafaga, fitxes + max(0.0, ara - darrer) * self.ritme)
+                    else:
+                        fitxes = float(self.rafaga)  # Primer ús (o fitxer malmès): cubell ple
+                    fitxes -= 1
+                    fitxer.seek(0)
+                    fitxer.write(FORMAT_ESTAT.pack(fitxes, ara))
+                    fitxer.flush()
+                finally:
+                    desbloquejar(fitxer)
+        return max(0.0, -fitxes / self.ritme, espera_propia)
+
+    def esperar(self):
+        """Espera el torn de la propera petició. Retorna els segons esperats"""
+        espera = self.reservar()
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+
+_LIMITADOR = None
+
+def limitador():
+    """Instància del procés amb els valors de config_banner"""
+    global _LIMITADOR
+    if _LIMITADOR is None:
+        _LIMITADOR = LimitadorPeticions()
+    return _LIMITADOR
+
+def configurar(peticions_per_segon=None):
+    """
+    Limita aquest procés a un ritme més baix que el de config_banner (el cubell
+    continua compartit i s'omple al ritme de sempre). Un ritme més alt és ValueError.
+    """
+    global _LIMITADOR
+    if peticions_per_segon is not None and peticions_per_segon > SCRAPING_REQUESTS_PER_SECOND:
+        raise ValueError(f"{peticions_per_segon} peticions/s supera el límit compartit "
+                         f"(SCRAPING_REQUESTS_PER_SECOND = {SCRAPING_REQUESTS_PER_SECOND})")
+    propi = peticions_per_segon if peticions_per_segon and peticions_per_segon < SCRAPING_REQUESTS_PER_SECOND else None
+    _LIMITADOR = LimitadorPeticions(ritme_propi=propi)
+    return _LIMITADOR
+
+def esperar_torn():
+    return limitador().esperar()
+
+
+# --- EXECUCIÓ DIRECTA ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comprova el límit de peticions compartit (sense fer cap petició)")
+    parser.add_argument('--proves', type=int, default=10, help="Torns a demanar")
+    args = parser.parse_args()
+
+    inici = time.perf_counter()
+    for i in range(args.proves):
+        espera = esperar_torn()
+        print(f"   {i + 1:3}: +{time.perf_counter() - inici:6.2f} s (espera {espera:.2f} s) [pid {os.getpid()}]")
+    segons = time.perf_counter() - inici
+    print(f"🚦 {args.proves} torns en {segons:.2f} s | límit {SCRAPING_REQUESTS_PER_SECOND}/s, ràfega {SCRAPING_BURST} "
+          f"({RUTA_ESTAT})")
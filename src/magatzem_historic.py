@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# magatzem_historic.py - Magatzem històric local (SQLite) de les sèries per estació
+#
+# Cada execució dels scrapers sobreescriu resum_periode_meteocat.json; aquest mòdul
+# en guarda una còpia acumulativa: una fila per (estació, inici del període UTC),
+# només d'afegir (un període ja desat no es torna a escriure). La clau primària
+# agrupa les files per estació i per temps, de manera que una consulta de rang
+# (tendències, gràfics) llegeix un tros contigu de l'índex.
+
+# --- 1. IMPORTACIONS ---
+import sys
+import json
+import re
+import sqlite3
+from pathlib import Path
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import HISTORICAL_DB
+
+# Columnes numèriques normalitzades → variables VAR_ de la web (la primera que hi sigui)
+COLUMNES_NUMERIQUES = {
+    'tm': ['VAR_TM_grausC'],
+    'tx': ['VAR_TX_grausC'],
+    'tn': ['VAR_TN_grausC'],
+    'hr': ['VAR_HRM_perc'],
+    'ppt': ['VAR_PPT_mm'],
+    'vvm': ['VAR_VVM_10_m_km_h', 'VAR_VVM_6_m_km_h', 'VAR_VVM_2_m_km_h'],
+    'dvm': ['VAR_DVM_10_m_graus', 'VAR_DVM_6_m_graus', 'VAR_DVM_2_m_graus'],
+    'vvx': ['VAR_VVX_10_m_km_h', 'VAR_VVX_6_m_km_h', 'VAR_VVX_2_m_km_h'],
+    'pm': ['VAR_PM_hPa'],
+    'rs': ['VAR_RS_W_m_2'],
+    'gn': ['VAR_GN_cm']
+}
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS observacions (
+    id_estac TEXT NOT NULL,
+    instant TEXT NOT NULL,          -- inici del període, 'AAAA-MM-DDTHH:MMZ'
+    periode_utc TEXT,
+    data_extraccio TEXT,
+    {', '.join(f'{col} REAL' for col in COLUMNES_NUMERIQUES)},
+    variables TEXT NOT NULL,        -- JSON amb tots els VAR_ tal com surten a la web
+    PRIMARY KEY (id_estac, instant)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS resums_diaris (
+    id_estac TEXT NOT NULL,
+    data TEXT NOT NULL,             -- 'AAAA-MM-DD'
+    data_extraccio TEXT,
+    variables TEXT NOT NULL,        -- JSON amb les variables del resum diari
+    PRIMARY KEY (id_estac, data)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS metadades_magatzem (
+    clau TEXT PRIMARY KEY,          -- p. ex. 'compactat_fins' (vegeu manteniment_historic.py)
+    valor TEXT
+) WITHOUT ROWID;
+"""
+
+
+# --- 3. FUNCIONS AUXILIARS ---
+def valor_numeric(valor):
+    """Retorna el primer número d'un valor de la web ('17.0', '75%') o None"""
+    if valor is None:
+        return None
+    coincidencia = re.search(r'-?\d+(?:\.\d+)?', str(valor).replace(',', '.'))
+    return float(coincidencia.group()) if coincidencia else None
+
+def instant_del_periode(registre):
+    """'2026-08-22' + '17:00 - 17:30' → '2026-08-22T17:00Z' (None si no es pot calcular)"""
+    data = registre.get('DATA_UTC', '')
+    inici = re.match(r'\s*(\d{1,2}):(\d{2})', registre.get('PERIODE_UTC', '') or '')
+    if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', data or '') or not inici:
+        return None
+    return f"{data}T{int(inici.group(1)):02d}:{inici.group(2)}Z"
+
+def obrir(ruta_db=HISTORICAL_DB):
+    """Obre (i crea si cal) el magatzem"""
+    Path(ruta_db).parent.mkdir(parents=True, exist_ok=True)
+    connexio = sqlite3.connect(ruta_db)
+    connexio.execute("PRAGMA journal_mode=WAL")
+    connexio.execute("PRAGMA synchronous=NORMAL")
+    connexio.executescript(ESQUEMA)
+    return connexio
+
+def compactat_fins(connexio):
+    """Instant (exclòs) fins al qual les observacions viuen als segments, o None"""
+    fila = connexio.execute("SELECT valor FROM metadades_magatzem WHERE clau = 'compactat_fins'").fetchone()
+    return fila[0] if fila else None
+
+
+# --- 4. ESCRIPTURA ---
+def fila_observacio(registre):
+    """Converteix un registre del scraper de períodes en una fila de la taula observacions"""
+    instant = instant_del_periode(registre)
+    if registre.get('ESTAT') != 'OK' or not registre.get('ID_ESTAC') or not instant:
+        return None
+
+    numeriques = []
+    for variables_web in COLUMNES_NUMERIQUES.values():
+        valor = None
+        for var in variables_web:
+            valor = valor_numeric(registre.get(var))
+            if valor is not None:
+                break
+        numeriques.append(valor)
+
+    variables = {k: v for k, v in registre.items() if k.startswith('VAR_') and v not in ('', None)}
+    return (registre['ID_ESTAC'], instant, registre.get('PERIODE_UTC', ''),
+            registre.get('DATA_EXTRACCIO', ''), *numeriques,
+            json.dumps(variables, ensure_ascii=False, sort_keys=True))
+
+def afegir_periodes(registres, ruta_db=HISTORICAL_DB):
+    """
+    Afegeix els períodes vàlids al magatzem. Els que ja hi són (mateixa estació i
+    instant, també si ja s'han compactat en segments) es deixen com estaven. Cada
+    fila nova actualitza també l'agregat del seu dia (agregador_diari), els
+    rollups (rollups_historic) i les sèries memmap (series_memmap). Retorna el
+    nombre de files noves.
+    """
+    import agregador_diari
+    import rollups_historic
+    import segments_historic
+    import series_memmap
+
+    files = [fila for fila in (fila_observacio(r) for r in registres) if fila]
+    if not files:
+        return 0
+
+    columnes = ['id_estac', 'instant', 'periode_utc', 'data_extraccio', *COLUMNES_NUMERIQUES, 'variables']
+    sql = (f"INSERT INTO observacions ({', '.join(columnes)}) VALUES ({', '.join('?' * len(columnes))}) "
+           f"ON CONFLICT(id_estac, instant) DO NOTHING")
+
+    connexio = obrir(ruta_db)
+    try:
+        agregador_diari.preparar(connexio)
+        rollups_historic.preparar(connexio)
+        limit_compactat = compactat_fins(connexio)
+        compactats = {}
+        noves = []
+        with connexio:
+            for fila in files:
+                if limit_compactat and fila[1] < limit_compactat:
+                    clau_segment = (fila[0], fila[1][:7])
+                    if clau_segment not in compactats:
+                        compactats[clau_segment] = segments_historic.instants_del_segment(*clau_segment)
+                    if fila[1] in compactats[clau_segment]:
+                        continue
+                if connexio.execute(sql, fila).rowcount:
+                    valors = dict(zip(COLUMNES_NUMERIQUES, fila[4:-1]))
+                    agregador_diari.acumular(connexio, fila[0], fila[1], valors)
+                    rollups_historic.acumular(connexio, fila[0], fila[1], valors)
+                    noves.append((fila[0], fila[1], valors))
+    finally:
+        connexio.close()
+
+    try:
+        series_memmap.afegir(noves)
+    except Exception as e:
+        # Només és una memòria cau: el generador la reconstrueix si cal
+        print(f"⚠️  No s'han pogut actualitzar les sèries memmap: {e}")
+    return len(noves)
+
+def afegir_resums_diaris(registres, ruta_db=HISTORICAL_DB):
+    """
+    Desa els resums diaris. Un mateix dia es consulta diverses vegades mentre
+    avança, de manera que aquí sí que guanya l'última lectura.
+    """
+    files = []
+    for registre in registres:
+        if not registre.get('ID_ESTAC') or not registre.get('DATA_DIA'):
+            continue
+        variables = {k: v for k, v in registre.items()
+                     if k.isupper() and k not in ('ID_ESTAC', 'NOM_ESTACIO', 'NOM_ORIGINAL', 'DATA_DIA',
+                                                  'DATA_EXTRACCIO', 'URL_FONT') and v not in ('', None)}
+        if variables:
+            files.append((registre['ID_ESTAC'], registre['DATA_DIA'], registre.get('DATA_EXTRACCIO', ''),
+                          json.dumps(variables, ensure_ascii=False, sort_keys=True)))
+    if not files:
+        return 0
+
+    connexio = obrir(ruta_db)
+    try:
+        with connexio:
+            connexio.executemany(
+                "INSERT INTO resums_diaris (id_estac, data, data_extraccio, variables) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id_estac, data) DO UPDATE SET data_extraccio = excluded.data_extraccio, "
+                "variables = excluded.variables", files)
+        return len(files)
+    finally:
+        connexio.close()
+
+
+# --- 5. LECTURA ---
+def llegir_serie(id_estac, desde=None, fins=None, columnes=('tm', 'tx', 'tn', 'ppt'), ruta_db=HISTORICAL_DB):
+    """
+    Retorna [(instant, valor_col1, valor_col2, ...)] d'una estació ordenat per temps.
+    'desde' i 'fins' són instants 'AAAA-MM-DDTHH:MMZ' (o només la data) inclosos.
+    La part anterior a la retenció es llegeix dels segments compactats.
+    """
+    columnes = [c for c in columnes if c in COLUMNES_NUMERIQUES]
+    condicions = ["id_estac = ?"]
+    parametres = [id_estac]
+    if desde:
+        condicions.append("instant >= ?")
+        parametres.append(desde)
+    if fins:
+        condicions.append("instant <= ?")
+        # Una data sola inclou tot el dia
+        parametres.append(fins + 'T23:59Z' if len(fins) == 10 else fins)
+
+    if not Path(ruta_db).exists():
+        return []
+    connexio = obrir(ruta_db)
+    try:
+        files = connexio.execute(
+            f"SELECT instant{''.join(', ' + c for c in columnes)} FROM observacions "
+            f"WHERE {' AND '.join(condicions)} ORDER BY instant", parametres).fetchall()
+        limit_compactat = compactat_fins(connexio)
+    finally:
+        connexio.close()
+
+    if not limit_compactat or (desde and desde >= limit_compactat):
+        return files
+
+    import segments_historic
+    posicions = [2 + list(COLUMNES_NUMERIQUES).index(c) for c in columnes]
+    ja_hi_son = {f[0] for f in files}
+    antigues = [(f[0], *(f[p] for p in posicions))
+                for f in segments_historic.llegir_rang(id_estac, desde, parametres[-1] if fins else None)
+                if f[0] not in ja_hi_son]
+    return sorted(antigues + files)
+
+def totes_les_files(connexio):
+    """
+    (id_estac, instant, {columna: valor}) de tots els períodes desats: els
+    compactats als segments (anteriors a compactat_fins) i els de la taula
+    observacions. Per reconstruir els agregats sense perdre la part compactada.
+    """
+    import segments_historic
+    columnes = list(COLUMNES_NUMERIQUES)
+    limit_compactat = compactat_fins(connexio)
+    if limit_compactat:
+        for id_estac in segments_historic.estacions_desades():
+            for fila in segments_historic.llegir_rang(id_estac):
+                # Una compactació interrompuda pot haver deixat al segment files encara a observacions
+                if fila[0] < limit_compactat:
+                    yield id_estac, fila[0], dict(zip(columnes, fila[2:]))
+    for fila in connexio.execute(f"SELECT id_estac, instant, {', '.join(columnes)} FROM observacions").fetchall():
+        yield fila[0], fila[1], dict(zip(columnes, fila[2:]))
+
+def resum_magatzem(ruta_db=HISTORICAL_DB):
+    """Retorna un petit resum del contingut (per als logs)"""
+    if not Path(ruta_db).exists():
+        return {'observacions': 0, 'estacions': 0, 'primer': None, 'darrer': None, 'resums_diaris': 0}
+    connexio = obrir(ruta_db)
+    try:
+        observacions, estacions, primer, darrer = connexio.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT id_estac), MIN(instant), MAX(instant) FROM observacions").fetchone()
+        resums = connexio.execute("SELECT COUNT(*) FROM resums_diaris").fetchone()[0]
+        return {'observacions': observacions, 'estacions': estacions, 'primer': primer,
+                'darrer': darrer, 'resums_diaris': resums}
+    finally:
+        connexio.close()
+
+
+# --- EXECUCIÓ DIRECTA: importar els JSON actuals i mostrar el resum ---
+if __name__ == "__main__":
+    from config_banner import DATA_DIR
+
+    ruta_periode = Path(DATA_DIR) / "resum_periode_meteocat.json"
+    ruta_diari = Path(DATA_DIR) / "resum_diari_meteocat.json"
+
+    if ruta_periode.exists():
+        with open(ruta_periode, 'r', encoding='utf-8') as f:
+            noves = afegir_periodes(json.load(f).get('dades_periode', []))
+        print(f"🗄️  Períodes nous al magatzem: {noves}")
+    if ruta_diari.exists():
+        with open(ruta_diari, 'r', encoding='utf-8') as f:
+            desats = afegir_resums_diaris(json.load(f).get('estacions', []))
+        print(f"🗄️  Resums diaris desats: {desats}")
+
+    resum = resum_magatzem()
+    print(f"📊 Magatzem {HISTORICAL_DB}: {resum['observacions']} observacions, "
+          f"{resum['estacions']} estacions ({resum['primer']} → {resum['darrer']}), "
+          f"{resum['resums_diaris']} resums diaris")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# manteniment_historic.py - Retenció i compactació del magatzem històric
+#
+# Les files semihoràries es queden al SQLite durant HISTORICAL_RETENTION_DAYS dies.
+# Les més antigues passen a segments columnars (segments_historic.py), s'esborren
+# de la taula observacions i es fa un VACUUM. Els agregats diaris i els rollups
+# diaris i mensuals ja les tenen resumides i no es toquen (i si es reconstrueixen,
+# les tornen a llegir dels segments: magatzem_historic.totes_les_files); els
+# rollups horaris de les mateixes hores s'esborren. S'executa com a pas de manteniment després
+# del desplegament i informa de la mida i del temps de càrrega abans i després.
+#
+# Ús:
+#   python src/manteniment_historic.py
+#   python src/manteniment_historic.py --dies 30
+#   python src/manteniment_historic.py --nomes-informe
+
+# --- 1. IMPORTACIONS ---
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+from itertools import groupby
+from datetime import datetime, timedelta
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import HISTORICAL_DB, HISTORICAL_RETENTION_DAYS
+
+import magatzem_historic
+import rollups_historic
+import segments_historic
+
+
+# --- 3. MESURES ---
+def mida_fitxers(ruta_db=HISTORICAL_DB):
+    """Bytes del SQLite (amb -wal i -shm) i dels segments"""
+    sqlite = sum(os.path.getsize(ruta_db + sufix) for sufix in ('', '-wal', '-shm')
+                 if os.path.exists(ruta_db + sufix))
+    return {'sqlite': sqlite, 'segments': segments_historic.mida_segments()}
+
+def temps_carrega(ruta_db=HISTORICAL_DB, desde=None):
+    """Segons i files en carregar la sèrie de totes les estacions (des de 'desde' o tota)"""
+    if not Path(ruta_db).exists():
+        return 0.0, 0
+    inici = time.perf_counter()
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        estacions = [f[0] for f in connexio.execute("SELECT DISTINCT id_estac FROM observacions")]
+    finally:
+        connexio.close()
+    estacions = sorted(set(estacions) | set(segments_historic.estacions_desades()))
+
+    files = 0
+    columnes = tuple(magatzem_historic.COLUMNES_NUMERIQUES)
+    for id_estac in estacions:
+        files += len(magatzem_historic.llegir_serie(id_estac, desde, columnes=columnes, ruta_db=ruta_db))
+    return time.perf_counter() - inici, files
+
+def files_per_taula(ruta_db=HISTORICAL_DB):
+    """Files de les taules que creixen amb el temps"""
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        rollups_historic.preparar(connexio)
+        return {
+            'observacions': connexio.execute("SELECT COUNT(*) FROM observacions").fetchone()[0],
+            'rollups_hora': connexio.execute("SELECT COUNT(*) FROM rollups WHERE nivell = 'hora'").fetchone()[0],
+            'rollups_dia_mes': connexio.execute("SELECT COUNT(*) FROM rollups WHERE nivell != 'hora'").fetchone()[0]
+        }
+    finally:
+        connexio.close()
+
+def mesurar(ruta_db=HISTORICAL_DB, dies_recents=7):
+    """Mides, files i temps de càrrega: la finestra recent (la dels gràfics) i l'històric sencer"""
+    mides = mida_fitxers(ruta_db)
+    taules = files_per_taula(ruta_db)
+    desde = (datetime.utcnow() - timedelta(days=dies_recents)).strftime("%Y-%m-%dT00:00Z")
+    segons_recents, files_recents = temps_carrega(ruta_db, desde)
+    segons, files = temps_carrega(ruta_db)
+    return {**mides, **taules, 'total': mides['sqlite'] + mides['segments'], 'segons': segons, 'files': files,
+            'segons_recents': segons_recents, 'files_recents': files_recents}
+
+
+# --- 4. COMPACTACIÓ ---
+def compactar(dies_retencio=HISTORICAL_RETENTION_DAYS, ruta_db=HISTORICAL_DB):
+    """
+    Mou als segments les observacions anteriors al límit de retenció (a mitjanit
+    UTC). Els segments s'escriuen abans d'esborrar res, de manera que una
+    interrupció només deixa files repetides que la propera execució fusiona. Un
+    mes d'una estació amb valors que el segment no pot representar exactament
+    (segments_historic.ESCALA) es queda a observacions.
+    """
+    limit = (datetime.utcnow() - timedelta(days=dies_retencio)).strftime("%Y-%m-%dT00:00Z")
+    columnes = list(magatzem_historic.COLUMNES_NUMERIQUES)
+
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        files = connexio.execute(
+            f"SELECT id_estac, instant, data_extraccio, {', '.join(columnes)} FROM observacions "
+            "WHERE instant < ? ORDER BY id_estac, instant", (limit,)).fetchall()
+
+        compactats = []
+        rebutjades = 0
+        for (id_estac, mes), grup in groupby(files, key=lambda f: (f[0], f[1][:7])):
+            grup = [f[1:] for f in grup]
+            try:
+                segments_historic.afegir_a_segment(id_estac, mes, grup)
+            except ValueError as e:
+                print(f"⚠️  {id_estac} {mes}: es queda al SQLite ({e})")
+                rebutjades += len(grup)
+                continue
+            compactats.append((id_estac, mes, limit))
+
+        with connexio:
+            connexio.executemany("DELETE FROM observacions WHERE id_estac = ? AND substr(instant, 1, 7) = ? "
+                                 "AND instant < ?", compactats)
+            rollups_hora = rollups_historic.podar_hores(connexio, limit)
+            # El límit només avança: un --dies més gran no fa tornar files als segments
+            connexio.execute(
+                "INSERT INTO metadades_magatzem (clau, valor) VALUES ('compactat_fins', ?) "
+                "ON CONFLICT(clau) DO UPDATE SET valor = max(valor, excluded.valor)", (limit,))
+
+        connexio.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connexio.execute("VACUUM")
+        return {'limit': limit, 'files': len(files) - rebutjades, 'segments': len(compactats),
+                'rebutjades': rebutjades, 'rollups_hora': rollups_hora}
+    finally:
+        connexio.close()
+
+
+# --- EXECUCIÓ PRINCIPAL ---
+def format_mida(octets):
+    return f"{octets / 1024:.1f} KB" if octets < 1024 * 1024 else f"{octets / 1024 / 1024:.2f} MB"
+
+def informe(titol, mesura):
+    print(f"{titol}: SQLite {format_mida(mesura['sqlite'])} + segments {format_mida(mesura['segments'])} "
+          f"= {format_mida(mesura['total'])}")
+    print(f"   🗄️  Files: {mesura['observacions']} observacions | rollups {mesura['rollups_hora']} horaris, "
+          f"{mesura['rollups_dia_mes']} diaris i mensuals")
+    print(f"   ⏱️  Càrrega 7 dies: {mesura['files_recents']} files en {mesura['segons_recents'] * 1000:.0f} ms | "
+          f"sencera: {mesura['files']} files en {mesura['segons'] * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retenció i compactació del magatzem històric")
+    parser.add_argument('--dies', type=int, default=HISTORICAL_RETENTION_DAYS,
+                        help=f"Dies de files completes que es conserven (per defecte {HISTORICAL_RETENTION_DAYS})")
+    parser.add_argument('--nomes-informe', action='store_true', help="Mesura sense compactar")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("🧹 MANTENIMENT DEL MAGATZEM HISTÒRIC")
+    print("=" * 80)
+
+    if not Path(HISTORICAL_DB).exists():
+        print(f"ℹ️  Encara no hi ha magatzem ({HISTORICAL_DB})")
+        sys.exit(0)
+
+    abans = mesurar()
+    informe("📏 Abans", abans)
+    if args.nomes_informe:
+        sys.exit(0)
+
+    resultat = compactar(args.dies)
+    print(f"🗜️  {resultat['files']} files anteriors a {resultat['limit']} → {resultat['segments']} segments "
+          f"({resultat['rollups_hora']} rollups horaris esborrats)")
+    if resultat['rebutjades']:
+        print(f"⚠️  {resultat['rebutjades']} files es queden al SQLite: tenen més precisió de la que guarden els segments")
+
+    despres = mesurar()
+    informe("📏 Després", despres)
+    if abans['total']:
+        print(f"📉 Mida: {(1 - despres['total'] / abans['total']) * 100:.1f}% estalviat | "
+              f"càrrega 7 dies: {abans['segons_recents'] * 1000:.0f} → {despres['segons_recents'] * 1000:.0f} ms | "
+              f"sencera: {abans['segons'] * 1000:.0f} → {despres['segons'] * 1000:.0f} ms")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# normals_climatiques.py - Normals per estació, dia de l'any i hora, i anomalies
+#
+# Per a les anomalies del banner cal comparar amb el mateix moment del dia: la
+# temperatura d'una mitja hora no es pot comparar amb la mitjana diària, ni la
+# màxima d'avui fins ara amb la màxima d'un dia sencer. Les normals surten dels
+# períodes semihoraris (la taula observacions i, per als anys passats, els
+# segments compactats: els rollups horaris només es guarden durant la retenció),
+# amb una finestra de ±7 dies al voltant de la data per tenir prou mostres: per
+# a cada estació i hora UTC, la temperatura mitjana d'aquella hora i la màxima
+# acumulada des de les 00:00 fins al final d'aquella hora (a les 23 UTC, la
+# màxima del dia sencer).
+#
+# El càlcul recorre anys de dades i el fa el manteniment de cada execució, no
+# el generador: construir() desa a la taula normals_horaries, per
+# (estació, dia de l'any, hora), els DIES_PRECALCULATS dies a partir d'avui. El
+# generador només llegeix les files del dia (una consulta per clau primària).
+#
+# Ús:
+#   python src/normals_climatiques.py
+#   python src/normals_climatiques.py --estacio YT
+
+# --- 1. IMPORTACIONS ---
+import sys
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import HISTORICAL_DB
+
+import magatzem_historic
+import segments_historic
+
+# --- CONFIGURACIÓ ---
+FINESTRA_DIES = 7            # ±dies al voltant de cada dia de l'any
+MIN_PERIODES_DIA = 40        # Dies amb menys períodes semihoraris (de 48) no compten
+MIN_MOSTRES = 20             # Dies vàlids mínims dins la finestra (amb ±7 dies, cal més d'un any)
+DIES_PRECALCULATS = 2        # Avui i demà UTC: el generador de després de mitjanit ja els troba
+VARIABLES_HORARIES = ['tm', 'tx']    # tm de l'hora; tx acumulada des de les 00:00 UTC
+PERCENTILS = {'p10': 0.1, 'p50': 0.5, 'p90': 0.9}
+
+COLUMNES_NORMALS = [f'{v}_{e}' for v in VARIABLES_HORARIES for e in ['mitjana', *PERCENTILS]]
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS normals_horaries (
+    id_estac TEXT NOT NULL,
+    dia_any INTEGER NOT NULL,       -- 1..366, amb el 29 de febrer sempre al 60
+    hora INTEGER NOT NULL,          -- hora UTC
+    n_dies INTEGER NOT NULL,        -- dies vàlids dins la finestra
+    {', '.join(f'{c} REAL' for c in COLUMNES_NORMALS)},
+    PRIMARY KEY (dia_any, id_estac, hora)
+) WITHOUT ROWID;
+"""
+
+
+# --- 3. CÀLCUL ---
+def dia_de_l_any(data):
+    """Dia de l'any en un any de traspàs: el mateix dia del calendari té sempre el mateix número"""
+    return datetime.strptime('2000-' + data[5:10], '%Y-%m-%d').timetuple().tm_yday
+
+def dies_de_la_finestra(data):
+    """'MM-DD' dels dies a ±FINESTRA_DIES de 'AAAA-MM-DD' (el canvi d'any inclòs)"""
+    centre = datetime.strptime('2000-' + data[5:10], '%Y-%m-%d')
+    return sorted({(centre + timedelta(days=d)).strftime('%m-%d')
+                   for d in range(-FINESTRA_DIES, FINESTRA_DIES + 1)})
+
+def periodes_de_la_finestra(connexio, dies):
+    """DataFrame (id_estac, instant, tm, tx) dels períodes dels dies 'MM-DD' de tots els anys"""
+    trossos = [pd.read_sql_query(
+        "SELECT id_estac, instant, tm, tx FROM observacions "
+        f"WHERE substr(instant, 6, 5) IN ({', '.join('?' * len(dies))})", connexio, params=dies)]
+    limit_compactat = magatzem_historic.compactat_fins(connexio)
+    if limit_compactat:
+        mesos = {dia[:2] for dia in dies}
+        for id_estac in segments_historic.estacions_desades():
+            for mes in segments_historic.mesos_desats(id_estac):
+                if mes[5:7] not in mesos:
+                    continue
+                columnes = segments_historic.descodificar_columnes(
+                    segments_historic.carregar_arrays(segments_historic.ruta_segment(id_estac, mes)))
+                tros = pd.DataFrame({'id_estac': id_estac,
+                                     'instant': np.char.add(np.datetime_as_string(columnes['instant'], unit='m'), 'Z'),
+                                     'tm': columnes['tm'], 'tx': columnes['tx']})
+                trossos.append(tros[(tros['instant'] < limit_compactat) & tros['instant'].str[5:10].isin(dies)])
+    return pd.concat(trossos, ignore_index=True)
+
+def hores_valides(connexio, data):
+    """
+    DataFrame (id_estac, data, hora, tm, tx) per hora UTC de la finestra de 'data',
+    només dels dies amb prou períodes. tx és la màxima del dia fins al final
+    d'aquella hora.
+    """
+    periodes = periodes_de_la_finestra(connexio, dies_de_la_finestra(data))
+    if periodes.empty:
+        return pd.DataFrame(columns=['id_estac', 'data', 'hora', *VARIABLES_HORARIES])
+    periodes = periodes.assign(data=periodes['instant'].str[:10], hora=periodes['instant'].str[11:13].astype(int),
+                               tm=pd.to_numeric(periodes['tm']), tx=pd.to_numeric(periodes['tx']))
+    df = periodes.groupby(['id_estac', 'data', 'hora']).agg(
+        n_periodes=('instant', 'size'), tm=('tm', 'mean'), tx=('tx', 'max')).reset_index()
+    df = df[df.groupby(['id_estac', 'data'])['n_periodes'].transform('sum') >= MIN_PERIODES_DIA]
+    df = df.sort_values(['id_estac', 'data', 'hora'])
+    df['tx'] = df.groupby(['id_estac', 'data'])['tx'].cummax()
+    return df[['id_estac', 'data', 'hora', *VARIABLES_HORARIES]]
+
+def calcular_normals_horaries(hores):
+    """DataFrame (id_estac, hora, n_dies, columnes de normals) de les hores amb prou dies vàlids"""
+    if hores.empty:
+        return pd.DataFrame(columns=['id_estac', 'hora', 'n_dies', *COLUMNES_NORMALS])
+    grups = hores.groupby(['id_estac', 'hora'])
+    normals = grups[VARIABLES_HORARIES].mean().add_suffix('_mitjana')
+    for nom, quantil in PERCENTILS.items():
+        normals = normals.join(grups[VARIABLES_HORARIES].quantile(quantil).add_suffix(f'_{nom}'))
+    normals['n_dies'] = grups.size()
+    normals = normals[normals['n_dies'] >= MIN_MOSTRES].round(1).reset_index()
+    return normals[['id_estac', 'hora', 'n_dies', *COLUMNES_NORMALS]]
+
+def construir(ruta_db=HISTORICAL_DB, data=None):
+    """
+    Recalcula la taula normals_horaries per als DIES_PRECALCULATS dies des de
+    'data' (avui UTC per defecte). Retorna (files, estacions)
+    """
+    inici = datetime.strptime(data, '%Y-%m-%d') if data else datetime.utcnow()
+    columnes = ['id_estac', 'dia_any', 'hora', 'n_dies', *COLUMNES_NORMALS]
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        connexio.executescript(ESQUEMA)
+        files = []
+        for desplacament in range(DIES_PRECALCULATS):
+            dia = (inici + timedelta(days=desplacament)).strftime('%Y-%m-%d')
+            normals = calcular_normals_horaries(hores_valides(connexio, dia)).assign(dia_any=dia_de_l_any(dia))
+            files.extend(normals[columnes].astype(object).where(normals[columnes].notna(), None)
+                         .itertuples(index=False, name=None))
+        with connexio:
+            connexio.execute("DELETE FROM normals_horaries")
+            # Taula de la versió diària anterior, que ja no llegeix ningú
+            connexio.execute("DROP TABLE IF EXISTS normals_diaries")
+            connexio.executemany(
+                f"INSERT INTO normals_horaries ({', '.join(columnes)}) VALUES ({', '.join('?' * len(columnes))})",
+                files)
+        return len(files), len({f[0] for f in files})
+    finally:
+        connexio.close()
+
+
+# --- 4. CONSULTA ---
+def carregar_normals_horaries(data=None, ruta_db=HISTORICAL_DB):
+    """{(id_estac, hora UTC): {columna: valor}} precalculades per a 'data' (avui UTC per defecte)"""
+    if not Path(ruta_db).exists():
+        return {}
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        connexio.executescript(ESQUEMA)
+        cursor = connexio.execute("SELECT * FROM normals_horaries WHERE dia_any = ?",
+                                  (dia_de_l_any(data or datetime.utcnow().strftime("%Y-%m-%d")),))
+        noms = [c[0] for c in cursor.description]
+        return {(f[0], f[2]): dict(zip(noms[3:], f[3:])) for f in cursor}
+    finally:
+        connexio.close()
+
+def anomalia_horaria(normals, id_estac, hora, variable, valor):
+    """
+    Desviació respecte de la normal de l'hora UTC 'hora' (carregar_normals_horaries):
+    tm d'un període d'aquella hora o tx del dia fins a aquella hora. Vegeu desviacio.
+    """
+    if hora is None:
+        return None
+    return desviacio(normals.get((id_estac, hora)), variable, valor)
+
+def desviacio(normal, variable, valor):
+    """
+    {'diferencia', 'normal', 'percentil'} de 'valor' respecte d'una fila de normals,
+    o None si no n'hi ha. 'percentil' és 'baix' (< p10), 'alt' (> p90) o None.
+    """
+    if valor is None or not normal or normal.get(f'{variable}_mitjana') is None:
+        return None
+
+    percentil = None
+    if normal.get(f'{variable}_p10') is not None and valor < normal[f'{variable}_p10']:
+        percentil = 'baix'
+    elif normal.get(f'{variable}_p90') is not None and valor > normal[f'{variable}_p90']:
+        percentil = 'alt'
+    return {
+        'diferencia': round(valor - normal[f'{variable}_mitjana'], 1),
+        'normal': normal[f'{variable}_mitjana'],
+        'percentil': percentil
+    }
+
+
+# --- EXECUCIÓ DIRECTA ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normals climàtiques per estació, dia de l'any i hora")
+    parser.add_argument('--estacio', help="Mostra la normal de l'hora actual d'una estació després de calcular")
+    args = parser.parse_args()
+
+    if not Path(HISTORICAL_DB).exists():
+        print(f"ℹ️  Encara no hi ha magatzem ({HISTORICAL_DB})")
+        sys.exit(0)
+
+    files, estacions = construir()
+    print(f"📐 Normals horàries: {files} hores de {estacions} estacions per als propers {DIES_PRECALCULATS} dies "
+          f"(mínim {MIN_MOSTRES} dies vàlids per finestra)")
+
+    if args.estacio:
+        avui = datetime.utcnow().strftime("%Y-%m-%d")
+        hora = datetime.utcnow().hour
+        normal = carregar_normals_horaries(avui).get((args.estacio, hora))
+        print(f"   {args.estacio} {avui} {hora:02d} UTC: {normal if normal else 'sense prou dades'}")
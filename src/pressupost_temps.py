@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# pressupost_temps.py - Límit global de temps d'una execució dels scrapers
+#
+# L'executor fixa un instant límit (SCRAPING_RUN_BUDGET_SECONDS des de l'inici) i
+# el passa als scrapers per la variable d'entorn METEO_LIMIT_EXECUCIO, de manera
+# que tots els processos (i shards) treballen contra el mateix rellotge. Els
+# scrapers l'usen per escurçar els timeouts de les peticions quan queda poc
+# temps i per saltar-se les estacions que ja no hi caben: aquestes conserven els
+# registres de l'execució anterior, i el generador rep sempre un lot complet a
+# temps, encara que una part sigui de la mitja hora d'abans.
+#
+# Sense la variable (dimoni, proves), el pressupost és il·limitat.
+
+# --- 1. IMPORTACIONS ---
+import os
+import sys
+import time
+from pathlib import Path
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import SCRAPING_RUN_BUDGET_SECONDS
+
+# --- CONFIGURACIÓ ---
+VARIABLE_ENTORN = 'METEO_LIMIT_EXECUCIO'
+MARGE_SEGONS = 5        # Temps que es deixa per desar després de l'última petició
+TIMEOUT_MINIM = 2       # Per sota d'això no val la pena començar una petició
+
+
+class Pressupost:
+    """Temps que queda fins a l'instant límit (epoch) o il·limitat si no n'hi ha"""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+
+    @classmethod
+    def de_l_entorn(cls):
+        try:
+            return cls(float(os.environ[VARIABLE_ENTORN]))
+        except (KeyError, ValueError):
+            return cls()
+
+    def restant(self):
+        if self.limit is None:
+            return float('inf')
+        return self.limit - time.time() - MARGE_SEGONS
+
+    def esgotat(self):
+        return self.restant() < TIMEOUT_MINIM
+
+    def hi_cap(self, segons):
+        return self.restant() >= segons
+
+    def timeout(self, maxim):
+        """Timeout d'una petició: el normal, o el que quedi si és menys (0 si no n'hi cap cap)"""
+        restant = self.restant()
+        if restant < TIMEOUT_MINIM:
+            return 0
+        return min(maxim, restant)
+
+    def descripcio(self):
+        if self.limit is None:
+            return "sense límit"
+        return f"{max(0, self.restant()):.0f} s disponibles"
+
+
+def fixar_limit(segons=SCRAPING_RUN_BUDGET_SECONDS):
+    """Fixa el límit per a aquest procés i els fills (si ja n'hi ha un, es manté)"""
+    pressupost = Pressupost.de_l_entorn()
+    if pressupost.limit is None:
+        pressupost = Pressupost(time.time() + segons)
+        os.environ[VARIABLE_ENTORN] = f"{pressupost.limit:.0f}"
+    return pressupost
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# prioritat_estacions.py - Ordre del scraping segons el que surt a pantalla
+#
+# Les estacions no valen totes igual: el rotador en mostra unes primer i més
+# sovint, les de neu són les que es miren a l'hivern i les que tenen un avís o un
+# valor fora del normal (pluja forta, ratxa) no poden quedar-se amb dades velles.
+# Cada estació rep un pes (1 per defecte) multiplicat pels factors de
+# config_banner (SCRAPING_PRIORITY_*), i el scraper les treu d'una cua de
+# prioritat: amb el pressupost de temps just, les de menys pes són les que es
+# queden amb les dades anteriors.
+#
+# Perquè aquestes no quedin sempre a la cua, el pes també creix amb el temps que
+# porten sense refrescar (una mitja hora = +1). Les estacions amb fallades
+# recents (salut_estacions.py) van sempre al final.
+#
+# Ús:
+#   python src/prioritat_estacions.py
+
+# --- 1. IMPORTACIONS ---
+import re
+import sys
+import json
+import heapq
+from pathlib import Path
+from datetime import datetime
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import (STATIONS, BASE_DIR, DATA_DIR, SCRAPING_PRIORITY_WEIGHTS, SCRAPING_PRIORITY_ROTATION,
+                           SCRAPING_PRIORITY_SNOW, SCRAPING_SNOW_SEASON_MONTHS, SCRAPING_SNOW_MIN_ALTITUDE,
+                           SCRAPING_PRIORITY_ALERT, SCRAPING_ALERT_STATIONS, SCRAPING_ALERT_THRESHOLDS)
+
+# --- CONFIGURACIÓ ---
+RUTA_MANIFEST = Path(BASE_DIR) / 'public' / 'rotation_manifest.json'
+MINUTS_PERIODE = 30
+PERIODES_SENSE_REFRESCAR_MAX = 6   # Sense registres recents: com si portés 3 hores sense refrescar
+
+
+# --- 3. FACTORS ---
+def presencia_rotacio(ruta=RUTA_MANIFEST):
+    """
+    {codi: 0-1} segons rotation_manifest.json: les que surten més vegades i
+    abans a la rotació s'acosten a 1. Buit si encara no hi ha manifest.
+    """
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            ids = [e.get('id') for e in json.load(f).get('estacions', [])]
+    except (OSError, ValueError):
+        return {}
+    if not ids:
+        return {}
+    presencia = {}
+    for posicio, codi in enumerate(ids):
+        presencia[codi] = presencia.get(codi, 0) + 1 - posicio / len(ids)
+    maxim = max(presencia.values())
+    return {codi: valor / maxim for codi, valor in presencia.items()}
+
+def altitud(estacio):
+    """Altitud del nom ('Alt Àneu - Bonaigua (2.266 m)' → 2266) o None"""
+    coincidencia = re.search(r'\(([\d.]+) m\)', estacio.get('display_name', ''))
+    return int(coincidencia.group(1).replace('.', '')) if coincidencia else None
+
+def es_de_neu(estacio, registres):
+    return (any(r.get('VAR_GN_cm') not in ('', None) for r in registres)
+            or (altitud(estacio) or 0) >= SCRAPING_SNOW_MIN_ALTITUDE)
+
+def en_alerta(codi, registres):
+    """Avís manual o algun llindar superat al període més recent"""
+    if codi in SCRAPING_ALERT_STATIONS:
+        return True
+    avui = [r for r in registres if r.get('ES_AHIR') == 'NO'] or registres
+    if not avui:
+        return False
+    darrer = max(avui, key=lambda r: r.get('DATA_EXTRACCIO', ''))
+    for variable, llindar in SCRAPING_ALERT_THRESHOLDS.items():
+        try:
+            if float(darrer.get(variable)) >= llindar:
+                return True
+        except (TypeError, ValueError):
+            continue
+    return False
+
+def periodes_sense_refrescar(registres, ara):
+    """Mitges hores des del darrer refresc, sense comptar la de l'execució anterior"""
+    extraccions = [r.get('DATA_EXTRACCIO', '') for r in registres if r.get('ES_AHIR') == 'NO']
+    if not extraccions:
+        return PERIODES_SENSE_REFRESCAR_MAX
+    try:
+        darrera = datetime.strptime(max(extraccions), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return PERIODES_SENSE_REFRESCAR_MAX
+    minuts = (ara - darrera).total_seconds() / 60
+    return min(PERIODES_SENSE_REFRESCAR_MAX, max(0, int(minuts // MINUTS_PERIODE) - 1))
+
+
+# --- 4. PES I CUA ---
+def pes_estacio(estacio, registres, rotacio, ara):
+    """Pes de prioritat: el fix de config multiplicat per cada factor que li toca"""
+    codi = estacio.get('code')
+    pes = SCRAPING_PRIORITY_WEIGHTS.get(codi, 1.0)
+    pes *= 1 + SCRAPING_PRIORITY_ROTATION * rotacio.get(codi, 0)
+    if ara.month in SCRAPING_SNOW_SEASON_MONTHS and es_de_neu(estacio, registres):
+        pes *= SCRAPING_PRIORITY_SNOW
+    if en_alerta(codi, registres):
+        pes *= SCRAPING_PRIORITY_ALERT
+    return pes * (1 + periodes_sense_refrescar(registres, ara))
+
+def ordenar(estacions, anteriors, salut=None, ara=None):
+    """
+    Estacions en ordre de prioritat: primer les sanes per pes descendent (a igual
+    pes, l'ordre original), després les que tenen fallades recents.
+    anteriors: {codi: registres recents}; salut: registre de salut_estacions.
+    Retorna (estacions ordenades, {codi: pes}).
+    """
+    ara = ara or datetime.now()
+    salut = salut or {}
+    rotacio = presencia_rotacio()
+    pesos = {}
+    cua = []
+    for posicio, estacio in enumerate(estacions):
+        codi = estacio.get('code')
+        pesos[codi] = pes_estacio(estacio, anteriors.get(codi, []), rotacio, ara)
+        amb_fallades = salut.get(codi, {}).get('fallades_seguides', 0) > 0
+        heapq.heappush(cua, (amb_fallades, -pesos[codi], posicio, estacio))
+    return [heapq.heappop(cua)[-1] for _ in range(len(cua))], pesos
+
+
+# --- EXECUCIÓ DIRECTA ---
+if __name__ == "__main__":
+    ruta_json = Path(DATA_DIR) / 'resum_periode_meteocat.json'
+    anteriors = {}
+    try:
+        with open(ruta_json, 'r', encoding='utf-8') as f:
+            for registre in json.load(f).get('dades_periode', []):
+                anteriors.setdefault(registre.get('ID_ESTAC'), []).append(registre)
+    except (OSError, ValueError):
+        print(f"ℹ️  Sense dades anteriors ({ruta_json.name}): només pesos fixos, rotació i altitud")
+
+    ordenades, pesos = ordenar(STATIONS, anteriors, ara=datetime.now())
+    print(f"🎯 Ordre de prioritat de {len(ordenades)} estacions "
+          f"({'temporada de neu' if datetime.now().month in SCRAPING_SNOW_SEASON_MONTHS else 'fora de temporada de neu'})")
+    for posicio, estacio in enumerate(ordenades[:15], 1):
+        print(f"   {posicio:3}. {estacio.get('code'):>3} {pesos[estacio.get('code')]:7.2f}  {estacio.get('display_name', '')}")
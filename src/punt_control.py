@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# punt_control.py - Represa d'una execució dels scrapers interrompuda
+#
+# Cada estació acabada s'afegeix com una línia JSON al punt de control de la
+# finestra de temps actual (la mitja hora UTC per al scraper de períodes, el dia
+# per al resum diari), amb tot el que l'execució en necessita després. Si
+# l'execució es cancel·la (cancel-in-progress del workflow) o peta, la següent
+# dins de la mateixa finestra rellegeix el fitxer i reaprofita aquestes estacions
+# en lloc de tornar-les a descarregar. Una línia a mitges (tall durant l'escriptura)
+# s'ignora: aquella estació es torna a fer.
+#
+# Un cop desat el lot, el punt de control s'esborra; els d'altres finestres
+# s'esborren en obrir-ne un de nou.
+#
+# Ús:
+#   punt = PuntControlFinestra('periode', finestra_periode(), shard)
+#   if codi in punt.fetes: ...
+#   punt.marcar(codi, {'dades': [...]})
+#   punt.completar()
+
+# --- 1. IMPORTACIONS ---
+import os
+import sys
+import json
+from pathlib import Path
+from datetime import datetime
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import DATA_DIR
+
+# --- CONFIGURACIÓ ---
+DIRECTORI_PUNTS_CONTROL = Path(DATA_DIR) / 'punts_control'
+MINUTS_FINESTRA = 30
+
+
+# --- 3. FINESTRES ---
+def finestra_periode(ara=None):
+    """Mitja hora UTC en curs: 'AAAA-MM-DDTHHMM'"""
+    ara = ara or datetime.utcnow()
+    return ara.replace(minute=ara.minute // MINUTS_FINESTRA * MINUTS_FINESTRA).strftime('%Y-%m-%dT%H%M')
+
+
+# --- 4. PUNT DE CONTROL ---
+class PuntControlFinestra:
+    """Estacions acabades d'una execució (tipus, finestra i shard), en un fitxer JSONL"""
+
+    def __init__(self, tipus, finestra, shard=None, directori=DIRECTORI_PUNTS_CONTROL):
+        self.directori = Path(directori)
+        prefix = f"{tipus}_{shard[0]}de{shard[1]}_" if shard else f"{tipus}_"
+        self.ruta = self.directori / f"{prefix}{finestra}.jsonl"
+        self.fetes = {}
+
+        # Els d'altres finestres són d'execucions que ja no es poden reprendre
+        # (sense '_' a la resta del nom: 'periode_*' no ha d'esborrar 'periode_2de4_*')
+        for ruta in self.directori.glob(f"{prefix}*.jsonl"):
+            if ruta != self.ruta and '_' not in ruta.stem[len(prefix):]:
+                ruta.unlink(missing_ok=True)
+
+        if self.ruta.exists():
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                for linia in f:
+                    try:
+                        entrada = json.loads(linia)
+                        self.fetes[entrada['codi']] = entrada['contingut']
+                    except (ValueError, KeyError):
+                        continue
+
+    def marcar(self, codi, contingut):
+        """Afegeix una estació acabada (contingut serialitzable) i la força a disc"""
+        self.directori.mkdir(parents=True, exist_ok=True)
+        self.fetes[codi] = contingut
+        with open(self.ruta, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'codi': codi, 'contingut': contingut}, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def completar(self):
+        """El lot ja és desat: la represa ja no cal"""
+        self.ruta.unlink(missing_ok=True)
+        self.fetes = {}
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# recuperador_historic.py - Recuperació (backfill) de dies passats cap al magatzem històric
+#
+# Els scrapers només coneixen avui i ahir. Aquest script demana la pàgina de cada
+# dia (una per estació i dia, amb els 48 períodes semihoraris) per a un rang de
+# dates i un subconjunt d'estacions, amb diversos fils però sota el límit de
+# peticions compartit (limitador_peticions.py, també amb els altres scrapers). Cada parella estació-dia acabada queda al fitxer
+# de punt de control, de manera que es pot interrompre (Ctrl+C) i continuar.
+#
+# Ús:
+#   python src/recuperador_historic.py --desde 2026-01-01 --fins 2026-01-31
+#   python src/recuperador_historic.py --desde 2026-01-01 --fins 2026-01-31 --estacions YT,Z1 --fils 4
+
+# --- 1. IMPORTACIONS ---
+import sys
+import os
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import STATIONS, HISTORICAL_DIR
+
+from scraper_periode_complet import extreure_periode_desde_url
+from magatzem_historic import afegir_periodes, resum_magatzem
+import limitador_peticions
+
+# --- CONFIGURACIÓ ---
+PERIODES_PER_DIA = 48
+FILS_PER_DEFECTE = 4
+PETICIONS_PER_SEGON = limitador_peticions.SCRAPING_REQUESTS_PER_SECOND
+PUNT_CONTROL = os.path.join(HISTORICAL_DIR, 'recuperacio_punt_control.json')
+INFORME_CADA = 20  # Parelles estació-dia entre informes de progrés
+
+
+class PuntControl:
+    """Parelles 'CODI|AAAA-MM-DD' ja fetes, desades a disc de manera atòmica"""
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.bloqueig = threading.Lock()
+        self.fetes = {}
+        if self.ruta.exists():
+            try:
+                with open(self.ruta, 'r', encoding='utf-8') as f:
+                    self.fetes = json.load(f).get('fetes', {})
+            except (ValueError, OSError):
+                print(f"⚠️  Punt de control il·legible, es comença de nou: {self.ruta}")
+
+    @staticmethod
+    def clau(codi, dia):
+        return f"{codi}|{dia}"
+
+    def pendent(self, codi, dia, reintentar_buits=False):
+        estat = self.fetes.get(self.clau(codi, dia))
+        return estat is None or (reintentar_buits and estat == 0)
+
+    def marcar(self, codi, dia, periodes):
+        with self.bloqueig:
+            self.fetes[self.clau(codi, dia)] = periodes
+            temporal = self.ruta.with_suffix('.tmp')
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump({'actualitzat': datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                           'fetes': self.fetes}, f, ensure_ascii=False)
+            os.replace(temporal, self.ruta)
+
+
+def dies_del_rang(desde, fins):
+    """Llista de dates 'AAAA-MM-DD' de desde a fins (incloses)"""
+    dia = datetime.strptime(desde, "%Y-%m-%d")
+    final = datetime.strptime(fins, "%Y-%m-%d")
+    dies = []
+    while dia <= final:
+        dies.append(dia.strftime("%Y-%m-%d"))
+        dia += timedelta(days=1)
+    return dies
+
+def seleccionar_estacions(codis=None):
+    """Estacions actives de config_banner, o només les dels codis indicats"""
+    if not codis:
+        return [e['code'] for e in STATIONS]
+    disponibles = {e['code'] for e in STATIONS}
+    desconeguts = [c for c in codis if c not in disponibles]
+    if desconeguts:
+        print(f"⚠️  Codis no actius a config_banner.py (s'intentaran igualment): {', '.join(desconeguts)}")
+    return codis
+
+def recuperar_dia(codi, dia):
+    """
+    Descarrega el dia sencer d'una estació i l'afegeix al magatzem (el torn l'espera
+    el scraper). Si la pàgina no s'ha pogut obtenir llança ErrorDescarrega: la
+    parella no es marca com a feta.
+    """
+    periodes = extreure_periode_desde_url(codi, datetime.strptime(dia, "%Y-%m-%d"),
+                                          es_ahir=True, max_periodes=PERIODES_PER_DIA)
+    noves = afegir_periodes(periodes) if periodes else 0
+    return len(periodes), noves
+
+def executar_recuperacio(estacions, dies, fils=FILS_PER_DEFECTE, peticions_per_segon=PETICIONS_PER_SEGON,
+                         ruta_punt_control=PUNT_CONTROL, reintentar_buits=False):
+    """Recupera totes les parelles estació-dia pendents i retorna un resum"""
+    punt_control = PuntControl(ruta_punt_control)
+    feines = [(codi, dia) for dia in dies for codi in estacions
+              if punt_control.pendent(codi, dia, reintentar_buits)]
+    ja_fetes = len(estacions) * len(dies) - len(feines)
+
+    print(f"📋 {len(estacions)} estacions × {len(dies)} dies = {len(estacions) * len(dies)} parelles")
+    print(f"⏭️  Ja fetes (punt de control): {ja_fetes} | Pendents: {len(feines)}")
+    print(f"⚙️  {fils} fils, màxim {peticions_per_segon} peticions/s")
+    print("-" * 80)
+
+    limitador_peticions.configurar(peticions_per_segon)
+    inici = time.time()
+    fetes = buides = errors = periodes_nous = 0
+
+    executor = ThreadPoolExecutor(max_workers=fils)
+    try:
+        futurs = {executor.submit(recuperar_dia, codi, dia): (codi, dia) for codi, dia in feines}
+        for futur in as_completed(futurs):
+            codi, dia = futurs[futur]
+            try:
+                periodes, noves = futur.result()
+            except Exception as e:
+                # No es marca: es tornarà a provar a la propera execució
+                errors += 1
+                print(f"   ❌ {codi} {dia}: {e}")
+                continue
+
+            punt_control.marcar(codi, dia, periodes)
+            fetes += 1
+            periodes_nous += noves
+            if periodes == 0:
+                buides += 1
+
+            if fetes % INFORME_CADA == 0 or fetes == len(feines):
+                minuts = (time.time() - inici) / 60
+                print(f"   📈 {fetes}/{len(feines)} estació-dies | {periodes_nous} períodes nous | "
+                      f"{fetes / minuts if minuts else 0:.1f} estació-dies/min")
+    except KeyboardInterrupt:
+        print("\n⏸️  Interromput: el punt de control conserva el que s'ha fet")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+    minuts = (time.time() - inici) / 60
+    return {
+        'fetes': fetes,
+        'buides': buides,
+        'errors': errors,
+        'periodes_nous': periodes_nous,
+        'minuts': minuts,
+        'ritme': fetes / minuts if minuts else 0
+    }
+
+
+# --- EXECUCIÓ PRINCIPAL ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recuperació de dies passats cap al magatzem històric")
+    parser.add_argument('--desde', required=True, help="Primer dia (AAAA-MM-DD)")
+    parser.add_argument('--fins', default=(datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d"),
+                        help="Últim dia inclòs (AAAA-MM-DD, per defecte ahir)")
+    parser.add_argument('--estacions', default='', help="Codis separats per comes (per defecte totes les actives)")
+    parser.add_argument('--fils', type=int, default=FILS_PER_DEFECTE)
+    parser.add_argument('--peticions-per-segon', type=float, default=PETICIONS_PER_SEGON,
+                        help="Ritme d'aquest procés, com a molt el límit compartit (SCRAPING_REQUESTS_PER_SECOND)")
+    parser.add_argument('--punt-control', default=PUNT_CONTROL)
+    parser.add_argument('--reintentar-buits', action='store_true',
+                        help="Torna a demanar les parelles que no van retornar cap període")
+    args = parser.parse_args()
+    if args.peticions_per_segon > PETICIONS_PER_SEGON:
+        parser.error(f"--peticions-per-segon no pot superar el límit compartit ({PETICIONS_PER_SEGON}/s)")
+
+    print("\n" + "=" * 80)
+    print("⏪ RECUPERACIÓ HISTÒRICA - Dies passats cap al magatzem")
+    print("=" * 80)
+
+    estacions = seleccionar_estacions([c.strip() for c in args.estacions.split(',') if c.strip()])
+    dies = dies_del_rang(args.desde, args.fins)
+    if not dies:
+        print("❌ Rang de dates buit")
+        sys.exit(1)
+
+    try:
+        resum = executar_recuperacio(estacions, dies, args.fils, args.peticions_per_segon,
+                                     args.punt_control, args.reintentar_buits)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    magatzem = resum_magatzem()
+    print("\n" + "=" * 80)
+    print("📊 RESULTATS")
+    print("=" * 80)
+    print(f"✅ Estació-dies fets: {resum['fetes']} ({resum['buides']} sense dades)")
+    print(f"🗄️  Períodes nous: {resum['periodes_nous']}")
+    print(f"❌ Errors (es reintentaran): {resum['errors']}")
+    print(f"⏱️  {resum['minuts']:.1f} min → {resum['ritme']:.1f} estació-dies/min")
+    print(f"📦 Magatzem: {magatzem['observacions']} observacions ({magatzem['primer']} → {magatzem['darrer']})")
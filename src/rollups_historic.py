@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# rollups_historic.py - Agregats horaris, diaris i mensuals materialitzats al magatzem
+#
+# Per estació i per comarca. Igual que agregador_diari, cada període nou suma a les
+# files que li toquen (3 nivells × 2 àmbits) amb un UPSERT, de manera que les
+# consultes de context a llarg termini són una lectura per clau primària en lloc
+# de recórrer milers de files semihoràries.
+#
+# Els horaris (24 files per dia, estació i comarca) només es guarden mentre les
+# observacions són al SQLite: la compactació (manteniment_historic.py) esborra els
+# anteriors a compactat_fins. Els diaris i mensuals es guarden sempre.
+#
+# Ús:
+#   python src/rollups_historic.py --reconstrueix
+#   python src/rollups_historic.py --nivell mes --ambit comarca --clau "Pallars Sobirà"
+
+# --- 1. IMPORTACIONS ---
+import sys
+import sqlite3
+import argparse
+from pathlib import Path
+from functools import lru_cache
+
+import pandas as pd
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import DATA_DIR, HISTORICAL_DB
+
+import magatzem_historic
+
+# --- CONFIGURACIÓ ---
+FITXER_METADADES = Path(DATA_DIR) / "Totes_les_dades_de_les_estacions.xlsx"
+NIVELLS = {
+    'hora': lambda instant: instant[:13] + ':00Z',
+    'dia': lambda instant: instant[:10],
+    'mes': lambda instant: instant[:7]
+}
+VARIABLES_SUMA = ['tm', 'hr', 'ppt', 'pm', 'rs']
+VARIABLES_MAXIM = ['tx', 'vvx', 'gn']
+VARIABLES_MINIM = ['tn']
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS rollups (
+    nivell TEXT NOT NULL,           -- 'hora' | 'dia' | 'mes'
+    ambit TEXT NOT NULL,            -- 'estacio' | 'comarca'
+    clau TEXT NOT NULL,             -- codi d'estació o nom de comarca
+    inici TEXT NOT NULL,            -- 'AAAA-MM-DDTHH:00Z' | 'AAAA-MM-DD' | 'AAAA-MM'
+    n_periodes INTEGER NOT NULL,
+    {', '.join(f'suma_{v} REAL NOT NULL DEFAULT 0, n_{v} INTEGER NOT NULL DEFAULT 0' for v in VARIABLES_SUMA)},
+    {', '.join(f'{v} REAL' for v in VARIABLES_MAXIM + VARIABLES_MINIM)},
+    PRIMARY KEY (nivell, ambit, clau, inici)
+) WITHOUT ROWID;
+"""
+
+
+def _sql_acumular():
+    columnes = ['nivell', 'ambit', 'clau', 'inici', 'n_periodes']
+    columnes += [c for v in VARIABLES_SUMA for c in (f'suma_{v}', f'n_{v}')]
+    columnes += VARIABLES_MAXIM + VARIABLES_MINIM
+
+    actualitzacions = ["n_periodes = n_periodes + 1"]
+    for v in VARIABLES_SUMA:
+        actualitzacions.append(f"suma_{v} = suma_{v} + excluded.suma_{v}")
+        actualitzacions.append(f"n_{v} = n_{v} + excluded.n_{v}")
+    # max()/min() escalars de SQLite retornen NULL si algun argument ho és
+    for v in VARIABLES_MAXIM:
+        actualitzacions.append(f"{v} = max(coalesce({v}, excluded.{v}), coalesce(excluded.{v}, {v}))")
+    for v in VARIABLES_MINIM:
+        actualitzacions.append(f"{v} = min(coalesce({v}, excluded.{v}), coalesce(excluded.{v}, {v}))")
+
+    return (f"INSERT INTO rollups ({', '.join(columnes)}) VALUES ({', '.join('?' * len(columnes))}) "
+            f"ON CONFLICT(nivell, ambit, clau, inici) DO UPDATE SET {', '.join(actualitzacions)}")
+
+SQL_ACUMULAR = _sql_acumular()
+
+
+# --- 3. COMARQUES ---
+@lru_cache(maxsize=1)
+def comarques_estacions():
+    """{codi_estació: comarca} de l'Excel de metadades (el mateix que llegeix el generador)"""
+    try:
+        df = pd.read_excel(FITXER_METADADES)
+    except Exception as e:
+        print(f"⚠️  Sense comarques per als rollups ({e})")
+        return {}
+    col_id = next((c for c in ('ID', 'Codi', 'CÓDIGO') if c in df.columns), None)
+    col_comarca = next((c for c in ('Comarca', 'COMARCA') if c in df.columns), None)
+    if not col_id or not col_comarca:
+        return {}
+    return {str(r[col_id]).strip(): str(r[col_comarca]).strip()
+            for _, r in df.iloc[1:].iterrows() if pd.notna(r[col_id]) and pd.notna(r[col_comarca])}
+
+
+# --- 4. ACTUALITZACIÓ INCREMENTAL ---
+def preparar(connexio):
+    """Crea la taula de rollups si no existeix"""
+    connexio.executescript(ESQUEMA)
+
+def acumular(connexio, id_estac, instant, valors):
+    """Suma un període nou a les seves files horària, diària i mensual (estació i comarca)"""
+    valors_fila = [1]
+    for v in VARIABLES_SUMA:
+        valor = valors.get(v)
+        valors_fila += [valor or 0, 0 if valor is None else 1]
+    valors_fila += [valors.get(v) for v in VARIABLES_MAXIM + VARIABLES_MINIM]
+
+    ambits = [('estacio', id_estac)]
+    comarca = comarques_estacions().get(id_estac)
+    if comarca:
+        ambits.append(('comarca', comarca))
+
+    connexio.executemany(SQL_ACUMULAR, [
+        (nivell, ambit, clau, inici_de(instant), *valors_fila)
+        for nivell, inici_de in NIVELLS.items()
+        for ambit, clau in ambits
+    ])
+
+def podar_hores(connexio, limit):
+    """Esborra els rollups horaris anteriors a 'limit'. Retorna les files esborrades"""
+    preparar(connexio)
+    return connexio.execute("DELETE FROM rollups WHERE nivell = 'hora' AND inici < ?", (limit,)).rowcount
+
+def reconstruir(ruta_db=HISTORICAL_DB):
+    """Torna a calcular tots els rollups a partir de les observacions i dels segments compactats"""
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        preparar(connexio)
+        total = 0
+        with connexio:
+            connexio.execute("DELETE FROM rollups")
+            for id_estac, instant, valors in magatzem_historic.totes_les_files(connexio):
+                acumular(connexio, id_estac, instant, valors)
+                total += 1
+            limit_compactat = magatzem_historic.compactat_fins(connexio)
+            if limit_compactat:
+                podar_hores(connexio, limit_compactat)
+        return total
+    finally:
+        connexio.close()
+
+
+# --- 5. LECTURA ---
+def derivar(fila):
+    """Afegeix a una fila de rollups les mitjanes i el total de precipitació"""
+    r = dict(fila)
+    for v in ('tm', 'hr', 'pm'):
+        r[f'{v}_mitjana'] = round(r[f'suma_{v}'] / r[f'n_{v}'], 1) if r[f'n_{v}'] else None
+    # Per estació, el total acumulat; per comarca, la mitjana per estació i període
+    if r['ambit'] == 'estacio':
+        r['ppt_total'] = round(r['suma_ppt'], 1) if r['n_ppt'] else None
+    else:
+        r['ppt_mitjana_periode'] = round(r['suma_ppt'] / r['n_ppt'], 2) if r['n_ppt'] else None
+    return r
+
+def llegir_rollups(nivell, clau, ambit='estacio', desde=None, fins=None, ruta_db=HISTORICAL_DB):
+    """Files d'una estació o comarca i nivell, ordenades per inici (rang inclòs)"""
+    if not Path(ruta_db).exists():
+        return []
+    condicions = ["nivell = ?", "ambit = ?", "clau = ?"]
+    parametres = [nivell, ambit, clau]
+    if desde:
+        condicions.append("inici >= ?")
+        parametres.append(desde)
+    if fins:
+        condicions.append("inici <= ?")
+        parametres.append(fins)
+
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        preparar(connexio)
+        connexio.row_factory = sqlite3.Row
+        return [derivar(f) for f in connexio.execute(
+            f"SELECT * FROM rollups WHERE {' AND '.join(condicions)} ORDER BY inici", parametres)]
+    finally:
+        connexio.close()
+
+def rollups_de_periode(nivell, inici, ambit='estacio', ruta_db=HISTORICAL_DB):
+    """{clau: fila} de totes les estacions (o comarques) per a un mateix interval"""
+    if not Path(ruta_db).exists():
+        return {}
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        preparar(connexio)
+        connexio.row_factory = sqlite3.Row
+        return {f['clau']: derivar(f) for f in connexio.execute(
+            "SELECT * FROM rollups WHERE nivell = ? AND ambit = ? AND inici = ?", (nivell, ambit, inici))}
+    finally:
+        connexio.close()
+
+
+# --- EXECUCIÓ DIRECTA ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rollups horaris/diaris/mensuals del magatzem històric")
+    parser.add_argument('--reconstrueix', action='store_true', help="Recalcula tots els rollups des de zero")
+    parser.add_argument('--nivell', choices=list(NIVELLS), default='dia')
+    parser.add_argument('--ambit', choices=['estacio', 'comarca'], default='estacio')
+    parser.add_argument('--clau', help="Codi d'estació o nom de comarca a consultar")
+    parser.add_argument('--desde')
+    parser.add_argument('--fins')
+    args = parser.parse_args()
+
+    if args.reconstrueix:
+        total = reconstruir()
+        print(f"🔁 Rollups reconstruïts a partir de {total} períodes")
+
+    if args.clau:
+        for r in llegir_rollups(args.nivell, args.clau, args.ambit, args.desde, args.fins):
+            print(f"   {r['inici']}: TM {r['tm_mitjana']} | TX {r['tx']} | TN {r['tn']} | "
+                  f"PPT {r.get('ppt_total', r.get('ppt_mitjana_periode'))} | {r['n_periodes']} períodes")
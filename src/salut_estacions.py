@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# salut_estacions.py - Registre de salut de les estacions entre execucions
+#
+# Una estació aturada, donada de baixa o sense taula (NO_TAULA_TROBADA) es
+# menjava a cada execució la cerca retroactiva sencera (MAX_INTENTS_AVUI
+# peticions) per acabar igualment en NO_TROBAT. Aquí es porta el compte, per
+# estació, de les fallades seguides i del darrer èxit (taula salut_estacions del
+# magatzem). A partir de LLINDAR_FALLADES fallades seguides l'estació entra en
+# repòs: no es torna a sondejar fins que passa un temps que es dobla a cada nova
+# fallada (REPOS_BASE, 2×, 4×... fins a REPOS_MAXIM). Quan li toca, se li fa una
+# sonda curta (INTENTS_EN_PROVA franges); el primer èxit la torna a posar sana.
+#
+# Només compta el que diu alguna cosa de l'estació: pàgines sense taula o sense
+# el període. Els errors de xarxa (ERROR_DESCARREGA: timeouts, HTTP, límit de
+# peticions) no sumen fallades, i quan en una mateixa execució falla la majoria
+# d'estacions és la web la que falla, no elles: aquella execució no en suma cap.
+#
+# Ús:
+#   python src/salut_estacions.py
+#   python src/salut_estacions.py --reinicia YT Z1
+
+# --- 1. IMPORTACIONS ---
+import sys
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import HISTORICAL_DB
+
+import magatzem_historic
+
+# --- CONFIGURACIÓ ---
+LLINDAR_FALLADES = 2                   # Fallades seguides per entrar en repòs
+REPOS_BASE = timedelta(minutes=30)     # Primer repòs (una execució semihorària)
+REPOS_MAXIM = timedelta(hours=24)
+INTENTS_EN_PROVA = 2                   # Franges de la cerca d'avui per a una estació amb fallades
+FRACCIO_CAIGUDA_GENERAL = 0.5          # Més fallades que això en una execució: caiguda de la web
+MIN_ESTACIONS_CAIGUDA = 4              # Per sota, una execució no basta per parlar de caiguda
+ERROR_DESCARREGA = 'ERROR_DESCARREGA'  # ESTAT d'una cerca sense cap pàgina descarregada
+FORMAT_MOMENT = '%Y-%m-%dT%H:%MZ'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS salut_estacions (
+    id_estac TEXT PRIMARY KEY,
+    fallades_seguides INTEGER NOT NULL DEFAULT 0,
+    darrer_exit TEXT,               -- 'AAAA-MM-DDTHH:MMZ'
+    darrera_fallada TEXT,
+    darrer_estat TEXT,              -- ESTAT de la darrera fallada (NO_TROBAT_AFTER_6_INTENTS...)
+    repos_fins TEXT                 -- no es torna a sondejar abans d'aquest moment
+) WITHOUT ROWID;
+"""
+
+
+# --- 3. REPÒS ---
+def temps_de_repos(fallades):
+    """Repòs després de 'fallades' fallades seguides (zero per sota del llindar)"""
+    if fallades < LLINDAR_FALLADES:
+        return timedelta(0)
+    return min(REPOS_BASE * 2 ** (fallades - LLINDAR_FALLADES), REPOS_MAXIM)
+
+def en_repos(salut, codi, ara=None):
+    """L'estació encara no s'ha de tornar a sondejar?"""
+    repos_fins = salut.get(codi, {}).get('repos_fins')
+    return bool(repos_fins) and repos_fins > (ara or datetime.utcnow()).strftime(FORMAT_MOMENT)
+
+def intents_cerca(salut, codi, maxim):
+    """Franges de la cerca d'avui: totes per a una estació sana, una sonda curta si ve de fallar"""
+    if salut.get(codi, {}).get('fallades_seguides', 0) > 0:
+        return min(maxim, INTENTS_EN_PROVA)
+    return maxim
+
+def classificar(salut, codis, ara=None):
+    """{'sanes', 'inestables' (fallades per sota del llindar), 'en_repos'} → llistes de codis"""
+    grups = {'sanes': [], 'inestables': [], 'en_repos': []}
+    for codi in codis:
+        if en_repos(salut, codi, ara):
+            grups['en_repos'].append(codi)
+        elif salut.get(codi, {}).get('fallades_seguides', 0) > 0:
+            grups['inestables'].append(codi)
+        else:
+            grups['sanes'].append(codi)
+    return grups
+
+
+def caiguda_general(resultats):
+    """En aquesta execució ha fallat la majoria d'estacions (la web, no elles)?"""
+    fallides = sum(1 for estat in resultats.values() if estat is not None)
+    return len(resultats) >= MIN_ESTACIONS_CAIGUDA and fallides > FRACCIO_CAIGUDA_GENERAL * len(resultats)
+
+
+# --- 4. REGISTRE ---
+def carregar(ruta_db=HISTORICAL_DB):
+    """{id_estac: {'fallades_seguides', 'darrer_exit', 'darrera_fallada', 'darrer_estat', 'repos_fins'}}"""
+    if not Path(ruta_db).exists():
+        return {}
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        connexio.executescript(ESQUEMA)
+        cursor = connexio.execute("SELECT * FROM salut_estacions")
+        columnes = [c[0] for c in cursor.description]
+        return {fila[0]: dict(zip(columnes[1:], fila[1:])) for fila in cursor}
+    finally:
+        connexio.close()
+
+def registrar(resultats, ruta_db=HISTORICAL_DB, ara=None):
+    """
+    resultats: {id_estac: None si ha donat el període d'avui, o l'ESTAT de la fallada}.
+    Actualitza el registre i retorna {id_estac: fallades seguides} de les que han fallat.
+    Els errors de xarxa i les fallades d'una caiguda general no hi compten.
+    """
+    if not resultats:
+        return {}
+    ara = ara or datetime.utcnow()
+    moment = ara.strftime(FORMAT_MOMENT)
+    salut = carregar(ruta_db)
+    general = caiguda_general(resultats)
+    files = []
+    fallades = {}
+    for codi, estat in resultats.items():
+        anterior = salut.get(codi, {})
+        if estat is None:
+            files.append((codi, 0, moment, anterior.get('darrera_fallada'), anterior.get('darrer_estat'), None))
+            continue
+        if general or estat == ERROR_DESCARREGA:
+            continue
+        seguides = anterior.get('fallades_seguides', 0) + 1
+        repos = temps_de_repos(seguides)
+        files.append((codi, seguides, anterior.get('darrer_exit'), moment, estat,
+                      (ara + repos).strftime(FORMAT_MOMENT) if repos else None))
+        fallades[codi] = seguides
+
+    if not files:
+        return fallades
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        connexio.executescript(ESQUEMA)
+        with connexio:
+            connexio.executemany("INSERT OR REPLACE INTO salut_estacions VALUES (?, ?, ?, ?, ?, ?)", files)
+    finally:
+        connexio.close()
+    return fallades
+
+def reiniciar(codis, ruta_db=HISTORICAL_DB):
+    """Oblida l'historial d'unes estacions (p. ex. un cop reparades): tornen a ser sanes"""
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        connexio.executescript(ESQUEMA)
+        with connexio:
+            return connexio.executemany("DELETE FROM salut_estacions WHERE id_estac = ?",
+                                        [(codi,) for codi in codis]).rowcount
+    finally:
+        connexio.close()
+
+
+# --- EXECUCIÓ DIRECTA ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registre de salut de les estacions")
+    parser.add_argument('--reinicia', nargs='+', metavar='CODI', help="Torna a posar sanes aquestes estacions")
+    args = parser.parse_args()
+
+    if args.reinicia:
+        print(f"🩺 {reiniciar(args.reinicia)} estacions reiniciades")
+        sys.exit(0)
+
+    salut = carregar()
+    amb_fallades = {codi: fila for codi, fila in salut.items() if fila['fallades_seguides'] > 0}
+    if not amb_fallades:
+        print(f"🩺 Cap estació amb fallades ({len(salut)} al registre)")
+        sys.exit(0)
+
+    grups = classificar(salut, amb_fallades)
+    print(f"🩺 {len(amb_fallades)} estacions amb fallades: {len(grups['en_repos'])} en repòs, "
+          f"{len(grups['inestables'])} inestables")
+    for codi, fila in sorted(amb_fallades.items(), key=lambda e: -e[1]['fallades_seguides']):
+        repos = f", repòs fins {fila['repos_fins']}" if codi in grups['en_repos'] else ""
+        print(f"   {codi}: {fila['fallades_seguides']} fallades ({fila['darrer_estat']}), "
+              f"darrer èxit {fila['darrer_exit'] or 'mai'}{repos}")
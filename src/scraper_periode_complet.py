@@ -6,7 +6,9 @@ import sys
 import time
 import json
 import re
+import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 import requests
 from bs4 import BeautifulSoup
@@ -23,11 +25,55 @@ except ImportError as e:
     print(f"❌ Error important la configuració: {e}")
     sys.exit(1)
 
+from fusiona_shards import llegir_shard, estacions_del_shard, desar_shard
+from limitador_peticions import esperar_torn
+from pressupost_temps import Pressupost, fixar_limit
+from punt_control import PuntControlFinestra, finestra_periode
+import salut_estacions
+import prioritat_estacions
+
 # --- CONFIGURACIÓ ---
 BASE_URL = "https://www.meteo.cat/observacions/xema/dades"
-DELAI_ENTRE_PETICIONS = 1  # Segons entre peticions
+# El ritme de peticions el marca limitador_peticions.py (compartit entre processos)
 MAX_INTENTS_AVUI = 6  # Màxim de períodes a provar cap enrere per a avui (3 hores)
 MAX_PERIODES_AHIR = 4  # Número de períodes a capturar d'ahir (2 hores)
+PERIODES_DIA = 48  # Una pàgina de dia porta fins a 48 períodes semihoraris
+SONDES_PARALLELES = 3  # Màxim de franges d'avui en curs alhora (1 = cerca seqüencial)
+LLINDAR_COBERTURA = 4.0  # Segons sense resposta abans de demanar també la franja anterior
+
+# Una sola sessió HTTP per a totes les peticions: reutilitza les connexions
+# (keep-alive) i, en mode dimoni, es manté oberta entre cicles
+SESSIO = requests.Session()
+SESSIO.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# La resta de períodes de les pàgines ja descarregades: no van al JSON del banner,
+# però sí al magatzem històric (l'agregador diari en calcula el resum del dia)
+PERIODES_NOMES_MAGATZEM = []
+
+# Retard de publicació après per estació (latencia_publicacio.py) i consultes
+# d'aquesta execució que l'alimenten: (codi, període demanat, registre més recent, moment)
+MODEL_LATENCIA = {}
+CONSULTES_LATENCIA = []
+
+# Límit de temps de l'execució (el fixa l'executor; sense, il·limitat)
+PRESSUPOST = Pressupost.de_l_entorn()
+COST_INICIAL_ESTACIO = 4   # Segons estimats per estació abans de tenir-ne cap de feta
+
+# Salut de les estacions entre execucions (salut_estacions.py) i resultat de la
+# cerca d'avui en aquesta: codi → None (trobat) o l'ESTAT de la fallada
+SALUT = {}
+RESULTATS_SALUT = {}
+EDAT_MAXIMA_HERETATS = timedelta(hours=3)  # Registres anteriors que encara es poden reaprofitar
+
+# Cerca d'avui: primer només la franja més recent (la pàgina ja porta el darrer
+# període publicat); l'anterior només es demana si aquella torna buida o triga més
+# de LLINDAR_COBERTURA. El torn del limitador es pren abans d'enviar cada sonda,
+# de manera que les que no calen ni s'envien ni gasten torn.
+_SONDES = None
+ESTADISTIQUES_SONDES = {'cerques': 0, 'peticions': 0, 'cobertures': 0, 'descartades': 0}
+
+class ErrorDescarrega(Exception):
+    """La pàgina no s'ha pogut obtenir (xarxa, HTTP, timeout o pressupost esgotat): no és una pàgina buida"""
 
 # Diccionari de columnes esperades (posició → nom curt)
 MAP_COLUMNES = {
@@ -85,10 +131,15 @@ def neteja_nom_capcalera(text):
     
     return net[:50]  # Limitar longitud
 
-def calcular_hora_inicial_avui():
+def calcular_hora_inicial_avui(retard_minuts=None):
     """Calcula l'hora UTC inicial per començar la cerca retroactiva"""
     ara_utc = datetime.utcnow()
     
+    if retard_minuts is not None:
+        # Retard après de l'estació: el període més recent que ja hauria de ser publicat
+        disponible = ara_utc - timedelta(minutes=30 + retard_minuts)
+        return disponible.replace(minute=30 if disponible.minute >= 30 else 0, second=0, microsecond=0)
+    
     # Ajustar: restem 40 minuts per al retard típic de publicació
     hora_ajustada = ara_utc - timedelta(minutes=20)  # ← TORNA A L'ORIGINAL
     
@@ -107,14 +158,21 @@ def calcular_hora_inicial_avui():
     
     return hora_inicial
 
-def extreure_periode_desde_url(codi_estacio, data_hora_utc, es_ahir=False):
+def extreure_periode_desde_url(codi_estacio, data_hora_utc, es_ahir=False, max_periodes=None, amb_torn=False):
     """
     Extreu períodes vàlids d'una URL específica
     
     Retorna:
     - Si es_ahir=False: Llista amb 0 o 1 períodes (l'últim vàlid)
     - Si es_ahir=True: Llista amb fins a MAX_PERIODES_AHIR períodes (els darrers vàlids)
+    - Si s'indica max_periodes: fins a max_periodes períodes (p. ex. 48 = dia sencer)
+    
+    Una llista buida vol dir que la pàgina no té cap període vàlid. Si la pàgina no
+    s'ha pogut descarregar, llança ErrorDescarrega. amb_torn: el torn del limitador
+    ja l'ha pres qui crida.
     """
+    if max_periodes is None:
+        max_periodes = MAX_PERIODES_AHIR if es_ahir else 1
     # Format: 2026-01-20T13:30Z
     data_str = data_hora_utc.strftime("%Y-%m-%d")
     hora_str = data_hora_utc.strftime("%H:%M")
@@ -123,13 +181,17 @@ def extreure_periode_desde_url(codi_estacio, data_hora_utc, es_ahir=False):
     # Obtenir info de l'estació
     info_estacio = obtenir_info_estacio(codi_estacio)
     
+    timeout = PRESSUPOST.timeout(15)
+    if not timeout:
+        raise ErrorDescarrega("pressupost de temps esgotat")
+    
     try:
-        resposta = requests.get(url, timeout=15)
+        if not amb_torn:
+            esperar_torn()
+        resposta = SESSIO.get(url, timeout=timeout)
         resposta.raise_for_status()
-    except requests.exceptions.Timeout:
-        return []
-    except requests.exceptions.RequestException:
-        return []
+    except requests.exceptions.RequestException as e:
+        raise ErrorDescarrega(f"{codi_estacio} {data_str}T{hora_str}Z: {e}") from e
     
     soup = BeautifulSoup(resposta.text, 'html.parser')
     taula = soup.find('table', {'class': 'tblperiode'})
@@ -217,46 +279,106 @@ def extreure_periode_desde_url(codi_estacio, data_hora_utc, es_ahir=False):
             
             periodes_trobats.append(registre)
             
-            # Si no és ahir, només volem un període
-            if not es_ahir:
-                break
-            
-            # Si és ahir, limitem als darrers MAX_PERIODES_AHIR períodes
-            if len(periodes_trobats) >= MAX_PERIODES_AHIR:
+            # Avui només volem un període; ahir, els darrers MAX_PERIODES_AHIR
+            if len(periodes_trobats) >= max_periodes:
                 break
     
     return periodes_trobats
 
-def cerca_periode_avui(codi_estacio):
+def executor_sondes():
+    global _SONDES
+    if _SONDES is None:
+        _SONDES = ThreadPoolExecutor(max_workers=2 * SONDES_PARALLELES, thread_name_prefix='sonda')
+    return _SONDES
+
+def sondejar(codi_estacio, hora):
+    """
+    Una franja candidata (amb el torn ja pres): (períodes de la pàgina, moment de la
+    resposta, cert si la pàgina no s'ha pogut descarregar)
+    """
+    try:
+        periodes = extreure_periode_desde_url(codi_estacio, hora, es_ahir=False, max_periodes=PERIODES_DIA,
+                                              amb_torn=True)
+    except Exception as e:
+        print(f"      ⚠️  Error a la franja {hora.strftime('%H:%M')}: {e}")
+        return [], datetime.utcnow(), True
+    return periodes, datetime.utcnow(), False
+
+def sondes_escalonades(codi_estacio, franges):
+    """
+    Demana les franges de la més recent a la més antiga i retorna (índex, períodes)
+    de la més recent amb dades, o (None, []) si cap en té; el tercer valor és cert
+    si no s'ha pogut descarregar cap pàgina (error de xarxa). La franja següent només
+    s'envia quan totes les que són en curs han tornat buides o quan la darrera
+    enviada porta LLINDAR_COBERTURA segons sense respondre (com a molt
+    SONDES_PARALLELES en curs). Una franja només guanya quan totes les més recents
+    han respost buit; les que encara són en curs es descarten.
+    """
+    respostes = [None] * len(franges)
+    errors = 0
+    en_curs = {}
+    enviada = None
+    seguent = 0
+    ESTADISTIQUES_SONDES['cerques'] += 1
+    while True:
+        # Si una franja ja té dades, les més antigues ja no poden guanyar
+        pot_enviar = (seguent < len(franges) and len(en_curs) < SONDES_PARALLELES
+                      and not any(respostes) and not PRESSUPOST.esgotat())
+        if pot_enviar and (not en_curs or time.monotonic() - enviada >= LLINDAR_COBERTURA):
+            if en_curs:
+                ESTADISTIQUES_SONDES['cobertures'] += 1
+            esperar_torn()
+            en_curs[executor_sondes().submit(sondejar, codi_estacio, franges[seguent])] = seguent
+            enviada = time.monotonic()
+            seguent += 1
+        if not en_curs:
+            break
+
+        fets, _ = wait(list(en_curs), return_when=FIRST_COMPLETED,
+                       timeout=max(0.0, enviada + LLINDAR_COBERTURA - time.monotonic()) if pot_enviar else None)
+        for futur in fets:
+            i = en_curs.pop(futur)
+            respostes[i], moment, error = futur.result()
+            errors += error
+            ESTADISTIQUES_SONDES['peticions'] += 1
+            CONSULTES_LATENCIA.append((codi_estacio, franges[i], respostes[i][0] if respostes[i] else None, moment))
+        for i, periodes in enumerate(respostes[:seguent]):
+            if periodes is None:
+                break
+            if periodes:
+                ESTADISTIQUES_SONDES['descartades'] += len(en_curs)
+                return i, periodes, False
+
+    return None, [], errors > 0 and errors == sum(r is not None for r in respostes)
+
+def cerca_periode_avui(codi_estacio, hora_inicial=None, max_intents=MAX_INTENTS_AVUI):
     """Cerca retroactiva per al dia actual (retorna 0 o 1 període)"""
-    hora_inicial = calcular_hora_inicial_avui()
-    intents = 0
+    hora_inicial = hora_inicial or calcular_hora_inicial_avui(MODEL_LATENCIA.get(codi_estacio))
+    franges = [hora_inicial - timedelta(minutes=30 * i) for i in range(max_intents)]
     
     print(f"      ⏰ Cerca començant a: {hora_inicial.strftime('%H:%M')} UTC")
     
-    while intents < MAX_INTENTS_AVUI:
-        periodes = extreure_periode_desde_url(codi_estacio, hora_inicial, es_ahir=False)
+    index, periodes, sense_pagina = sondes_escalonades(codi_estacio, franges)
+    if periodes:
+        periode = periodes[0]
+        PERIODES_NOMES_MAGATZEM.extend(periodes[1:])
+        print(f"      ✅ Trobat període: {periode.get('PERIODE_UTC', 'N/D')}"
+              + (f" (franja {franges[index].strftime('%H:%M')})" if index else ""))
         
-        if periodes:
-            periode = periodes[0]
-            print(f"      ✅ Trobat període: {periode.get('PERIODE_UTC', 'N/D')}")
-            
-            # Mostrar les variables trobades
-            vars_trobades = [k for k in periode.keys() if k.startswith('VAR_')]
-            print(f"      📊 Variables: {len(vars_trobades)}")
-            
-            return periode
-        else:
-            hora_inicial = hora_inicial - timedelta(minutes=30)
-            intents += 1
-            print(f"      🔄 Provant 30 min abans: {hora_inicial.strftime('%H:%M')} UTC")
-            time.sleep(0.5)
-    
-    print(f"      ❌ No trobat després de {MAX_INTENTS_AVUI} intents")
+        # Mostrar les variables trobades
+        vars_trobades = [k for k in periode.keys() if k.startswith('VAR_')]
+        print(f"      📊 Variables: {len(vars_trobades)}")
+        
+        return periode
+    
+    if sense_pagina:
+        print(f"      ❌ Cap pàgina descarregada (error de xarxa)")
+    else:
+        print(f"      ❌ No trobat després de {max_intents} intents")
     return {
         'ID_ESTAC': codi_estacio,
         'NOM_ESTACIO': obtenir_info_estacio(codi_estacio)['nom'],
-        'ESTAT': f'NO_TROBAT_AFTER_{MAX_INTENTS_AVUI}_INTENTS',
+        'ESTAT': salut_estacions.ERROR_DESCARREGA if sense_pagina else f'NO_TROBAT_AFTER_{max_intents}_INTENTS',
         'ES_AHIR': 'NO',
         'PERIODE_UTC': '',
         'DATA_EXTRACCIO': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -268,7 +390,14 @@ def obtenir_periodes_ahir(codi_estacio):
     ahir_mitjanit = ahir.replace(hour=0, minute=0, second=0, microsecond=0)
     
     print(f"      📅 Consultant ahir ({ahir.strftime('%Y-%m-%d')})...")
-    periodes = extreure_periode_desde_url(codi_estacio, ahir_mitjanit, es_ahir=True)
+    try:
+        periodes = extreure_periode_desde_url(codi_estacio, ahir_mitjanit, es_ahir=True,
+                                              max_periodes=PERIODES_DIA)
+    except ErrorDescarrega as e:
+        print(f"      ⚠️  No s'han pogut consultar les dades d'ahir: {e}")
+        return []
+    PERIODES_NOMES_MAGATZEM.extend(periodes[MAX_PERIODES_AHIR:])
+    periodes = periodes[:MAX_PERIODES_AHIR]
     
     if periodes:
         print(f"      ✅ Trobats {len(periodes)} períodes d'ahir")
@@ -295,8 +424,14 @@ def detectar_capcaleres_estacio(codi_estacio):
         'CAPÇALERES_LLISTAT': ''
     }
     
+    timeout = PRESSUPOST.timeout(10)
+    if not timeout:
+        resultats['ESTAT'] = 'SENSE_TEMPS'
+        return resultats
+    
     try:
-        resposta = requests.get(url, timeout=10)
+        esperar_torn()
+        resposta = SESSIO.get(url, timeout=timeout)
         resposta.raise_for_status()
     except requests.exceptions.RequestException as e:
         resultats['ESTAT'] = f'ERROR: {str(e)[:50]}'
@@ -336,31 +471,148 @@ def detectar_capcaleres_estacio(codi_estacio):
     
     return resultats
 
-def executa_scraping_intelligent(llista_estacions, mode):
-    """Executa el scraping en mode intel·ligent"""
+def capcaleres_del_periode(codi_estacio, nom, periode):
+    """Estudi de capçaleres a partir d'un període ja descarregat (sense cap petició més)"""
+    return {
+        'ID_ESTAC': codi_estacio,
+        'NOM_ESTACIO': nom,
+        'ESTAT': 'OK',
+        'CAPÇALERES_TROBADES': periode.get('CAPÇALERES_TROBADES', 0),
+        'CAPÇALERES_LLISTAT': periode.get('CAPÇALERES_LLISTAT', ''),
+        'URL_FONT': periode.get('URL_FONT', '')
+    }
+
+def registres_anteriors():
+    """
+    Registres i capçaleres de l'execució anterior per estació (resum_periode_meteocat.json),
+    per a les estacions que no cabran en el pressupost de temps. Els massa vells no es tornen,
+    tret dels de les estacions en repòs: no es tornaran a sondejar fins que l'acabin i,
+    mentrestant, conserven el darrer registre (com a molt REPOS_MAXIM).
+    """
+    ruta_json = Path(DATA_DIR) / "resum_periode_meteocat.json"
+    try:
+        with open(ruta_json, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    
+    limit = (datetime.now() - EDAT_MAXIMA_HERETATS).strftime("%Y-%m-%d %H:%M:%S")
+    limit_repos = (datetime.now() - salut_estacions.REPOS_MAXIM).strftime("%Y-%m-%d %H:%M:%S")
+    registres = {}
+    for registre in anterior.get('dades_periode', []):
+        codi = registre.get('ID_ESTAC')
+        edat_maxima = limit_repos if salut_estacions.en_repos(SALUT, codi) else limit
+        if registre.get('ESTAT') == 'OK' and registre.get('DATA_EXTRACCIO', '') >= edat_maxima:
+            registres.setdefault(codi, []).append(registre)
+    capcaleres = {c.get('ID_ESTAC'): c for c in anterior.get('estudi_capcaleres', []) if c.get('ID_ESTAC') in registres}
+    return registres, capcaleres
+
+def prioritzar_estacions(llista_estacions, anteriors):
+    """
+    Cua de prioritat (prioritat_estacions.py): primer les que el rotador mostra més, les
+    de neu a l'hivern, les que tenen avisos i les que porten més temps sense refrescar;
+    les que tenen fallades recents al final. Si el temps s'acaba, les darreres són les
+    que es queden amb les dades anteriors.
+    """
+    try:
+        ordenades, pesos = prioritat_estacions.ordenar(llista_estacions, anteriors, SALUT)
+    except Exception as e:
+        print(f"⚠️  Prioritat no disponible, ordre de STATIONS: {e}")
+        return llista_estacions
+    primeres = ', '.join(f"{e.get('code')} ({pesos[e.get('code')]:.1f})" for e in ordenades[:5])
+    print(f"🎯 Prioritat: {primeres}{'...' if len(ordenades) > 5 else ''}")
+    return ordenades
+
+def carregar_models():
+    """Retard de publicació après i registre de salut, abans d'una execució"""
+    # Cada estació comença pel període que ja hauria de tenir
+    try:
+        from latencia_publicacio import carregar_model
+        MODEL_LATENCIA.update(carregar_model())
+        print(f"⏱️  Retard de publicació après per a {len(MODEL_LATENCIA)} estacions (la resta: 20 min)")
+    except Exception as e:
+        print(f"⚠️  Model de latència no disponible: {e}")
+    
+    # Estacions amb fallades seguides: sonda curta o repòs
+    try:
+        SALUT.update(salut_estacions.carregar())
+    except Exception as e:
+        print(f"⚠️  Registre de salut no disponible: {e}")
+
+def executa_scraping_intelligent(llista_estacions, mode, shard=None, punt_control=None, en_acabar_estacio=None):
+    """
+    Executa el scraping en mode intel·ligent (només les estacions del shard, si n'hi ha).
+    Amb punt_control, reaprofita les estacions ja acabades i hi afegeix cada estació nova.
+    en_acabar_estacio(codi, períodes, capçaleres) es crida per cada estació del lot amb
+    dades tan bon punt es resol: descarregada, reaprofitada del punt de control o
+    amb els registres anteriors (repòs, pressupost) (pipeline_continu.py).
+    """
     totes_dades = []
     totes_capcaleres = []
+    llista_estacions = estacions_del_shard(llista_estacions, shard)
+    posicio = {e.get('code'): i for i, e in enumerate(llista_estacions)}
     
     print(f"\n🚀 Iniciant execució INTEL·LIGENT en mode '{mode}'...")
     print(f"🕐 Hora actual UTC: {datetime.utcnow().strftime('%H:%M')}")
     print(f"📊 Configuració: 1 període avui + {MAX_PERIODES_AHIR} períodes ahir")
+    print(f"⏳ Pressupost de temps: {PRESSUPOST.descripcio()}")
     print("-" * 80)
     
+    anteriors, capcaleres_anteriors = registres_anteriors() if mode in ['dades', 'tot'] else ({}, {})
+    if mode in ['dades', 'tot']:
+        llista_estacions = prioritzar_estacions(llista_estacions, anteriors)
+    segons_fets, estacions_fetes = 0.0, 0
+    heretades = []
+    en_repos = []
+    represes = 0
+    if punt_control is not None and punt_control.fetes:
+        print(f"♻️  Represa: {len(punt_control.fetes)} estacions ja acabades ({punt_control.ruta.name})")
+    
     for idx, estacio in enumerate(llista_estacions, 1):
         codi = estacio.get('code')
         nom = estacio.get('display_name', estacio.get('name', codi))
         
+        # Acabada en una execució interrompuda d'aquesta mateixa finestra
+        if punt_control is not None and codi in punt_control.fetes:
+            feta = punt_control.fetes[codi]
+            totes_dades.extend(feta.get('dades', []))
+            if feta.get('capcaleres'):
+                totes_capcaleres.append(feta['capcaleres'])
+            PERIODES_NOMES_MAGATZEM.extend(feta.get('magatzem', []))
+            represes += 1
+            if en_acabar_estacio is not None and feta.get('dades'):
+                en_acabar_estacio(codi, feta['dades'], feta.get('capcaleres'))
+            continue
+        
         periodes_estacio = []
         capcaleres_info = None
+        nomes_magatzem_abans = len(PERIODES_NOMES_MAGATZEM)
         
         if mode in ['dades', 'tot']:
+            # Si l'estació està en repòs o ja no hi cap, es queda amb els registres de l'execució anterior
+            cost_estacio = 1.5 * segons_fets / estacions_fetes if estacions_fetes else COST_INICIAL_ESTACIO
+            repos = salut_estacions.en_repos(SALUT, codi)
+            if repos or not PRESSUPOST.hi_cap(cost_estacio):
+                periodes_anteriors = [dict(r, DADES_ANTERIORS='SÍ') for r in anteriors.get(codi, [])]
+                totes_dades.extend(periodes_anteriors)
+                if codi in capcaleres_anteriors:
+                    totes_capcaleres.append(capcaleres_anteriors[codi])
+                (en_repos if repos else heretades).append(codi)
+                if en_acabar_estacio is not None and periodes_anteriors:
+                    en_acabar_estacio(codi, periodes_anteriors, capcaleres_anteriors.get(codi))
+                continue
+            inici_estacio = time.perf_counter()
+            
             print(f"[{idx:3}/{len(llista_estacions)}] 📥 {nom} ({codi})...")
             
             # 1. Cerca per a avui (1 període)
             print(f"      🌅 Buscant període actual...")
-            periode_avui = cerca_periode_avui(codi)
+            periode_avui = cerca_periode_avui(codi, max_intents=salut_estacions.intents_cerca(SALUT, codi, MAX_INTENTS_AVUI))
             if periode_avui.get('ESTAT') == 'OK':
                 periodes_estacio.append(periode_avui)
+                RESULTATS_SALUT[codi] = None
+            elif not PRESSUPOST.esgotat():  # Tallada pel pressupost no és culpa de l'estació
+                RESULTATS_SALUT[codi] = periode_avui.get('ESTAT')
             
             # 2. Cerca per a ahir (fins a 4 períodes)
             print(f"      🌙 Buscant períodes d'ahir...")
@@ -371,16 +623,11 @@ def executa_scraping_intelligent(llista_estacions, mode):
             
             # Si hem trobat períodes, agafem les capçaleres del primer
             if periodes_estacio and periodes_estacio[0].get('ESTAT') == 'OK':
-                capcaleres_info = {
-                    'ID_ESTAC': codi,
-                    'NOM_ESTACIO': nom,
-                    'ESTAT': 'OK',
-                    'CAPÇALERES_TROBADES': periodes_estacio[0].get('CAPÇALERES_TROBADES', 0),
-                    'CAPÇALERES_LLISTAT': periodes_estacio[0].get('CAPÇALERES_LLISTAT', ''),
-                    'URL_FONT': periodes_estacio[0].get('URL_FONT', '')
-                }
+                capcaleres_info = capcaleres_del_periode(codi, nom, periodes_estacio[0])
             
             print(f"      📊 Resultat: {len(periodes_estacio)} períodes trobats")
+            segons_fets += time.perf_counter() - inici_estacio
+            estacions_fetes += 1
         
         if mode in ['capcaleres', 'tot']:
             if mode == 'capcaleres':
@@ -402,8 +649,34 @@ def executa_scraping_intelligent(llista_estacions, mode):
                     estat = capcaleres_info.get('ESTAT', 'DESCONEGUT') if capcaleres_info else 'ERROR'
                     print(estat)
         
-        time.sleep(DELAI_ENTRE_PETICIONS)
-    
+        # Sense cap període es torna a provar si l'execució es reprèn
+        if punt_control is not None and periodes_estacio:
+            punt_control.marcar(codi, {
+                'dades': periodes_estacio,
+                'capcaleres': capcaleres_info,
+                'magatzem': PERIODES_NOMES_MAGATZEM[nomes_magatzem_abans:]
+            })
+        if en_acabar_estacio is not None and periodes_estacio:
+            en_acabar_estacio(codi, periodes_estacio, capcaleres_info)
+    
+    if represes:
+        print(f"\n♻️  {represes} estacions reaprofitades del punt de control")
+    if mode in ['dades', 'tot']:
+        inestables = salut_estacions.classificar(SALUT, list(posicio))['inestables']
+        print(f"\n🩺 Salut: {len(posicio) - len(inestables) - len(en_repos)} sanes, "
+              f"{len(inestables)} amb fallades recents (sonda curta), {len(en_repos)} en repòs"
+              + (f": {', '.join(en_repos)}" if en_repos else ""))
+    if ESTADISTIQUES_SONDES['cerques']:
+        print(f"\n🔀 Sondes d'avui: {ESTADISTIQUES_SONDES['peticions']} respostes en {ESTADISTIQUES_SONDES['cerques']} cerques, "
+              f"{ESTADISTIQUES_SONDES['cobertures']} franges de cobertura per lentitud i "
+              f"{ESTADISTIQUES_SONDES['descartades']} descartades en curs")
+    if heretades:
+        print(f"\n⏳ Temps esgotat: {len(heretades)} estacions conserven les dades anteriors "
+              f"({sum(1 for c in heretades if c in anteriors)} amb registres recents): {', '.join(heretades)}")
+    
+    # Ordre original, independent de la prioritat
+    totes_dades.sort(key=lambda r: posicio.get(r.get('ID_ESTAC'), len(posicio)))
+    totes_capcaleres.sort(key=lambda r: posicio.get(r.get('ID_ESTAC'), len(posicio)))
     return totes_dades, totes_capcaleres
 
 def generar_fitxers_periode_fixos(dades_periode, dades_capcaleres):
@@ -489,8 +762,78 @@ def generar_fitxers_periode_fixos(dades_periode, dades_capcaleres):
     
     return ruta_csv, ruta_json, ruta_excel
 
+def desar_lot(dades_periode, dades_capcaleres):
+    """Control de qualitat, fitxers fixos i magatzem històric d'un lot ja descarregat"""
+    # CONTROL DE QUALITAT: tot el lot (també els períodes que només van al magatzem)
+    try:
+        from control_qualitat import aplicar_control
+        qc = aplicar_control(dades_periode + PERIODES_NOMES_MAGATZEM)
+        print(f"\n🧪 Control de qualitat: {qc['registres']} registres en {qc['ms']:.0f} ms | "
+              f"rang {qc['rang']}, salt/pic {qc['salt']}, coherència {qc['coherencia']} | "
+              f"{qc['suprimits']} valors suprimits")
+    except Exception as e:
+        print(f"⚠️  Control de qualitat no aplicat: {e}")
+    
+    print("\n" + "="*80)
+    print("💾 GENERANT FITXERS FIXOS DE SORTIDA")
+    print("="*80)
+    
+    rutes = generar_fitxers_periode_fixos(dades_periode, dades_capcaleres)
+    
+    # MAGATZEM HISTÒRIC (només afegir: els períodes ja desats no es toquen)
+    try:
+        from magatzem_historic import afegir_periodes, HISTORICAL_DB
+        noves = afegir_periodes(dades_periode + PERIODES_NOMES_MAGATZEM)
+        print(f"🗄️  Magatzem històric: {noves} períodes nous ({HISTORICAL_DB})")
+    except Exception as e:
+        print(f"⚠️  No s'ha pogut actualitzar el magatzem històric: {e}")
+    
+    # RETARD DE PUBLICACIÓ: límits observats en aquesta execució
+    try:
+        from latencia_publicacio import registrar
+        files = registrar(CONSULTES_LATENCIA)
+        CONSULTES_LATENCIA.clear()
+        print(f"⏱️  Latència de publicació: {files} observacions desades")
+    except Exception as e:
+        print(f"⚠️  No s'han pogut desar les latències de publicació: {e}")
+    
+    # SALUT DE LES ESTACIONS: fallades seguides i repòs per a la propera execució
+    try:
+        if RESULTATS_SALUT:
+            fallades = salut_estacions.registrar(RESULTATS_SALUT)
+            noves_en_repos = [codi for codi, n in fallades.items() if n >= salut_estacions.LLINDAR_FALLADES]
+            amb_dades = sum(1 for estat in RESULTATS_SALUT.values() if estat is None)
+            errors_xarxa = sum(1 for estat in RESULTATS_SALUT.values() if estat == salut_estacions.ERROR_DESCARREGA)
+            print(f"🩺 Salut de les estacions: {amb_dades} amb dades, {len(fallades)} fallades, "
+                  f"{errors_xarxa} errors de xarxa (no compten)"
+                  + (f" ({len(noves_en_repos)} en repòs: {', '.join(noves_en_repos)})" if noves_en_repos else ""))
+            if salut_estacions.caiguda_general(RESULTATS_SALUT):
+                print(f"⚠️  Han fallat {len(RESULTATS_SALUT) - amb_dades} de {len(RESULTATS_SALUT)} estacions: "
+                      f"caiguda de la web, no es compten com a fallades de les estacions")
+            RESULTATS_SALUT.clear()
+    except Exception as e:
+        print(f"⚠️  No s'ha pogut actualitzar la salut de les estacions: {e}")
+    
+    return rutes
+
+def desar_tros(shard, dades_periode, dades_capcaleres):
+    """Mode shard: tot el que necessita la fusió, sense tocar els fitxers fixos ni el magatzem"""
+    consultes = [(codi, demanat, {k: registre.get(k) for k in ('DATA_UTC', 'PERIODE_UTC')} if registre else None, moment)
+                 for codi, demanat, registre, moment in CONSULTES_LATENCIA]
+    return desar_shard('periode', shard, {
+        'dades_periode': dades_periode,
+        'estudi_capcaleres': dades_capcaleres,
+        'periodes_nomes_magatzem': PERIODES_NOMES_MAGATZEM,
+        'consultes_latencia': consultes,
+        'resultats_salut': RESULTATS_SALUT
+    })
+
 # --- EXECUCIÓ PRINCIPAL ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper de períodes de meteo.cat")
+    parser.add_argument('--shard', type=llegir_shard, help="Només el shard i/N de les estacions (després: fusiona_shards.py)")
+    args = parser.parse_args()
+    
     print("\n" + "="*80)
     print("🧠 SCRAPER PERÍODE INTEL·LIGENT - Cerca retroactiva per 2 dies")
     print("="*80)
@@ -503,6 +846,9 @@ if __name__ == "__main__":
     print(f"\n📋 Estacions disponibles: {len(STATIONS)}")
     print("🎯 SELECCIÓ D'ESTACIONS: TOTES (mode automàtic)")
     estacions_a_processar = STATIONS
+    if args.shard:
+        print(f"🧩 Shard {args.shard[0]}/{args.shard[1]}: "
+              f"{len(estacions_del_shard(estacions_a_processar, args.shard))} estacions")
     print(f"▶️  Estacions seleccionades: {len(estacions_a_processar)}")
     
     # MODE D'EXECUCIÓ - AUTOMÀTIC (FER TOT)
@@ -518,17 +864,27 @@ if __name__ == "__main__":
     print(f"   • Fitxers de sortida: resum_periode_meteocat.{{csv,json,xlsx}}")
     
     print("\n▶️  Execució automàtica iniciada...")
+    PRESSUPOST = fixar_limit()
+    
+    carregar_models()
     
     # EXECUCIÓ
-    dades_periode, dades_capcaleres = executa_scraping_intelligent(estacions_a_processar, mode_seleccionat)
+    # Si una execució d'aquesta mitja hora es va interrompre, es reprèn on va quedar
+    punt_control = PuntControlFinestra('periode', finestra_periode(), args.shard)
+    dades_periode, dades_capcaleres = executa_scraping_intelligent(estacions_a_processar, mode_seleccionat,
+                                                                   args.shard, punt_control)
+    
+    # MODE SHARD: només el tros; els fitxers fixos i el magatzem els fa la fusió
+    if args.shard:
+        ruta = desar_tros(args.shard, dades_periode, dades_capcaleres)
+        punt_control.completar()
+        print(f"\n🧩 Tros desat: {ruta} ({len(dades_periode)} períodes)")
+        sys.exit(0)
     
     # GENERACIÓ DE FITXERS FIXOS
     if dades_periode or dades_capcaleres:
-        print("\n" + "="*80)
-        print("💾 GENERANT FITXERS FIXOS DE SORTIDA")
-        print("="*80)
-        
-        ruta_csv, ruta_json, ruta_excel = generar_fitxers_periode_fixos(dades_periode, dades_capcaleres)
+        ruta_csv, ruta_json, ruta_excel = desar_lot(dades_periode, dades_capcaleres)
+        punt_control.completar()
         
         # RESUM FINAL
         print("\n" + "="*80)
@@ -3,9 +3,9 @@
 
 # --- 1. TOTES LES IMPORTACIONS DE LLIBRERIES ESTÀNDARD ---
 import sys
-import time
 import json
 import re
+import argparse
 from pathlib import Path
 from datetime import datetime, timedelta
 import requests
@@ -23,11 +23,16 @@ except ImportError as e:
     print(f"❌ Error important la configuració: {e}")
     sys.exit(1)
 
+from fusiona_shards import llegir_shard, estacions_del_shard, desar_shard
+from limitador_peticions import esperar_torn
+from pressupost_temps import Pressupost, fixar_limit
+from punt_control import PuntControlFinestra
+
 # --- CONFIGURACIÓ ---
 DIA_CONSULTA = TODAY.strftime("%Y-%m-%d")
 BASE_URL = "https://www.meteo.cat/observacions/xema/dades"
-DELAI_ENTRE_PETICIONS = 1
 HORA_CONSULTA = "T09:00Z"
+PRESSUPOST = Pressupost.de_l_entorn()  # Límit de temps de l'execució (el fixa l'executor)
 
 # Diccionari de variables
 MAP_VARIABLES = {
@@ -73,8 +78,13 @@ def extreu_resum_diari_per_estacio(codi_estacio, dia):
     resultats['DATA_EXTRACCIO'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     resultats['URL_FONT'] = url
 
+    timeout = PRESSUPOST.timeout(15)
+    if not timeout:
+        return resultats
+
     try:
-        resposta = requests.get(url, timeout=15)
+        esperar_torn()
+        resposta = requests.get(url, timeout=timeout)
         resposta.raise_for_status()
     except:
         return resultats
@@ -111,9 +121,25 @@ def extreu_resum_diari_per_estacio(codi_estacio, dia):
 
     return resultats
 
-def executa_scraping_estacions(llista_estacions, dia):
-    """Executa per totes les estacions"""
+def resums_anteriors(dia):
+    """Resums ja desats del mateix dia per estació (per a les que no cabran en el temps)"""
+    try:
+        with open(Path(DATA_DIR) / "resum_diari_meteocat.json", 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if anterior.get('metadata', {}).get('data_consulta') != dia:
+        return {}
+    return {r.get('ID_ESTAC'): r for r in anterior.get('estacions', [])}
+
+def executa_scraping_estacions(llista_estacions, dia, shard=None, punt_control=None):
+    """Executa per totes les estacions (o només les del shard), reprenent el punt de control si n'hi ha"""
     totes_dades = []
+    llista_estacions = estacions_del_shard(llista_estacions, shard)
+    anteriors = resums_anteriors(dia)
+    fetes = punt_control.fetes if punt_control is not None else {}
+    if fetes:
+        print(f"♻️  Represa: {len(fetes)} estacions ja acabades ({punt_control.ruta.name})")
     
     print(f"\n🚀 Iniciant scraping per a {len(llista_estacions)} estacions...")
     print(f"📅 Data: {dia}{HORA_CONSULTA}")
@@ -124,14 +150,21 @@ def executa_scraping_estacions(llista_estacions, dia):
         nom = estacio.get('display_name', estacio.get('name', codi))
         print(f"[{idx:3}/{len(llista_estacions)}] 🔍 {nom} ({codi})...", end=' ', flush=True)
 
-        dades = extreu_resum_diari_per_estacio(codi, dia)
+        if codi in fetes:
+            # Acabada en una execució interrompuda del mateix dia
+            dades = fetes[codi]
+        elif PRESSUPOST.esgotat() and codi in anteriors:
+            # Temps esgotat: el resum d'avui ja desat en una execució anterior
+            dades = dict(anteriors[codi], DADES_ANTERIORS='SÍ')
+        else:
+            dades = extreu_resum_diari_per_estacio(codi, dia)
+            if punt_control is not None and any(dades.get(nom_var) for nom_var in MAP_VARIABLES.values()):
+                punt_control.marcar(codi, dades)
         totes_dades.append(dades)
         
         dades_trobades = sum(1 for nom_var in MAP_VARIABLES.values() if dades.get(nom_var))
         print(f"{dades_trobades} vars" if dades_trobades > 0 else "sense dades")
 
-        time.sleep(DELAI_ENTRE_PETICIONS)
-
     return totes_dades
 
 def genera_excel_formatat(df, ruta_excel):
@@ -246,6 +279,10 @@ def guarda_tots_formats(totes_dades, data_consulta):
 
 # --- EXECUCIÓ PRINCIPAL ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper del resum diari de meteo.cat")
+    parser.add_argument('--shard', type=llegir_shard, help="Només el shard i/N de les estacions (després: fusiona_shards.py)")
+    args = parser.parse_args()
+    
     print("\n" + "="*70)
     print("🌤️  SCRAPER DE RESUM DIARI - NOMS FIXOS")
     print("="*70)
@@ -255,13 +292,32 @@ if __name__ == "__main__":
     
     # EXECUCIÓ DIRECTA SENSE PREGUNTAS
     estacions_a_processar = STATIONS
+    PRESSUPOST = fixar_limit()
+    print(f"⏳ Pressupost de temps: {PRESSUPOST.descripcio()}")
     
     # SCRAPING
-    dades = executa_scraping_estacions(estacions_a_processar, DIA_CONSULTA)
+    punt_control = PuntControlFinestra('diari', DIA_CONSULTA, args.shard)
+    dades = executa_scraping_estacions(estacions_a_processar, DIA_CONSULTA, args.shard, punt_control)
+    
+    # MODE SHARD: només el tros; els fitxers fixos i el magatzem els fa la fusió
+    if args.shard:
+        ruta = desar_shard('diari', args.shard, {'dia': DIA_CONSULTA, 'estacions': dades})
+        punt_control.completar()
+        print(f"\n🧩 Tros desat: {ruta} ({len(dades)} estacions)")
+        sys.exit(0)
     
     # GUARDAR
     if dades:
         ruta_excel, ruta_csv, ruta_json = guarda_tots_formats(dades, DIA_CONSULTA)
+        punt_control.completar()
+        
+        # MAGATZEM HISTÒRIC
+        try:
+            from magatzem_historic import afegir_resums_diaris
+            desats = afegir_resums_diaris(dades)
+            print(f"🗄️  Magatzem històric: {desats} resums diaris desats")
+        except Exception as e:
+            print(f"⚠️  No s'ha pogut actualitzar el magatzem històric: {e}")
         
         print("\n" + "="*70)
         print("📊 FITXERS GENERATS (NOMS FIXOS)")
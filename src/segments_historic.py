@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# segments_historic.py - Segments columnars compactats (una estació i un mes per fitxer)
+#
+# Les files semihoràries més antigues que la retenció (vegeu manteniment_historic.py)
+# surten de SQLite i es guarden aquí, columna a columna:
+#   - instants: minuts des de 1970 → primer valor + diferències (quasi sempre 30)
+#   - variables: valor × 10 com a enter, en diferències respecte del valor anterior,
+#     amb els buits en una màscara de bits a part
+#   - data d'extracció: diccionari de cadenes + índexs
+# i tot plegat comprimit amb np.savez_compressed. Les columnes són les numèriques
+# normalitzades del magatzem (COLUMNES_NUMERIQUES); el JSON de text cru no es conserva.
+
+# --- 1. IMPORTACIONS ---
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import HISTORICAL_DIR
+
+from magatzem_historic import COLUMNES_NUMERIQUES
+
+# --- CONFIGURACIÓ ---
+DIRECTORI_SEGMENTS = Path(HISTORICAL_DIR) / 'segments'
+VERSIO_SEGMENT = 1
+ESCALA = 10  # Totes les variables tenen com a molt un decimal (codificar ho comprova)
+
+
+# --- 3. CODIFICACIÓ ---
+def codificar(files):
+    """
+    files: [(instant, data_extraccio, valor_col1, ...)] ordenades per instant,
+    amb les columnes en l'ordre de COLUMNES_NUMERIQUES. Retorna el dict d'arrays.
+    """
+    columnes = list(COLUMNES_NUMERIQUES)
+    minuts = np.array([f[0].rstrip('Z') for f in files], dtype='datetime64[m]').astype(np.int64)
+    valors = np.array([[np.nan if v is None else v for v in f[2:]] for f in files], dtype=np.float64).T
+    nuls = np.isnan(valors)
+    # Les files compactades s'esborren del SQLite: un valor amb més decimals es perdria sense avís
+    exactes = np.isclose(np.round(valors * ESCALA) / ESCALA, valors, rtol=0, atol=1e-6) | nuls
+    if not exactes.all():
+        columna, fila = (int(i[0]) for i in np.nonzero(~exactes))
+        raise ValueError(f"{columnes[columna]} = {valors[columna, fila]} a {files[fila][0]} "
+                         f"no és múltiple d'1/{ESCALA}")
+
+    # Els buits repeteixen el valor anterior de la fila perquè la diferència sigui 0
+    ultim_valid = np.maximum.accumulate(np.where(nuls, 0, np.arange(len(files))), axis=1)
+    enters = np.round(valors * ESCALA)[np.arange(len(columnes))[:, None], ultim_valid]
+    enters[np.isnan(enters)] = 0
+    matriu = np.vstack([minuts, enters.astype(np.int64)])
+
+    extraccions, index = np.unique(np.array([f[1] or '' for f in files]), return_inverse=True)
+    return {
+        'versio': np.array(VERSIO_SEGMENT),
+        'columnes': np.array(columnes),
+        'bases': matriu[:, 0],
+        'deltes': np.diff(matriu, axis=1).astype(np.int32),
+        'nuls': np.packbits(nuls, axis=1),
+        'extraccio_diccionari': extraccions,
+        'extraccio_index': index.astype(np.uint16 if len(extraccions) < 65536 else np.uint32)
+    }
+
+def descodificar_columnes(arrays):
+    """
+    Inversa de codificar en forma columnar: {'instant': datetime64[m],
+    'data_extraccio': str, columna: float64 amb NaN als buits}
+    """
+    bases = arrays['bases'][:, None]
+    matriu = np.concatenate([bases, bases + np.cumsum(arrays['deltes'], axis=1)], axis=1)
+    n = matriu.shape[1]
+
+    valors = matriu[1:] / ESCALA
+    valors[np.unpackbits(arrays['nuls'], axis=1, count=n).astype(bool)] = np.nan
+
+    columnes = {
+        'instant': matriu[0].astype('datetime64[m]'),
+        'data_extraccio': arrays['extraccio_diccionari'][arrays['extraccio_index']]
+    }
+    # Per nom de columna: un segment antic continua sent llegible si se n'afegeixen
+    desades = {c: i for i, c in enumerate(arrays['columnes'].tolist())}
+    for columna in COLUMNES_NUMERIQUES:
+        columnes[columna] = valors[desades[columna]] if columna in desades else np.full(n, np.nan)
+    return columnes
+
+def descodificar(arrays):
+    """Inversa de codificar: [(instant, data_extraccio, valor_col1, ...)]"""
+    columnes = descodificar_columnes(arrays)
+    valors = []
+    for columna in COLUMNES_NUMERIQUES:
+        objectes = columnes[columna].astype(object)
+        objectes[np.isnan(columnes[columna])] = None
+        valors.append(objectes.tolist())
+    instants = np.char.add(columnes['instant'].astype(str), 'Z').tolist()
+    return list(zip(instants, columnes['data_extraccio'].tolist(), *valors))
+
+
+# --- 4. FITXERS ---
+def ruta_segment(id_estac, mes):
+    return DIRECTORI_SEGMENTS / id_estac / f"{mes}.npz"
+
+def carregar_arrays(ruta):
+    with np.load(ruta) as arrays:
+        return {clau: arrays[clau] for clau in arrays.files}
+
+def llegir_segment(id_estac, mes):
+    """Files d'un segment (llista buida si no existeix)"""
+    ruta = ruta_segment(id_estac, mes)
+    if not ruta.exists():
+        return []
+    return descodificar(carregar_arrays(ruta))
+
+def afegir_a_segment(id_estac, mes, files):
+    """
+    Fusiona files noves amb el segment existent (per instant; les noves guanyen)
+    i el reescriu de manera atòmica. Retorna el total de files del segment.
+    """
+    per_instant = {f[0]: f for f in llegir_segment(id_estac, mes)}
+    per_instant.update({f[0]: f for f in files})
+    totes = [per_instant[i] for i in sorted(per_instant)]
+
+    ruta = ruta_segment(id_estac, mes)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_name(ruta.stem + '.tmp.npz')
+    np.savez_compressed(temporal, **codificar(totes))
+    os.replace(temporal, ruta)
+    return len(totes)
+
+def instants_del_segment(id_estac, mes):
+    """Conjunt d'instants ja compactats (per no tornar-los a acumular)"""
+    return {f[0] for f in llegir_segment(id_estac, mes)}
+
+def mesos_del_rang(desde, fins):
+    """Mesos 'AAAA-MM' entre dues dates/instants (inclosos)"""
+    any_actual, mes_actual = int(desde[:4]), int(desde[5:7])
+    any_final, mes_final = int(fins[:4]), int(fins[5:7])
+    mesos = []
+    while (any_actual, mes_actual) <= (any_final, mes_final):
+        mesos.append(f"{any_actual:04d}-{mes_actual:02d}")
+        any_actual, mes_actual = (any_actual + 1, 1) if mes_actual == 12 else (any_actual, mes_actual + 1)
+    return mesos
+
+def estacions_desades():
+    """Codis d'estació amb algun segment"""
+    if not DIRECTORI_SEGMENTS.exists():
+        return []
+    return sorted(p.name for p in DIRECTORI_SEGMENTS.iterdir() if p.is_dir())
+
+def mesos_desats(id_estac, desde=None, fins=None):
+    """Mesos amb segment d'una estació, limitats al rang si se n'indica"""
+    directori = DIRECTORI_SEGMENTS / id_estac
+    if not directori.exists():
+        return []
+    mesos = sorted(p.stem for p in directori.glob('*.npz') if '.tmp' not in p.name)
+    if mesos and (desde or fins):
+        permesos = set(mesos_del_rang(desde or mesos[0], fins or mesos[-1]))
+        mesos = [m for m in mesos if m in permesos]
+    return mesos
+
+def llegir_rang(id_estac, desde=None, fins=None):
+    """Files compactades d'una estació dins el rang (instants inclosos)"""
+    files = []
+    for mes in mesos_desats(id_estac, desde, fins):
+        files.extend(f for f in llegir_segment(id_estac, mes)
+                     if (not desde or f[0] >= desde) and (not fins or f[0] <= fins))
+    return files
+
+def llegir_columnes_rang(id_estac, desde=None, fins=None):
+    """
+    Com llegir_rang però columnar (vegeu descodificar_columnes), per a exportacions:
+    els arrays de cada mes es concatenen sense passar per files Python.
+    """
+    trossos = [descodificar_columnes(carregar_arrays(ruta_segment(id_estac, mes)))
+               for mes in mesos_desats(id_estac, desde, fins)]
+    if not trossos:
+        return None
+    columnes = {clau: np.concatenate([t[clau] for t in trossos]) for clau in trossos[0]}
+
+    seleccio = np.ones(len(columnes['instant']), dtype=bool)
+    if desde:
+        seleccio &= columnes['instant'] >= np.datetime64(desde.rstrip('Z'), 'm')
+    if fins:
+        seleccio &= columnes['instant'] <= np.datetime64(fins.rstrip('Z'), 'm')
+    return {clau: valors[seleccio] for clau, valors in columnes.items()}
+
+def mida_segments():
+    """Bytes que ocupen tots els segments"""
+    if not DIRECTORI_SEGMENTS.exists():
+        return 0
+    return sum(p.stat().st_size for p in DIRECTORI_SEGMENTS.rglob('*.npz'))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# series_memmap.py - Sèries recents per estació en arrays d'amplada fixa (np.memmap)
+#
+# Un fitxer per estació amb DIES_MEMMAP × 48 registres d'amplada fixa (minut
+# d'inici + variables en float32). Cada període va al registre
+# (minuts / 30) mod capacitat, com un buffer circular, i el minut desat diu si
+# el registre és d'aquest període o d'una volta anterior. Llegir les darreres
+# 24 h d'una estació és agafar 48 posicions consecutives del fitxer mapat, sense
+# consultes ni parsejar res.
+#
+# És una memòria cau derivada del magatzem SQLite: no es puja al repositori. Al
+# workflow es guarda amb actions/cache entre execucions perquè el scraper l'hi
+# vagi afegint els períodes nous; si no hi és (checkout nou, cache caducada) o fa
+# massa que ningú no l'actualitza (hi podria haver forats), el generador la
+# reconstrueix de les files recents.
+#
+# Ús:
+#   python src/series_memmap.py --reconstrueix
+#   python src/series_memmap.py --estacio YT --hores 24
+
+# --- 1. IMPORTACIONS ---
+import sys
+import shutil
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# --- 2. CONFIGURACIÓ CENTRAL ---
+sys.path.insert(0, str(Path(__file__).parent.parent / 'config'))
+from config_banner import HISTORICAL_DB, HISTORICAL_DIR
+
+# --- CONFIGURACIÓ ---
+DIRECTORI_MEMMAP = Path(HISTORICAL_DIR) / 'memmap'
+DIES_MEMMAP = 14
+MINUTS_PERIODE = 30
+CAPACITAT = DIES_MEMMAP * 24 * 60 // MINUTS_PERIODE
+COLUMNES_MEMMAP = ['tm', 'tx', 'tn', 'ppt', 'hr', 'vvm', 'vvx', 'pm']
+# Si canvien les columnes, la marca nova no existeix i els fitxers es refan
+VERSIO_MEMMAP = 2
+MARCA_INICIALITZAT = DIRECTORI_MEMMAP / f'inicialitzat_v{VERSIO_MEMMAP}'
+# Sense cap actualització en aquest temps, la memòria cau es dona per perduda
+ANTIGUITAT_MAXIMA = timedelta(hours=3)
+FORMAT_MARCA = "%Y-%m-%dT%H:%M:%SZ"
+REGISTRE = np.dtype([('minut', '<i4')] + [(c, '<f4') for c in COLUMNES_MEMMAP])
+BUIT = -1
+
+
+# --- 3. FITXERS ---
+def ruta_serie(id_estac):
+    return DIRECTORI_MEMMAP / f"{id_estac}.bin"
+
+def obrir_serie(id_estac, escriptura=False):
+    """np.memmap de l'estació (None si no existeix i és només lectura)"""
+    ruta = ruta_serie(id_estac)
+    if not ruta.exists():
+        if not escriptura:
+            return None
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        buida = np.zeros(CAPACITAT, dtype=REGISTRE)
+        buida['minut'] = BUIT
+        buida.tofile(ruta)
+    return np.memmap(ruta, dtype=REGISTRE, mode='r+' if escriptura else 'r', shape=(CAPACITAT,))
+
+def inicialitzat(ara=None):
+    """Hi ha fitxers d'aquesta versió actualitzats fa menys d'ANTIGUITAT_MAXIMA?"""
+    try:
+        darrera = datetime.strptime(MARCA_INICIALITZAT.read_text(encoding='utf-8').strip(), FORMAT_MARCA)
+    except (OSError, ValueError):
+        return False
+    return (ara or datetime.utcnow()) - darrera <= ANTIGUITAT_MAXIMA
+
+def marcar_actualitzat():
+    MARCA_INICIALITZAT.write_text(datetime.utcnow().strftime(FORMAT_MARCA), encoding='utf-8')
+
+def minuts_de(instants):
+    """'AAAA-MM-DDTHH:MMZ' → minuts des de 1970 (int64)"""
+    return np.array([i.rstrip('Z') for i in instants], dtype='datetime64[m]').astype(np.int64)
+
+
+# --- 4. ESCRIPTURA ---
+def escriure(files_per_estacio):
+    """
+    files_per_estacio: {id_estac: [(instant, {columna: valor})]}. Un període més
+    antic que el que ja ocupa el registre (recuperacions de dies passats) no el
+    trepitja.
+    """
+    for id_estac, files in files_per_estacio.items():
+        if not files:
+            continue
+        serie = obrir_serie(id_estac, escriptura=True)
+        minuts = minuts_de([f[0] for f in files])
+        posicions = (minuts // MINUTS_PERIODE) % CAPACITAT
+        nous = minuts >= serie['minut'][posicions]
+        if not nous.any():
+            continue
+        serie['minut'][posicions[nous]] = minuts[nous]
+        for columna in COLUMNES_MEMMAP:
+            valors = np.array([np.nan if f[1].get(columna) is None else f[1][columna] for f in files], dtype=np.float32)
+            serie[columna][posicions[nous]] = valors[nous]
+        serie.flush()
+
+def afegir(files):
+    """Files noves del magatzem [(id_estac, instant, {columna: valor})], si la memòria cau existeix"""
+    if not inicialitzat():
+        return
+    per_estacio = {}
+    for id_estac, instant, valors in files:
+        per_estacio.setdefault(id_estac, []).append((instant, valors))
+    escriure(per_estacio)
+    marcar_actualitzat()
+
+def reconstruir(ruta_db=HISTORICAL_DB):
+    """Torna a crear tots els fitxers a partir de les files recents del SQLite"""
+    import magatzem_historic
+
+    if DIRECTORI_MEMMAP.exists():
+        shutil.rmtree(DIRECTORI_MEMMAP)
+    DIRECTORI_MEMMAP.mkdir(parents=True)
+
+    desde = (datetime.utcnow() - timedelta(days=DIES_MEMMAP)).strftime("%Y-%m-%dT%H:%MZ")
+    per_estacio = {}
+    if Path(ruta_db).exists():
+        connexio = magatzem_historic.obrir(ruta_db)
+        try:
+            for fila in connexio.execute(
+                    f"SELECT id_estac, instant, {', '.join(COLUMNES_MEMMAP)} FROM observacions "
+                    "WHERE instant >= ? ORDER BY id_estac, instant", (desde,)):
+                per_estacio.setdefault(fila[0], []).append((fila[1], dict(zip(COLUMNES_MEMMAP, fila[2:]))))
+        finally:
+            connexio.close()
+
+    escriure(per_estacio)
+    marcar_actualitzat()
+    return len(per_estacio), sum(len(f) for f in per_estacio.values())
+
+
+# --- 5. LECTURA ---
+def finestra(id_estac, hores=24, columnes=('tm',), ara=None):
+    """
+    Darreres 'hores' d'una estació fins a 'ara' (UTC, per defecte l'hora actual):
+    {'instant': datetime64[m], columna: float32 amb NaN on no hi ha dades}, o None.
+    """
+    serie = obrir_serie(id_estac)
+    if serie is None:
+        return None
+    ara = ara or datetime.utcnow()
+    darrer = int(np.datetime64(ara, 'm').astype(np.int64)) // MINUTS_PERIODE * MINUTS_PERIODE
+    esperats = darrer - MINUTS_PERIODE * np.arange(hores * 60 // MINUTS_PERIODE - 1, -1, -1)
+
+    # Posicions consecutives del buffer (com a molt dos trossos si fa la volta)
+    posicions = (esperats // MINUTS_PERIODE) % CAPACITAT
+    registres = serie[posicions]
+    valids = registres['minut'] == esperats
+
+    resultat = {'instant': esperats.astype('datetime64[m]')}
+    for columna in columnes:
+        resultat[columna] = np.where(valids, registres[columna], np.float32(np.nan))
+    return resultat
+
+
+# --- EXECUCIÓ DIRECTA ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sèries recents per estació en fitxers memmap")
+    parser.add_argument('--reconstrueix', action='store_true', help="Recrea els fitxers a partir del SQLite")
+    parser.add_argument('--estacio', help="Mostra la finestra d'una estació")
+    parser.add_argument('--hores', type=int, default=24)
+    args = parser.parse_args()
+
+    if args.reconstrueix or not inicialitzat():
+        estacions, files = reconstruir()
+        print(f"🧮 Sèries memmap: {estacions} estacions, {files} períodes ({DIES_MEMMAP} dies, "
+              f"{REGISTRE.itemsize * CAPACITAT / 1024:.1f} KB per estació)")
+
+    if args.estacio:
+        dades = finestra(args.estacio, args.hores, COLUMNES_MEMMAP)
+        if dades is None:
+            print(f"   {args.estacio}: sense sèrie")
+        else:
+            for i, instant in enumerate(dades['instant']):
+                print(f"   {instant}: " + ' | '.join(f"{c} {dades[c][i]:.1f}" for c in COLUMNES_MEMMAP))
@@ -128,6 +128,30 @@ function updateTimePeriod() {
     document.getElementById('current-period').textContent = periodString;
 }
 
+// FEED DE DADES REALS (overlay_data.json, generat per generador_banners.py)
+const OVERLAY_DATA_URL = 'https://joandecorts.github.io/overlay-plus/public/data/overlay_data.json';
+let overlayDataCache = null;
+let overlayDataLastFetch = 0;
+
+async function loadOverlayData() {
+    // Si tenim dades fresques (menys de 5 minuts), reutilitzar
+    if (overlayDataCache && (Date.now() - overlayDataLastFetch) < 300000) {
+        return overlayDataCache;
+    }
+    
+    try {
+        const response = await fetch(OVERLAY_DATA_URL);
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        overlayDataCache = await response.json();
+        overlayDataLastFetch = Date.now();
+    } catch (error) {
+        console.error('❌ Error carregant overlay_data.json:', error);
+    }
+    return overlayDataCache;
+}
+
 // FUNCIÓ PER CARREGAR DADES D'ESTACIÓ
 function loadStationData(station) {
     console.log(`📊 Carregant dades per: ${station.name}`);
@@ -135,16 +159,44 @@ function loadStationData(station) {
     // Actualitzar informació de l'estació
     updateStationInfo(station);
     
-    // Generar dades simulades
-    generateWeatherData(station);
-    
-    // Carregar dades del dia
-    loadDayData(station.code);
+    // Dades reals si el feed les té; si no, dades simulades
+    loadOverlayData().then(data => {
+        const realData = data && data.stations ? data.stations.find(s => s.code === station.code) : null;
+        if (realData) {
+            showRealWeatherData(realData);
+        } else {
+            generateWeatherData(station);
+            loadDayData(station.code);
+        }
+    });
     
     // Actualitzar display d'administrador
     document.getElementById('current-station-display').textContent = station.code;
 }
 
+// FUNCIÓ PER MOSTRAR DADES REALS DEL FEED
+function showRealWeatherData(realData) {
+    const format = (value, decimals, unit) =>
+        value === null || value === undefined ? '--' : `${Number(value).toFixed(decimals)}${unit}`;
+    const day = realData.dia || {};
+    
+    document.getElementById('temp-avg').textContent = format(realData.temp_actual, 1, ' °C');
+    document.getElementById('temp-max').textContent = format(realData.temp_max, 1, ' °C');
+    document.getElementById('temp-min').textContent = format(realData.temp_min, 1, ' °C');
+    document.getElementById('humidity').textContent = format(realData.humitat, 0, ' %');
+    document.getElementById('precipitation').textContent = format(realData.precipitacio, 1, ' mm');
+    document.getElementById('wind-avg').textContent = format(realData.vent_velocitat, 1, ' km/h');
+    document.getElementById('wind-dir').textContent = format(realData.vent_direccio, 0, '°');
+    document.getElementById('wind-gust').textContent = format(realData.vent_ratxa, 1, ' km/h');
+    document.getElementById('pressure').textContent = format(realData.pressio, 0, ' hPa');
+    document.getElementById('radiation').textContent = format(realData.radiacio, 0, ' W/m²');
+    document.getElementById('altitude').textContent = format(realData.altitud, 0, ' m');
+    
+    document.getElementById('day-temp-max').textContent = format(day.temp_max ?? realData.temp_max, 1, '°C');
+    document.getElementById('day-temp-min').textContent = format(day.temp_min ?? realData.temp_min, 1, '°C');
+    document.getElementById('day-precipitation').textContent = format(day.precipitacio ?? realData.precipitacio, 1, ' mm');
+}
+
 // FUNCIÓ PER ACTUALITZAR INFORMACIÓ D'ESTACIÓ
 function updateStationInfo(station) {
     document.getElementById('current-station-name').textContent = station.name;
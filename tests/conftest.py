@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+ARREL = Path(__file__).parent.parent
+for ruta in (ARREL, ARREL / 'src', ARREL / 'config'):
+    sys.path.insert(0, str(ruta))
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime
+
+import agregador_diari as ad
+import magatzem_historic
+
+
+def fila(**canvis):
+    base = {'data': '2026-08-22', 'darrer_instant': '2026-08-22T17:00Z', 'n_periodes': 35,
+            'suma_tm': 700.0, 'n_tm': 35, 'tx': 25.0, 'hora_tx': '14:00', 'tn': 12.0, 'hora_tn': '05:00',
+            'suma_hr': 0, 'n_hr': 0, 'suma_ppt': 1.0, 'n_ppt': 35, 'gn': None, 'hora_gn': None,
+            'vvx': None, 'hora_vvx': None, 'dvx': None, 'suma_rs': 0, 'n_rs': 0, 'suma_pm': 0, 'n_pm': 0}
+    return {**base, **canvis}
+
+def web(extraccio, **variables):
+    return {'data_extraccio': extraccio, 'variables': json.dumps(variables)}
+
+WEB_DE_MITJANIT = web('2026-08-22 00:40:00', TEMPERATURA_MAXIMA_DIA='18.0 °C 00:10 TU',
+                      TEMPERATURA_MINIMA_DIA='11.0 °C 00:30 TU', PRECIPITACIO_ACUM_DIA='0.2 mm',
+                      HUMITAT_MITJANA_DIA='90%')
+
+
+def test_la_web_mes_recent_guanya():
+    resum, font = ad.conciliar(fila(), web('2026-08-22 17:45:00', TEMPERATURA_MAXIMA_DIA='25.6 °C 16:52 TU'))
+    assert (resum['TEMPERATURA_MAXIMA_DIA'], resum['HORA_TX'], font) == ('25.6 °C', '16:52', 'conciliat')
+
+def test_una_web_anterior_nomes_omple_el_que_falta():
+    resum, _ = ad.conciliar(fila(), WEB_DE_MITJANIT)
+    assert resum['TEMPERATURA_MAXIMA_DIA'] == '25.0 °C'
+    assert resum['TEMPERATURA_MINIMA_DIA'] == '12.0 °C'
+    assert resum['HUMITAT_MITJANA_DIA'] == '90%'
+
+def test_amb_forats_una_web_anterior_aporta_els_extrems_perduts():
+    resum, _ = ad.conciliar(fila(n_periodes=20), WEB_DE_MITJANIT)
+    assert (resum['TEMPERATURA_MINIMA_DIA'], resum['HORA_TN']) == ('11.0 °C', '00:30')
+    assert resum['TEMPERATURA_MAXIMA_DIA'] == '25.0 °C'
+    assert resum['PRECIPITACIO_ACUM_DIA'] == '1.0 mm'
+    assert resum['TEMPERATURA_MITJANA_DIA'] == '20.0 °C'
+
+def test_resum_web_fet_avui_demana_la_majoria(tmp_path, monkeypatch):
+    ruta_db = tmp_path / 'historic.db'
+    monkeypatch.setattr(ad, 'STATIONS', [{'code': c} for c in ('A', 'B', 'C', 'D')])
+    connexio = magatzem_historic.obrir(ruta_db)
+    avui = datetime.utcnow().strftime('%Y-%m-%d')
+    with connexio:
+        for codi in ('A', 'B'):
+            fila_web = {'id_estac': codi, 'data': avui, 'data_extraccio': f'{avui} 00:40:00', 'variables': '{}'}
+            connexio.execute(f"INSERT INTO resums_diaris ({', '.join(fila_web)}) VALUES (?, ?, ?, ?)",
+                             list(fila_web.values()))
+    connexio.close()
+    assert not ad.resum_web_fet_avui(ruta_db=ruta_db)
+    assert ad.resum_web_fet_avui(minim_estacions=2, ruta_db=ruta_db)
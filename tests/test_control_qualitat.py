@@ -0,0 +1,50 @@
+import numpy as np
+
+import control_qualitat as cq
+
+COLUMNES = list(cq.COLUMNES_NUMERIQUES)
+
+
+def lot(*files):
+    """files: (estació, 'HH:MM', {columna: valor}) → arguments de proves, tot del lot"""
+    estacions = np.array([f[0] for f in files])
+    instants = np.array([f'2026-07-15T{f[1]}' for f in files], dtype='datetime64[m]')
+    valors = np.full((len(files), len(COLUMNES)), np.nan)
+    for i, (_, _, fila) in enumerate(files):
+        for columna, valor in fila.items():
+            valors[i, COLUMNES.index(columna)] = valor
+    return estacions, instants, valors, np.ones(len(files), dtype=bool)
+
+def marcades(mascara, columna):
+    return mascara[:, COLUMNES.index(columna)].tolist()
+
+
+def test_fora_de_rang():
+    resultat = cq.proves(*lot(('YT', '10:00', {'hr': 104, 'pm': 1013})))
+    assert marcades(resultat['rang'], 'hr') == [True]
+    assert marcades(resultat['rang'], 'pm') == [False]
+
+def test_un_pic_marca_nomes_el_valor_del_mig():
+    resultat = cq.proves(*lot(('YT', '10:00', {'tm': 20}), ('YT', '10:30', {'tm': 31}), ('YT', '11:00', {'tm': 20.5})))
+    assert marcades(resultat['salt'], 'tm') == [False, True, False]
+
+def test_un_salt_sostingut_es_marca():
+    resultat = cq.proves(*lot(('YT', '10:00', {'tm': 20}), ('YT', '10:30', {'tm': 30}), ('YT', '11:00', {'tm': 30.2})))
+    assert marcades(resultat['salt'], 'tm') == [False, True, False]
+
+def test_veins_d_altres_estacions_o_no_consecutius_no_compten():
+    resultat = cq.proves(*lot(('YT', '10:00', {'tm': 20}), ('Z1', '10:30', {'tm': 31}), ('Z1', '11:30', {'tm': 20})))
+    assert not resultat['salt'].any()
+
+def test_coherencia_de_temperatures_i_vent():
+    resultat = cq.proves(*lot(('YT', '10:00', {'tm': 18, 'tx': 17, 'tn': 16, 'vvm': 20, 'vvx': 30}),
+                              ('Z1', '10:00', {'tm': 18, 'tx': 19, 'tn': 17, 'vvm': 25, 'vvx': 20})))
+    assert marcades(resultat['coherencia'], 'tx') == [True, False]
+    assert marcades(resultat['coherencia'], 'vvx') == [False, True]
+
+def test_nomes_retorna_les_files_del_lot():
+    estacions, instants, valors, es_lot = lot(('YT', '09:30', {'tm': 20}), ('YT', '10:00', {'tm': 31}))
+    es_lot[0] = False
+    resultat = cq.proves(estacions, instants, valors, es_lot)
+    assert resultat['salt'].shape == (1, len(COLUMNES))
+    assert marcades(resultat['salt'], 'tm') == [True]
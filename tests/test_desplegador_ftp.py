@@ -0,0 +1,90 @@
+import ftplib
+import json
+import threading
+
+import pytest
+
+import desplegador_ftp as df
+
+pytest.importorskip('pyftpdlib')
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.servers import FTPServer
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    """Servidor FTP local (pyftpdlib) amb el directori remot a tmp_path/remot"""
+    remot = tmp_path / 'remot'
+    remot.mkdir()
+    autoritzador = DummyAuthorizer()
+    autoritzador.add_user('usuari', 'secret', str(tmp_path), perm='elradfmwMT')
+    handler = type('Handler', (FTPHandler,), {'authorizer': autoritzador})
+    handler.log_prefix = ''
+    server = FTPServer(('127.0.0.1', 0), handler)
+    fil = threading.Thread(target=server.serve_forever, kwargs={'timeout': 0.1}, daemon=True)
+    fil.start()
+    config = {'host': '127.0.0.1', 'port': server.address[1], 'usuari': 'usuari', 'contrasenya': 'secret',
+              'directori_remot': '/remot', 'timeout': 5}
+    yield config, remot
+    server.close_all()
+    fil.join(timeout=5)
+
+@pytest.fixture
+def paquet(tmp_path):
+    directori = tmp_path / 'paquet'
+    directori.mkdir()
+    (directori / 'banner.html').write_text('<p>banner</p>', encoding='utf-8')
+    (directori / 'index_YT.html').write_text('<p>YT</p>', encoding='utf-8')
+    (directori / 'notes.txt').write_text('no gestionat', encoding='utf-8')
+    return directori
+
+
+def test_desplegament_diferencial(servidor, paquet):
+    config, remot = servidor
+
+    primer = df.desplegar(config, paquet, connexions=2)
+    assert (primer['pujats'], primer['errors']) == (2, {})
+    assert (remot / 'index_YT.html').read_text(encoding='utf-8') == '<p>YT</p>'
+    assert not (remot / 'notes.txt').exists()
+
+    (paquet / 'index_YT.html').write_text('<p>YT nou</p>', encoding='utf-8')
+    (paquet / 'banner.html').unlink()
+    (remot / '.index_Z1.html.part').write_text('a mitges', encoding='utf-8')
+    segon = df.desplegar(config, paquet, connexions=2)
+
+    assert (segon['pujats'], segon['esborrats'], segon['sense_canvis']) == (1, 1, 0)
+    assert (remot / 'index_YT.html').read_text(encoding='utf-8') == '<p>YT nou</p>'
+    assert sorted(p.name for p in remot.iterdir()) == [df.MANIFEST_REMOT, 'index_YT.html']
+    manifest = json.loads((remot / df.MANIFEST_REMOT).read_text(encoding='utf-8'))
+    assert list(manifest['fitxers']) == ['index_YT.html']
+
+def test_una_pujada_fallida_no_deixa_el_temporal(servidor, paquet, monkeypatch):
+    config, remot = servidor
+    ftp = df.connectar(config)
+    try:
+        def rename(origen, desti):
+            raise ftplib.error_perm('553 no')
+        monkeypatch.setattr(ftp, 'rename', rename)
+        with pytest.raises(ftplib.error_perm):
+            df.pujar_fitxer(ftp, paquet, 'banner.html')
+    finally:
+        df.tancar(ftp)
+    assert list(remot.iterdir()) == []
+
+def test_esborra_el_desti_si_el_servidor_no_el_trepitja(servidor, paquet):
+    config, remot = servidor
+    (remot / 'banner.html').write_text('vell', encoding='utf-8')
+    ftp = df.connectar(config)
+    try:
+        original = ftp.rename
+        def rename(origen, desti):
+            if (remot / desti).exists():
+                raise ftplib.error_perm('553 el fitxer ja existeix')
+            return original(origen, desti)
+        ftp.rename = rename
+        df.pujar_fitxer(ftp, paquet, 'banner.html')
+    finally:
+        df.tancar(ftp)
+    assert [p.name for p in remot.iterdir()] == ['banner.html']
+    assert (remot / 'banner.html').read_text(encoding='utf-8') == '<p>banner</p>'
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+import dimoni_meteo as dm
+
+
+@pytest.fixture(autouse=True)
+def estat_buit(monkeypatch):
+    monkeypatch.setattr(dm, 'DARRERS', {})
+    monkeypatch.setattr(dm, 'CAPCALERES', {})
+
+
+def registre(data, periode):
+    return {'DATA_UTC': data, 'PERIODE_UTC': periode}
+
+def test_caduca_les_estacions_que_fa_massa_que_no_publiquen():
+    dm.DARRERS.update({'YT': registre('2026-07-15', '10:00 - 10:30'),
+                       'Z1': registre('2026-07-15', '07:30 - 08:00'),
+                       'XX': {}})
+    dm.CAPCALERES.update({'Z1': {}, 'YT': {}})
+
+    caducats = dm.caducar(datetime(2026, 7, 15, 10, 0))
+
+    assert sorted(caducats) == ['XX', 'Z1']
+    assert list(dm.DARRERS) == ['YT'] and list(dm.CAPCALERES) == ['YT']
+
+def test_un_error_al_cicle_no_atura_el_dimoni(monkeypatch):
+    cicles = []
+    def cicle(periode, estacions, ordre_posterior=None):
+        cicles.append(periode)
+        if len(cicles) == 1:
+            raise RuntimeError("generador")
+        raise KeyboardInterrupt
+    periodes = iter([datetime(2026, 7, 15, 10, 0), datetime(2026, 7, 15, 10, 30)])
+    monkeypatch.setattr(dm, 'cicle', cicle)
+    monkeypatch.setattr(dm, 'periode_publicat', lambda ara: next(periodes))
+    monkeypatch.setattr('sys.argv', ['dimoni_meteo.py'])
+
+    assert dm.main() == 0
+    assert len(cicles) == 2
+
+def test_publicar_genera_dins_del_proces_i_mante_el_context(monkeypatch):
+    crides = {'metadades': 0, 'generar': []}
+    def llegir_metadades():
+        crides['metadades'] += 1
+        return {'YT': {}}
+    monkeypatch.setattr(dm, 'GENERADOR', {'metadades': {}, 'dia_normals': None, 'tendencies': False})
+    monkeypatch.setattr(dm.scraper, 'desar_lot', lambda *args: None)
+    monkeypatch.setattr(dm, 'resum_web_ja_fet_avui', lambda: True)
+    monkeypatch.setattr(dm.agregador_diari, 'escriure_resum_diari', lambda: ([], {}))
+    monkeypatch.setattr(dm.generador, 'magatzem_historic', None)
+    monkeypatch.setattr(dm.generador, 'copiar_estils_existents', lambda: None)
+    monkeypatch.setattr(dm.DataLoader, 'llegir_metadades', llegir_metadades)
+    monkeypatch.setattr(dm.DataLoader, 'llegir_dades_periode', lambda: {'YT': {'PERIODE_UTC': '10:00 - 10:30'}})
+    monkeypatch.setattr(dm.DataLoader, 'llegir_dades_diari', lambda: {})
+    monkeypatch.setattr(dm.generador, 'generar_sortides', lambda *args: crides['generar'].append(args))
+    def subprocess(*args):
+        raise AssertionError("el generador no ha d'arrencar cap procés")
+    monkeypatch.setattr(dm, 'executar_script_simple', subprocess)
+
+    assert dm.publicar(['YT']) and dm.publicar(['YT'])
+    assert crides['metadades'] == 1
+    assert len(crides['generar']) == 2
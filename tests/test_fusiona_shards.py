@@ -0,0 +1,48 @@
+import argparse
+
+import pytest
+
+import fusiona_shards
+from fusiona_shards import estacions_del_shard, llegir_shard
+
+ESTACIONS = [{'code': codi} for codi in ('Z1', 'YT', 'D5', 'X4', 'CC', 'W1', 'UO')]
+
+
+def test_els_shards_reparteixen_totes_les_estacions_una_vegada():
+    shards = [estacions_del_shard(ESTACIONS, (i, 3)) for i in (1, 2, 3)]
+    codis = [e['code'] for shard in shards for e in shard]
+    assert sorted(codis) == sorted(e['code'] for e in ESTACIONS)
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+
+def test_cada_shard_conserva_l_ordre_original():
+    shard = [e['code'] for e in estacions_del_shard(ESTACIONS, (1, 2))]
+    assert shard == [e['code'] for e in ESTACIONS if e['code'] in shard]
+
+def test_sense_shard_son_totes():
+    assert estacions_del_shard(ESTACIONS) is ESTACIONS
+
+@pytest.mark.parametrize('text', ['0/4', '5/4', '2-4', 'a/b'])
+def test_shard_no_valid(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        llegir_shard(text)
+
+@pytest.fixture
+def trossos(tmp_path, monkeypatch):
+    monkeypatch.setattr(fusiona_shards, 'DIRECTORI_SHARDS', tmp_path)
+    fusions = []
+    monkeypatch.setitem(fusiona_shards.FUSIONS, 'periode', lambda trossos: fusions.append(trossos) or 1)
+    fusiona_shards.desar_shard('periode', (1, 2), {'dades_periode': [{'ID_ESTAC': 'YT'}]})
+    return tmp_path, fusions
+
+def test_si_falta_un_shard_no_es_fusiona(trossos):
+    directori, fusions = trossos
+    with pytest.raises(fusiona_shards.ShardsIncomplets):
+        fusiona_shards.fusionar('periode', esborrar=True)
+    assert fusions == []
+    assert list(directori.glob('periode_*.json'))
+
+def test_fusio_parcial_si_es_permet(trossos):
+    directori, fusions = trossos
+    assert fusiona_shards.fusionar('periode', esborrar=True, permet_parcial=True) == 1
+    assert len(fusions) == 1
+    assert not list(directori.glob('periode_*.json'))
@@ -0,0 +1,51 @@
+import re
+
+import numpy as np
+import pytest
+
+import generador_banners as gb
+
+
+def desplacaments(cami):
+    """'M0 5l2-1 2 0' → (inici, [(dx, dy), ...])"""
+    inici, relatiu = re.fullmatch(r'M(\d+ \d+)l(.*)', cami).groups()
+    numeros = [int(n) for n in re.findall(r'-?\d+', relatiu)]
+    return tuple(map(int, inici.split())), list(zip(numeros[::2], numeros[1::2]))
+
+
+def test_lttb_conserva_extrems_i_el_pic():
+    x = np.arange(100, dtype=float)
+    y = np.zeros(100)
+    y[37] = 10
+    rx, ry = gb.lttb(x, y, 10)
+    assert len(rx) == 10
+    assert (rx[0], rx[-1]) == (0, 99)
+    assert 37 in rx and ry.max() == 10
+    assert np.all(np.diff(rx) > 0)
+
+def test_lttb_no_toca_series_curtes():
+    x, y = np.arange(5.0), np.arange(5.0)
+    assert gb.lttb(x, y, 10)[0] is x
+
+def test_parells_relatius_sense_espais_sobrers():
+    assert gb.parells_relatius(np.array([0, 2, 4, 7]), np.array([5, 4, 4, 6])) == '2-1 2 0 3 2'
+
+def test_cami_linia_dins_del_viewbox():
+    valors = np.array([10.0, 12.0, 11.0, 15.0])
+    posicions = np.array([0, 10, 20, 47])
+    (x0, y0), passos = desplacaments(gb.cami_linia(posicions, valors, 48))
+    xs = np.cumsum([x0] + [dx for dx, _ in passos])
+    ys = np.cumsum([y0] + [dy for _, dy in passos])
+    assert (xs[0], xs[-1]) == (0, gb.SPARKLINE_AMPLADA)
+    assert ys.max() == gb.SPARKLINE_ALCADA - 1 and ys.min() == 1
+    assert ys[-1] == ys.min()  # el màxim és a dalt
+
+@pytest.mark.parametrize('valors', [np.zeros(48), np.array([])])
+def test_cami_barres_sense_pluja_nomes_la_base(valors):
+    assert gb.cami_barres(valors) == f"M0 {gb.SPARKLINE_ALCADA - 0.5}h{gb.SPARKLINE_AMPLADA}"
+
+def test_cami_barres_una_barra_per_valor_positiu():
+    valors = np.zeros(48)
+    valors[[0, 47]] = [2.0, 0.1]
+    barres = re.findall(r'M(\d+) \d+v-(\d+)', gb.cami_barres(valors))
+    assert barres == [('0', str(gb.SPARKLINE_ALCADA - 1)), (str(gb.SPARKLINE_AMPLADA), '1')]
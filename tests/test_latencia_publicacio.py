@@ -0,0 +1,69 @@
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import latencia_publicacio as lp
+
+INTERVAL_REINTENT = 2        # Minuts, com el dimoni
+DELAI_PER_DEFECTE = 4
+
+
+def registre_de(periode):
+    final = periode + timedelta(minutes=30)
+    return {'DATA_UTC': periode.strftime('%Y-%m-%d'),
+            'PERIODE_UTC': f"{periode:%H:%M} - {final:%H:%M}"}
+
+def cicle_del_dimoni(codi, periode, model, retard_real):
+    """Consultes d'un cicle: primer intent segons el model i reintents fins que hi és"""
+    consultes = []
+    retard = lp.primer_intent(codi, periode, model, DELAI_PER_DEFECTE)
+    while True:
+        moment = periode + timedelta(minutes=30 + retard)
+        publicat = retard >= retard_real
+        visible = periode if publicat else periode - timedelta(minutes=30)
+        consultes.append((codi, periode, registre_de(visible), moment))
+        if publicat:
+            return consultes
+        retard += INTERVAL_REINTENT
+
+def simular(ruta_db, retard_real, cicles, model_inicial=None):
+    aleatori = random.Random(42)
+    inici = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(minutes=30 * cicles)
+    model = dict(model_inicial or {})
+    for n in range(cicles):
+        periode = inici + timedelta(minutes=30 * n)
+        lp.registrar(cicle_del_dimoni('YT', periode, model, retard_real + aleatori.uniform(0, 3)), ruta_db)
+        model = lp.carregar_model(ruta_db) or model
+    return model
+
+
+def test_nomes_compta_el_periode_demanat():
+    demanat = datetime(2026, 8, 22, 17, 0)
+    moment = demanat + timedelta(minutes=50)
+    files = lp.limits_de_consultes([
+        ('YT', demanat, registre_de(demanat - timedelta(minutes=30)), moment),
+        ('Z1', demanat, registre_de(demanat), moment),
+        ('X4', demanat, None, moment),
+    ])
+    assert files == [('YT', '2026-08-22T17:00Z', 20.0, None), ('Z1', '2026-08-22T17:00Z', None, 20.0)]
+
+def test_estimacions_nomes_dels_periodes_acotats():
+    df = pd.DataFrame({'min_retard': [5.0, None, 5.0, 9.0], 'max_retard': [7.0, 7.0, 40.0, 8.0]})
+    assert lp.estimacions(df).tolist() == [7.0]
+
+def test_model_sense_periodes_acotats(tmp_path):
+    ruta_db = tmp_path / 'historic.db'
+    periode = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+    lp.registrar([('YT', periode - timedelta(minutes=30 * n), registre_de(periode - timedelta(minutes=30 * (n + 1))),
+                   periode + timedelta(minutes=35)) for n in range(8)], ruta_db)
+    assert lp.carregar_model(ruta_db) == {}
+
+def test_el_model_convergeix_al_retard_real(tmp_path):
+    model = simular(tmp_path / 'historic.db', retard_real=8, cicles=96)
+    assert 8 <= model['YT'] <= 11
+
+def test_el_model_no_puja_amb_els_seus_propis_intents(tmp_path):
+    """Un model sobreestimat torna a baixar gràcies als períodes d'exploració"""
+    model = simular(tmp_path / 'historic.db', retard_real=8, cicles=192, model_inicial={'YT': 55.0})
+    assert 8 <= model['YT'] <= 11
@@ -0,0 +1,33 @@
+import pytest
+
+import limitador_peticions as lp
+
+
+def test_la_rafaga_surt_sense_esperar_i_despres_al_ritme(tmp_path):
+    limitador = lp.LimitadorPeticions(2.0, 3, ruta=tmp_path / 'estat.bin')
+    esperes = [limitador.reservar() for _ in range(5)]
+    assert esperes[:3] == [0.0, 0.0, 0.0]
+    assert esperes[3] == pytest.approx(0.5, abs=0.05)
+    assert esperes[4] == pytest.approx(1.0, abs=0.05)
+
+def test_dos_limitadors_comparteixen_el_cubell(tmp_path):
+    ruta = tmp_path / 'estat.bin'
+    un, altre = lp.LimitadorPeticions(1.0, 1, ruta=ruta), lp.LimitadorPeticions(1.0, 1, ruta=ruta)
+    assert un.reservar() == 0.0
+    assert altre.reservar() == pytest.approx(1.0, abs=0.05)
+
+def test_un_ritme_propi_mes_baix_nomes_espaia_aquest_proces(tmp_path):
+    ruta = tmp_path / 'estat.bin'
+    lent = lp.LimitadorPeticions(10.0, 5, ruta=ruta, ritme_propi=1.0)
+    assert lent.reservar() == 0.0
+    assert lent.reservar() == pytest.approx(1.0, abs=0.05)
+    # El cubell compartit encara té fitxes per als altres
+    assert lp.LimitadorPeticions(10.0, 5, ruta=ruta).reservar() == 0.0
+
+def test_configurar_rebutja_un_ritme_mes_alt_que_el_compartit(monkeypatch):
+    monkeypatch.setattr(lp, '_LIMITADOR', None)
+    with pytest.raises(ValueError):
+        lp.configurar(lp.SCRAPING_REQUESTS_PER_SECOND * 2)
+    limitador = lp.configurar(lp.SCRAPING_REQUESTS_PER_SECOND / 2)
+    assert limitador.ritme == lp.SCRAPING_REQUESTS_PER_SECOND
+    assert limitador.interval_propi == pytest.approx(2 / lp.SCRAPING_REQUESTS_PER_SECOND)
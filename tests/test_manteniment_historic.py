@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import agregador_diari
+import magatzem_historic
+import manteniment_historic
+import rollups_historic
+import segments_historic
+import series_memmap
+
+
+def registre(instant, tm):
+    return {'ESTAT': 'OK', 'ID_ESTAC': 'YT', 'DATA_UTC': instant.strftime('%Y-%m-%d'),
+            'PERIODE_UTC': f"{instant:%H:%M} - {instant + timedelta(minutes=30):%H:%M}",
+            'VAR_TM_grausC': str(tm), 'VAR_TX_grausC': str(tm + 0.5)}
+
+@pytest.fixture
+def magatzem(tmp_path, monkeypatch):
+    """Dos dies antics (per compactar) i un d'avui"""
+    monkeypatch.setattr(segments_historic, 'DIRECTORI_SEGMENTS', tmp_path / 'segments')
+    monkeypatch.setattr(rollups_historic, 'comarques_estacions', lambda: {})
+    monkeypatch.setattr(series_memmap, 'inicialitzat', lambda ara=None: False)
+    ruta_db = str(tmp_path / 'historic.db')
+    avui = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    registres = [registre(dia + timedelta(minutes=30 * i), 10 + i / 10)
+                 for dia in (datetime(2020, 3, 1), datetime(2020, 3, 2), avui) for i in range(4)]
+    assert magatzem_historic.afegir_periodes(registres, ruta_db) == 12
+    return ruta_db
+
+def dies_agregats(ruta_db):
+    connexio = magatzem_historic.obrir(ruta_db)
+    try:
+        return {f[0]: f[1] for f in connexio.execute("SELECT data, n_periodes FROM agregats_diaris")}
+    finally:
+        connexio.close()
+
+
+def test_reconstruir_despres_de_compactar_no_perd_els_dies_antics(magatzem):
+    abans = dies_agregats(magatzem)
+    assert manteniment_historic.compactar(30, magatzem)['files'] == 8
+
+    assert agregador_diari.reconstruir(magatzem) == 12
+    assert dies_agregats(magatzem) == abans
+    assert rollups_historic.reconstruir(magatzem) == 12
+    assert rollups_historic.llegir_rollups('dia', 'YT', ruta_db=magatzem)[0]['inici'] == '2020-03-01'
+
+def test_els_rollups_horaris_nomes_es_guarden_durant_la_retencio(magatzem):
+    resultat = manteniment_historic.compactar(30, magatzem)
+    assert resultat['rollups_hora'] == 4
+    files = manteniment_historic.files_per_taula(magatzem)
+    assert files['rollups_hora'] == 2 and files['observacions'] == 4
+    assert rollups_historic.llegir_rollups('mes', 'YT', ruta_db=magatzem)[0]['n_periodes'] == 8
+
+    rollups_historic.reconstruir(magatzem)
+    assert manteniment_historic.files_per_taula(magatzem)['rollups_hora'] == 2
+
+def test_un_mes_amb_massa_decimals_es_queda_al_sqlite(magatzem):
+    connexio = magatzem_historic.obrir(magatzem)
+    with connexio:
+        connexio.execute("UPDATE observacions SET tm = 10.25 WHERE instant = '2020-03-02T00:00Z'")
+    connexio.close()
+
+    resultat = manteniment_historic.compactar(30, magatzem)
+
+    assert (resultat['files'], resultat['rebutjades'], resultat['segments']) == (0, 8, 0)
+    assert manteniment_historic.files_per_taula(magatzem)['observacions'] == 12
+    assert magatzem_historic.llegir_serie('YT', '2020-03-02', '2020-03-02', ('tm',), magatzem)[0][1] == 10.25
@@ -0,0 +1,68 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+import magatzem_historic
+import manteniment_historic
+import normals_climatiques as nc
+import rollups_historic
+import segments_historic
+
+
+def temperatura(instant):
+    """Cicle diari: 10 °C a les 03 UTC, 20 °C a les 15 UTC"""
+    hores = instant.hour + instant.minute / 60
+    return 15 - 5 * math.cos((hores - 3) / 24 * 2 * math.pi)
+
+def desar(ruta_db, anys):
+    connexio = magatzem_historic.obrir(ruta_db)
+    with connexio:
+        for any_ in anys:
+            for dia in range(-3, 4):
+                inici = datetime(any_, 7, 15) + timedelta(days=dia)
+                for periode in range(48):
+                    instant = inici + timedelta(minutes=30 * periode)
+                    tm = round(temperatura(instant), 1)
+                    connexio.execute("INSERT INTO observacions (id_estac, instant, tm, tx, tn, variables) "
+                                     "VALUES ('YT', ?, ?, ?, ?, '{}')",
+                                     (instant.strftime('%Y-%m-%dT%H:%MZ'), tm, tm + 0.5, tm - 0.5))
+    connexio.close()
+
+@pytest.fixture
+def magatzem(tmp_path, monkeypatch):
+    """Dos estius compactats als segments i un a la taula observacions"""
+    monkeypatch.setattr(segments_historic, 'DIRECTORI_SEGMENTS', tmp_path / 'segments')
+    monkeypatch.setattr(rollups_historic, 'comarques_estacions', lambda: {})
+    ruta_db = str(tmp_path / 'historic.db')
+    desar(ruta_db, (2023, 2024))
+    manteniment_historic.compactar(30, ruta_db)
+    desar(ruta_db, (2025,))
+    nc.construir(ruta_db, '2026-07-15')
+    return ruta_db
+
+
+def test_finestra_al_canvi_d_any():
+    dies = nc.dies_de_la_finestra('2026-12-30')
+    assert '12-23' in dies and '01-06' in dies and len(dies) == 15
+
+def test_normals_horaries_de_la_mateixa_hora(magatzem):
+    normals = nc.carregar_normals_horaries('2026-07-15', magatzem)
+    assert normals[('YT', 3)]['tm_mitjana'] < 11 < 19 < normals[('YT', 15)]['tm_mitjana']
+    # La màxima normal a les 06 UTC és la de la nit, no la del dia sencer
+    assert normals[('YT', 6)]['tx_mitjana'] < normals[('YT', 23)]['tx_mitjana'] - 5
+
+def test_una_tarda_normal_no_es_una_anomalia(magatzem):
+    normals = nc.carregar_normals_horaries('2026-07-15', magatzem)
+    anomalia = nc.anomalia_horaria(normals, 'YT', 15, 'tm', 20.0)
+    assert abs(anomalia['diferencia']) < 0.5 and anomalia['percentil'] is None
+    assert nc.anomalia_horaria(normals, 'YT', 15, 'tm', 25.0)['percentil'] == 'alt'
+    assert nc.anomalia_horaria(normals, 'YT', None, 'tm', 20.0) is None
+
+def test_sense_prou_dies_no_hi_ha_normal(magatzem):
+    assert nc.construir(magatzem, '2026-01-15') == (0, 0)
+    assert nc.carregar_normals_horaries('2026-01-15', magatzem) == {}
+
+def test_nomes_es_llegeixen_els_dies_precalculats(magatzem):
+    assert nc.carregar_normals_horaries('2026-07-16', magatzem)
+    assert nc.carregar_normals_horaries('2026-07-20', magatzem) == {}
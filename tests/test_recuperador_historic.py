@@ -0,0 +1,36 @@
+import json
+
+import pytest
+import requests
+
+import recuperador_historic as rh
+import scraper_periode_complet as scraper
+
+
+def test_un_error_de_xarxa_no_es_una_pagina_buida(monkeypatch):
+    def caiguda(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("sense xarxa")
+    monkeypatch.setattr(scraper, 'esperar_torn', lambda: None)
+    monkeypatch.setattr(scraper.SESSIO, 'get', caiguda)
+    with pytest.raises(scraper.ErrorDescarrega):
+        scraper.extreure_periode_desde_url('YT', scraper.datetime(2026, 1, 1), es_ahir=True, max_periodes=48)
+
+def test_sense_pressupost_no_es_una_pagina_buida(monkeypatch):
+    monkeypatch.setattr(scraper, 'PRESSUPOST', scraper.Pressupost(0))
+    with pytest.raises(scraper.ErrorDescarrega):
+        scraper.extreure_periode_desde_url('YT', scraper.datetime(2026, 1, 1), es_ahir=True, max_periodes=48)
+
+def test_les_parelles_fallides_no_es_marquen(tmp_path, monkeypatch):
+    def descarrega(codi, dia, es_ahir, max_periodes):
+        if codi == 'Z1':
+            raise scraper.ErrorDescarrega("timeout")
+        return []
+    monkeypatch.setattr(rh, 'extreure_periode_desde_url', descarrega)
+    monkeypatch.setattr(rh.limitador_peticions, 'configurar', lambda *args, **kwargs: None)
+    ruta = tmp_path / 'punt_control.json'
+
+    resum = rh.executar_recuperacio(['YT', 'Z1'], ['2026-01-01'], fils=2, ruta_punt_control=ruta)
+
+    assert (resum['fetes'], resum['buides'], resum['errors']) == (1, 1, 1)
+    assert json.loads(ruta.read_text(encoding='utf-8'))['fetes'] == {'YT|2026-01-01': 0}
+    assert rh.PuntControl(ruta).pendent('Z1', '2026-01-01')
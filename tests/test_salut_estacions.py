@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+import salut_estacions as se
+
+ARA = datetime(2026, 8, 22, 12, 0)
+
+
+def test_les_fallades_porten_al_repos(tmp_path):
+    ruta_db = tmp_path / 'historic.db'
+    resultats = {'YT': 'NO_TROBAT_AFTER_6_INTENTS', 'Z1': None, 'X4': None, 'D5': None}
+    assert se.registrar(resultats, ruta_db, ARA) == {'YT': 1}
+    assert se.registrar(resultats, ruta_db, ARA) == {'YT': 2}
+    salut = se.carregar(ruta_db)
+    assert se.en_repos(salut, 'YT', ARA) and not se.en_repos(salut, 'Z1', ARA)
+
+def test_els_errors_de_xarxa_no_compten(tmp_path):
+    ruta_db = tmp_path / 'historic.db'
+    resultats = {'YT': se.ERROR_DESCARREGA, 'Z1': None, 'X4': None, 'D5': None}
+    for _ in range(3):
+        assert se.registrar(resultats, ruta_db, ARA) == {}
+    assert se.carregar(ruta_db).get('YT', {}).get('fallades_seguides', 0) == 0
+
+def test_una_caiguda_general_no_compta(tmp_path):
+    ruta_db = tmp_path / 'historic.db'
+    resultats = {'YT': 'NO_TAULA_TROBADA', 'Z1': 'NO_TROBAT_AFTER_6_INTENTS',
+                 'X4': 'NO_TROBAT_AFTER_6_INTENTS', 'D5': None}
+    assert se.caiguda_general(resultats)
+    for _ in range(3):
+        assert se.registrar(resultats, ruta_db, ARA) == {}
+    salut = se.carregar(ruta_db)
+    assert not any(se.en_repos(salut, codi, ARA) for codi in resultats)
+    assert salut['D5']['darrer_exit'] == '2026-08-22T12:00Z'
+
+def test_el_repos_es_dobla_fins_al_maxim():
+    assert se.temps_de_repos(se.LLINDAR_FALLADES - 1) == timedelta(0)
+    assert se.temps_de_repos(se.LLINDAR_FALLADES) == se.REPOS_BASE
+    assert se.temps_de_repos(se.LLINDAR_FALLADES + 2) == 4 * se.REPOS_BASE
+    assert se.temps_de_repos(se.LLINDAR_FALLADES + 20) == se.REPOS_MAXIM
@@ -0,0 +1,83 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import scraper_periode_complet as scraper
+
+FRANGES = [datetime(2026, 8, 22, 12, 0) - timedelta(minutes=30 * i) for i in range(6)]
+
+
+@pytest.fixture
+def pagines(monkeypatch):
+    """Pàgines simulades: {índex de franja: (segons de resposta, té dades o None si falla)}; compta els torns"""
+    torns = []
+    respostes = {}
+
+    def extreure(codi, hora, es_ahir=False, max_periodes=None, amb_torn=False):
+        assert amb_torn, "el torn s'ha de prendre abans d'enviar la sonda"
+        segons, amb_dades = respostes.get(FRANGES.index(hora), (0, False))
+        time.sleep(segons)
+        if amb_dades is None:
+            raise scraper.ErrorDescarrega("timeout")
+        return [{'PERIODE_UTC': hora.strftime('%H:%M')}] if amb_dades else []
+
+    monkeypatch.setattr(scraper, 'extreure_periode_desde_url', extreure)
+    monkeypatch.setattr(scraper, 'esperar_torn', lambda: torns.append(time.monotonic()))
+    monkeypatch.setattr(scraper, 'LLINDAR_COBERTURA', 0.2)
+    monkeypatch.setattr(scraper, 'CONSULTES_LATENCIA', [])
+    monkeypatch.setattr(scraper, 'ESTADISTIQUES_SONDES', dict.fromkeys(scraper.ESTADISTIQUES_SONDES, 0))
+    return respostes, torns
+
+
+def test_la_franja_mes_recent_sola_si_respon(pagines):
+    respostes, torns = pagines
+    respostes.update({0: (0, True), 1: (0, True)})
+    assert scraper.sondes_escalonades('YT', FRANGES) == (0, [{'PERIODE_UTC': '12:00'}], False)
+    assert len(torns) == 1
+
+def test_l_anterior_nomes_despres_d_una_resposta_buida(pagines):
+    respostes, torns = pagines
+    respostes.update({2: (0, True)})
+    index, _, _ = scraper.sondes_escalonades('YT', FRANGES)
+    assert index == 2 and len(torns) == 3
+    assert scraper.ESTADISTIQUES_SONDES['cobertures'] == 0
+
+def test_cobertura_si_la_resposta_triga(pagines):
+    respostes, torns = pagines
+    respostes.update({0: (0.5, True), 1: (0, True)})
+    index, _, _ = scraper.sondes_escalonades('YT', FRANGES)
+    # La franja anterior respon abans, però guanya la més recent
+    assert index == 0
+    assert len(torns) == 2 and scraper.ESTADISTIQUES_SONDES['cobertures'] == 1
+    assert torns[1] - torns[0] >= 0.2
+
+def test_sense_dades_enlloc(pagines):
+    _, torns = pagines
+    assert scraper.sondes_escalonades('YT', FRANGES) == (None, [], False)
+    assert len(torns) == len(FRANGES)
+
+def test_sense_cap_pagina_es_un_error_de_xarxa(pagines):
+    respostes, _ = pagines
+    respostes.update({i: (0, None) for i in range(len(FRANGES))})
+    assert scraper.sondes_escalonades('YT', FRANGES) == (None, [], True)
+    respostes[3] = (0, False)
+    assert scraper.sondes_escalonades('YT', FRANGES) == (None, [], False)
+
+
+def test_el_pipeline_rep_totes_les_estacions_del_lot(tmp_path, monkeypatch):
+    from punt_control import PuntControlFinestra
+    punt = PuntControlFinestra('periode', '2026-08-22T1200', directori=tmp_path)
+    punt.marcar('YT', {'dades': [{'ID_ESTAC': 'YT'}], 'capcaleres': {'ID': 'YT'}, 'magatzem': []})
+    anterior = {'ID_ESTAC': 'Z1', 'ES_AHIR': 'NO'}
+    monkeypatch.setattr(scraper, 'registres_anteriors', lambda: ({'Z1': [anterior]}, {'Z1': {'ID': 'Z1'}}))
+    monkeypatch.setattr(scraper, 'prioritzar_estacions', lambda estacions, anteriors: estacions)
+    monkeypatch.setattr(scraper, 'PRESSUPOST', scraper.Pressupost(0))
+    monkeypatch.setattr(scraper, 'PERIODES_NOMES_MAGATZEM', [])
+    acabades = []
+
+    scraper.executa_scraping_intelligent([{'code': 'YT'}, {'code': 'Z1'}, {'code': 'XX'}], 'dades',
+                                         punt_control=punt, en_acabar_estacio=lambda *args: acabades.append(args))
+
+    assert acabades == [('YT', [{'ID_ESTAC': 'YT'}], {'ID': 'YT'}),
+                        ('Z1', [dict(anterior, DADES_ANTERIORS='SÍ')], {'ID': 'Z1'})]
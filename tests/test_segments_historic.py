@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import segments_historic as sh
+from magatzem_historic import COLUMNES_NUMERIQUES
+
+
+def fila(instant, extraccio, **valors):
+    return (instant, extraccio, *(valors.get(c) for c in COLUMNES_NUMERIQUES))
+
+FILES = [
+    fila('2026-01-01T00:00Z', '2026-01-01 00:40:00', tm=4.3, hr=91.0, ppt=0.0),
+    fila('2026-01-01T00:30Z', '2026-01-01 00:40:00', tm=4.1, hr=None, ppt=0.2),
+    fila('2026-01-01T01:30Z', '2026-01-01 01:45:00', tm=-0.7, hr=95.0, pm=1012.4),
+]
+
+
+def test_codificar_i_descodificar_conserva_les_files():
+    assert sh.descodificar(sh.codificar(FILES)) == FILES
+
+def test_una_columna_sempre_buida_torna_buida():
+    columnes = sh.descodificar_columnes(sh.codificar(FILES))
+    assert np.isnan(columnes['gn']).all()
+    assert columnes['instant'].astype(str).tolist() == ['2026-01-01T00:00', '2026-01-01T00:30', '2026-01-01T01:30']
+
+def test_un_segment_sense_una_columna_nova_continua_llegible():
+    arrays = sh.codificar(FILES)
+    arrays['columnes'] = arrays['columnes'][:-1]
+    arrays['deltes'] = arrays['deltes'][:-1]
+    arrays['bases'] = arrays['bases'][:-1]
+    arrays['nuls'] = arrays['nuls'][:-1]
+    columnes = sh.descodificar_columnes(arrays)
+    assert np.isnan(columnes[list(COLUMNES_NUMERIQUES)[-1]]).all()
+    assert columnes['tm'].tolist() == [4.3, 4.1, -0.7]
+
+def test_no_codifica_valors_amb_mes_decimals_dels_que_caben():
+    with pytest.raises(ValueError, match='ppt'):
+        sh.codificar(FILES + [fila('2026-01-01T02:00Z', '2026-01-01 02:15:00', tm=1.0, ppt=0.25)])
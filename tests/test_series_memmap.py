@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import series_memmap as sm
+
+
+@pytest.fixture
+def directori(tmp_path, monkeypatch):
+    monkeypatch.setattr(sm, 'DIRECTORI_MEMMAP', tmp_path)
+    monkeypatch.setattr(sm, 'MARCA_INICIALITZAT', tmp_path / 'inicialitzat')
+    return tmp_path
+
+
+def test_afegir_no_fa_res_sense_memoria_cau(directori):
+    sm.afegir([('YT', '2026-07-15T10:00Z', {'tm': 20.0})])
+    assert not sm.ruta_serie('YT').exists()
+
+def test_afegir_actualitza_una_memoria_cau_recent(directori):
+    sm.marcar_actualitzat()
+    ara = datetime.utcnow().replace(second=0, microsecond=0)
+    instant = (ara - timedelta(minutes=ara.minute % 30)).strftime('%Y-%m-%dT%H:%MZ')
+    sm.afegir([('YT', instant, {'tm': 20.0})])
+
+    dades = sm.finestra('YT', hores=1, ara=ara)
+    assert dades['tm'][-1] == pytest.approx(20.0)
+    assert np.isnan(dades['tm'][0])
+
+def test_una_marca_antiga_obliga_a_reconstruir(directori):
+    sm.marcar_actualitzat()
+    assert sm.inicialitzat()
+    assert not sm.inicialitzat(datetime.utcnow() + sm.ANTIGUITAT_MAXIMA + timedelta(minutes=1))